@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Catalog Cache Settings
+CATALOG_CACHE_MAX_ENTRIES = 512   # result sets held per process
+CATALOG_CACHE_TTL = 300           # seconds before a result set is reloaded
+
+# Favorites Cache Settings
+FAVORITES_CACHE_MAX_USERS = 4096  # users whose favorite ids are held per process
+FAVORITES_CACHE_TTL = 1800        # seconds before a user's favorites are reloaded
+
+
+class LRUCache:
+  """
+  A thread-safe, size-bounded cache with least-recently-used eviction
+  and a time-to-live on every entry. Keys are tuples so related entries
+  can be dropped together with invalidatePrefix().
+  """
+  def __init__(self, maxEntries=CATALOG_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL):
+    self.maxEntries = maxEntries
+    self.ttl = ttl
+    self._lock = threading.Lock()
+    self._entries = OrderedDict()   # key -> (expiresAt, value)
+
+    # Statistics
+    self._hits = 0
+    self._misses = 0
+    self._evictions = 0
+
+  def get(self, key, default=None):
+    """
+    Get a cached value and mark it as most recently used
+    Parameters:
+      key: a tuple identifying the value
+      default: returned when the key is missing or expired
+    Return: the cached value or default
+    """
+    now = time.monotonic()
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None or entry[0] <= now:
+        if entry is not None:
+          del self._entries[key]
+        self._misses += 1
+        return default
+      self._entries.move_to_end(key)
+      self._hits += 1
+      return entry[1]
+
+  def set(self, key, value, ttl=None):
+    """
+    Store a value, evicting the least recently used entries if full
+    Parameters:
+      key: a tuple identifying the value
+      value: the value to cache (treated as read-only by callers)
+      ttl: optional override of the cache's time-to-live in seconds
+    """
+    expiresAt = time.monotonic() + (self.ttl if ttl is None else ttl)
+    with self._lock:
+      self._entries[key] = (expiresAt, value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.maxEntries:
+        self._entries.popitem(last=False)
+        self._evictions += 1
+
+  def getOrLoad(self, key, loader, ttl=None):
+    """
+    Get a cached value, calling loader() to produce and store it on a miss
+    Parameters:
+      key: a tuple identifying the value
+      loader: a zero argument function returning the value
+      ttl: optional override of the cache's time-to-live in seconds
+    Return: the cached or freshly loaded value
+    """
+    missing = object()
+    value = self.get(key, missing)
+    if value is missing:
+      value = loader()
+      self.set(key, value, ttl)
+    return value
+
+  def invalidate(self, key):
+    """
+    Drop a single entry if present
+    """
+    with self._lock:
+      self._entries.pop(key, None)
+
+  def invalidatePrefix(self, prefix):
+    """
+    Drop every entry whose key starts with the given tuple
+    Parameters:
+      prefix: a tuple matched against the start of each key
+    """
+    size = len(prefix)
+    with self._lock:
+      for key in [key for key in self._entries if key[:size] == prefix]:
+        del self._entries[key]
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+
+  def stats(self):
+    """
+    Get a snapshot of the cache's size and hit rate
+    Return: a dictionary of cache metrics
+    """
+    with self._lock:
+      return {"entries": len(self._entries),
+              "max_entries": self.maxEntries,
+              "hits": self._hits,
+              "misses": self._misses,
+              "evictions": self._evictions}
+
+
+class FavoritesCache(LRUCache):
+  """
+  An LRU cache of each user's favorited content ids. Sets are stored
+  frozen and replaced on every change (copy on write), so readers can
+  iterate a set while another request adds or removes a favorite.
+  """
+  def __init__(self, maxEntries=FAVORITES_CACHE_MAX_USERS, ttl=FAVORITES_CACHE_TTL):
+    super().__init__(maxEntries, ttl)
+
+  def _update(self, key, change, newKey=None):
+    """
+    Replace a cached set with change(set), keeping its expiry. A key that
+    is not cached is left alone; it is loaded in full on the next read.
+    With newKey the changed set is moved to newKey (e.g. the next version).
+    """
+    now = time.monotonic()
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None and entry[0] > now:
+        if newKey is not None:
+          del self._entries[key]
+          key = newKey
+        self._entries[key] = (entry[0], frozenset(change(entry[1])))
+
+  def add(self, key, contentId, newKey=None):
+    """
+    Add a content id to a user's cached favorites
+    Parameters:
+      key: a tuple identifying the user
+      contentId: the newly favorited content id
+      newKey: optional key to store the changed set under
+    """
+    self._update(key, lambda ids: ids | {contentId}, newKey)
+
+  def discard(self, key, contentId, newKey=None):
+    """
+    Remove a content id from a user's cached favorites
+    Parameters:
+      key: a tuple identifying the user
+      contentId: the unfavorited content id
+      newKey: optional key to store the changed set under
+    """
+    self._update(key, lambda ids: ids - {contentId}, newKey)
+
+
+class VersionCounters:
+  """
+  Thread-safe version numbers for cached data. A version is bumped
+  whenever the data it covers changes, so anything derived from it
+  (e.g. an HTTP ETag, or a per-user cache entry) can be checked without
+  a database query. Versions are in-process until useStore() is given a
+  shared store; they are then seen by every worker process.
+  """
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._versions = {}
+    self._store = None
+
+  def useStore(self, store):
+    """
+    Keep the versions in a shared store (see database/sharedStore.py)
+    Parameters:
+      store: a store with get(key) and incr(key), or None for in-process
+    """
+    self._store = store
+
+  @property
+  def shared(self):
+    """
+    True if the versions are kept in a shared store (seen by every worker)
+    """
+    return self._store is not None
+
+  def get(self, key):
+    """
+    Get the current version for a key (0 until first bumped)
+    """
+    if self._store is not None:
+      value = self._store.get("version:" + repr(key))
+      return int(value) if value else 0
+    with self._lock:
+      return self._versions.get(key, 0)
+
+  def bump(self, key):
+    """
+    Advance the version for a key
+    Return: the new version
+    """
+    if self._store is not None:
+      return self._store.incr("version:" + repr(key))
+    with self._lock:
+      version = self._versions[key] = self._versions.get(key, 0) + 1
+      return version
+
+
+# Shared, process-level cache of catalog and dashboard result sets
+catalogCache = LRUCache()
+
+# Shared, process-level cache of each user's favorite content ids
+favoritesCache = FavoritesCache()
+
+# Versions of the catalog and of per-user data (process-level unless
+# given a shared store, see website/sessionStore.py)
+dataVersions = VersionCounters()
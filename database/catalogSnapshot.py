@@ -0,0 +1,322 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from decimal import Decimal
+
+try:
+  import fcntl   # POSIX only - elsewhere exports are serialized per process
+except ImportError:
+  fcntl = None
+
+# Catalog Snapshot Settings
+SNAPSHOT_CHECK_INTERVAL = 60   # seconds between version checks against the database
+
+# File layout: a header, a table of named sections, then the sections
+# (each 8-byte aligned). Numeric columns are int32 arrays with NULL
+# stored as SNAPSHOT_NULL; strings are an offsets array into a UTF-8 heap.
+SNAPSHOT_MAGIC = b"SECATLG1"
+SNAPSHOT_BYTE_ORDER = 0x01020304
+SNAPSHOT_HEADER = struct.Struct("=8sIqqII")   # magic, byte order, content / dimensions versions, rows, sections
+SNAPSHOT_SECTION = struct.Struct("=24sQQ")    # name, offset, length
+SNAPSHOT_NULL = -2 ** 31
+
+NUMERIC_COLUMNS = ("guid", "service_id", "genre", "rating", "release_year",
+                   "run_time_minutes", "num_seasons", "critic_score")
+STRING_COLUMNS = ("title", "description")
+SERVICE_TYPES = ("Movie", "TV Show")
+
+
+def writeSnapshot(path, contentVersion, dimensionsVersion, rows, services, genres, ratings):
+  """
+  Write a catalog snapshot. The file is written under a temporary name
+  and renamed into place, so a reader never sees a half-written file
+  (processes that already mapped the old file keep reading it).
+  Parameters:
+    path: the snapshot file
+    contentVersion / dimensionsVersion: the versions the data was read at
+    rows: content rows (guid, service_id, service_type, the NUMERIC_COLUMNS
+      and STRING_COLUMNS)
+    services: service rows (service_id, service_name, subscription_price, image)
+    genres: a dictionary of genre_id -> genre_name
+    ratings: a dictionary of rating_id -> rating_name
+  """
+  rows = sorted(rows, key=lambda row: row["guid"])
+  sections = []
+
+  for column in NUMERIC_COLUMNS:
+    values = array("i", (SNAPSHOT_NULL if row[column] is None else row[column] for row in rows))
+    sections.append((column, values.tobytes()))
+  sections.append(("service_type",
+                   bytes(SERVICE_TYPES.index(row["service_type"]) for row in rows)))
+
+  for column in STRING_COLUMNS:
+    offsets = array("I", [0])
+    heap = bytearray()
+    for row in rows:
+      heap += (row[column] or "").encode("utf-8")
+      offsets.append(len(heap))
+    sections.append((column + ".offsets", offsets.tobytes()))
+    sections.append((column + ".heap", bytes(heap)))
+
+  lookups = {"services": [dict(row, subscription_price=str(row["subscription_price"]))
+                          for row in services],
+             "genres": sorted(genres.items()),
+             "ratings": sorted(ratings.items())}
+  sections.append(("lookups", json.dumps(lookups).encode("utf-8")))
+
+  # Lay the sections out after the header and section table
+  offset = SNAPSHOT_HEADER.size + SNAPSHOT_SECTION.size * len(sections)
+  table = []
+  for name, data in sections:
+    offset += -offset % 8
+    table.append((name, offset, len(data)))
+    offset += len(data)
+
+  temporary = "%s.tmp-%d-%d" % (path, os.getpid(), threading.get_ident())
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+  with open(temporary, "wb") as snapshotFile:
+    snapshotFile.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_BYTE_ORDER,
+                                            contentVersion, dimensionsVersion,
+                                            len(rows), len(sections)))
+    for name, start, length in table:
+      snapshotFile.write(SNAPSHOT_SECTION.pack(name.encode(), start, length))
+    for (name, data), (_, start, _) in zip(sections, table):
+      snapshotFile.write(b"\0" * (start - snapshotFile.tell()))
+      snapshotFile.write(data)
+  os.replace(temporary, path)
+
+
+def exportSnapshot(cursor, path):
+  """
+  Read the content table and its lookup tables and write them to a snapshot
+  Parameters:
+    cursor: An active connection / cursor to a MySQL Database
+    path: the snapshot file
+  """
+  cursor.execute("CALL get_dimensions()")
+  dimensionsVersion = cursor.fetchone()["version"]
+  cursor.nextset()
+  services = cursor.fetchall()
+  cursor.nextset()
+  genres = {row["genre_id"]: row["genre_name"] for row in cursor.fetchall()}
+  cursor.nextset()
+  ratings = {row["rating_id"]: row["rating_name"] for row in cursor.fetchall()}
+
+  cursor.execute("CALL get_catalog_snapshot()")
+  contentVersion = cursor.fetchone()["version"]
+  cursor.nextset()
+  rows = cursor.fetchall()
+
+  writeSnapshot(path, contentVersion, dimensionsVersion, rows, services, genres, ratings)
+
+
+_EXPORT_LOCK = threading.Lock()
+
+
+@contextmanager
+def exportLock(path):
+  """
+  Hold an exclusive lock on <path>.lock for the duration of a with
+  block, so only one worker on the host exports a snapshot at a time
+  Parameters:
+    path: the snapshot file
+  """
+  if fcntl is None:
+    with _EXPORT_LOCK:
+      yield
+    return
+
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+  with open(path + ".lock", "a") as lockFile:
+    fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX)
+    try:
+      yield
+    finally:
+      fcntl.flock(lockFile.fileno(), fcntl.LOCK_UN)
+
+
+class CatalogSnapshot:
+  """
+  A read-only, memory-mapped catalog snapshot (see writeSnapshot).
+  Columns are read straight from the mapped file, so opening one costs
+  almost nothing and needs no database query. The file's pages are
+  shared by every worker on a host, but each worker still copies the
+  rows it reads into its own catalog views (see views.getCatalogViews).
+  """
+  def __init__(self, path):
+    """
+    Open a snapshot
+    Parameters:
+      path: the snapshot file
+    Raises ValueError if the file is not a snapshot this code can read
+    """
+    with open(path, "rb") as snapshotFile:
+      self._map = mmap.mmap(snapshotFile.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(self._map)
+
+    if len(view) < SNAPSHOT_HEADER.size:
+      raise ValueError("Truncated catalog snapshot: %s" % path)
+    (magic, byteOrder, self.contentVersion, self.dimensionsVersion,
+     self.rowCount, sectionCount) = SNAPSHOT_HEADER.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC or byteOrder != SNAPSHOT_BYTE_ORDER:
+      raise ValueError("Not a catalog snapshot for this machine: %s" % path)
+
+    self._sections = {}
+    for i in range(sectionCount):
+      name, offset, length = SNAPSHOT_SECTION.unpack_from(view, SNAPSHOT_HEADER.size +
+                                                          i * SNAPSHOT_SECTION.size)
+      if offset + length > len(view):
+        raise ValueError("Truncated catalog snapshot: %s" % path)
+      self._sections[name.rstrip(b"\0").decode()] = view[offset:offset + length]
+
+    self._columns = {column: self._sections[column].cast("i") for column in NUMERIC_COLUMNS}
+    self._serviceTypes = self._sections["service_type"]
+    self._strings = {column: (self._sections[column + ".offsets"].cast("I"),
+                              self._sections[column + ".heap"])
+                     for column in STRING_COLUMNS}
+
+  @classmethod
+  def open(cls, path):
+    """
+    Open a snapshot if there is a readable one
+    Return: a CatalogSnapshot, or None if the file is missing or unreadable
+    """
+    try:
+      return cls(path)
+    except (OSError, ValueError, KeyError):
+      return None
+
+  def __len__(self):
+    return self.rowCount
+
+  def lookups(self):
+    """
+    Get the lookup tables stored with the content
+    Return: (services, genres, ratings) as used by DimensionCache.loadTables
+    """
+    lookups = json.loads(bytes(self._sections["lookups"]))
+    services = {row["service_id"]: dict(row, subscription_price=Decimal(row["subscription_price"]))
+                for row in lookups["services"]}
+    return services, dict(lookups["genres"]), dict(lookups["ratings"])
+
+  def _string(self, column, i):
+    offsets, heap = self._strings[column]
+    return str(heap[offsets[i]:offsets[i + 1]], "utf-8")
+
+  def contentRows(self, serviceType=None):
+    """
+    Read content rows in the format of get_catalog_ids
+    Parameters:
+      serviceType: optional "Movie" or "TV Show" filter
+    Return: yields one dictionary per row
+    """
+    wanted = None if serviceType is None else SERVICE_TYPES.index(serviceType)
+    columns = self._columns
+    serviceTypes = self._serviceTypes
+    for i in range(self.rowCount):
+      if wanted is not None and serviceTypes[i] != wanted:
+        continue
+      row = {column: (None if values[i] == SNAPSHOT_NULL else values[i])
+             for column, values in columns.items()}
+      row["service_type"] = SERVICE_TYPES[serviceTypes[i]]
+      row["title"] = self._string("title", i)
+      row["description"] = self._string("description", i)
+      yield row
+
+
+class SnapshotCache:
+  """
+  The current catalog snapshot for one database host. Its versions are
+  checked against the database at most every checkInterval seconds;
+  when either moved the file is re-exported (or, if another worker
+  already did, just reopened). Exports are serialized across workers
+  with a lock file, so a version change causes one export per host.
+  A failed check is not retried for checkInterval seconds either; until
+  then the previous snapshot (or none) is served.
+  """
+  def __init__(self, path, checkInterval=SNAPSHOT_CHECK_INTERVAL):
+    self.path = path
+    self.checkInterval = checkInterval
+    self.snapshot = None
+    self._checkedAt = None
+    self._lock = threading.Lock()
+
+  def needsCheck(self):
+    """
+    Return: True if the versions were never checked or have not been
+      checked for checkInterval seconds
+    """
+    return (self._checkedAt is None or
+            time.monotonic() - self._checkedAt > self.checkInterval)
+
+  def refresh(self, cursor):
+    """
+    Make sure the open snapshot matches the database's versions
+    Parameters:
+      cursor: An active connection / cursor to a MySQL Database
+    Return: True if a different snapshot was opened, False if already current
+    Raises the database or file error if the check or export failed
+    (the check is still counted, so callers back off)
+    """
+    try:
+      return self._refresh(cursor)
+    except Exception:
+      with self._lock:
+        self._checkedAt = time.monotonic()
+      raise
+
+  def _refresh(self, cursor):
+    cursor.execute("CALL get_catalog_versions()")
+    row = cursor.fetchone()
+    versions = (row["content_version"], row["dimensions_version"])
+
+    def current(snapshot):
+      # A file exported after our version check may already be newer
+      return (snapshot is not None and
+              snapshot.contentVersion >= versions[0] and
+              snapshot.dimensionsVersion >= versions[1])
+
+    if (self.snapshot is not None and
+        (self.snapshot.contentVersion, self.snapshot.dimensionsVersion) == versions):
+      with self._lock:
+        self._checkedAt = time.monotonic()
+      return False
+
+    snapshot = CatalogSnapshot.open(self.path)
+    if not current(snapshot):
+      with exportLock(self.path):
+        # Another worker may have exported while we waited for the lock
+        snapshot = CatalogSnapshot.open(self.path)
+        if not current(snapshot):
+          exportSnapshot(cursor, self.path)
+          snapshot = CatalogSnapshot.open(self.path)
+
+    with self._lock:
+      self.snapshot = snapshot
+      self._checkedAt = time.monotonic()
+    return True
+
+
+_SNAPSHOTS = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def getSnapshotCache(hostName, directory):
+  """
+  Get the catalog snapshot cache for a database host, creating it on first use
+  Parameters:
+    hostName (string) : name of the MySQL host
+    directory (string) : where snapshot files are kept
+  Return: a SnapshotCache (empty until refreshed)
+  """
+  with _SNAPSHOTS_LOCK:
+    snapshots = _SNAPSHOTS.get(hostName)
+    if snapshots is None:
+      fileName = "".join(c if c.isalnum() or c in "._-" else "_" for c in hostName or "")
+      snapshots = _SNAPSHOTS[hostName] = SnapshotCache(os.path.join(directory, fileName + ".catalog"))
+  return snapshots
@@ -0,0 +1,175 @@
+from array import array
+
+# Columns of a catalog content row (see DimensionCache.resolve)
+CONTENT_COLUMNS = ("guid", "service_name", "subscription_price", "service_type",
+                   "image", "title", "genre_name", "run_time_minutes",
+                   "num_seasons", "rating_name", "critic_score", "description")
+
+# Low-cardinality columns: each distinct value is stored once per catalog
+LOOKUP_COLUMNS = ("service_name", "subscription_price", "service_type",
+                  "image", "genre_name", "rating_name")
+
+
+class CatalogRow:
+  """
+  A compact, read-only content row. Values live in __slots__ instead of
+  a per-row dictionary, so a cached catalog holds no per-row key table.
+  Supports row["column"] (and .get / keys) so templates and code written
+  for DictCursor rows work unchanged.
+  """
+  __slots__ = CONTENT_COLUMNS
+
+  def __init__(self, values):
+    for column in CONTENT_COLUMNS:
+      object.__setattr__(self, column, values.get(column))
+
+  def __setattr__(self, name, value):
+    raise AttributeError("CatalogRow is read-only")
+
+  def __getitem__(self, column):
+    try:
+      return getattr(self, column)
+    except AttributeError:
+      raise KeyError(column) from None
+
+  def __contains__(self, column):
+    return column in CONTENT_COLUMNS
+
+  def __iter__(self):
+    return iter(CONTENT_COLUMNS)
+
+  def __len__(self):
+    return len(CONTENT_COLUMNS)
+
+  def get(self, column, default=None):
+    return getattr(self, column, default) if column in CONTENT_COLUMNS else default
+
+  def keys(self):
+    return CONTENT_COLUMNS
+
+  def __repr__(self):
+    return "CatalogRow(guid=%r, title=%r)" % (self.guid, self.title)
+
+
+def compactRows(rows):
+  """
+  Convert DictCursor content rows into CatalogRow objects. Lookup
+  columns (service, genre, rating, ...) are dictionary-encoded: equal
+  values share a single object instead of one copy per row.
+  Parameters:
+    rows: content rows (dictionaries) with the CONTENT_COLUMNS
+  Return: a list of CatalogRow
+  """
+  lookups = {}
+  compact = []
+  for row in rows:
+    values = dict(row)
+    for column in LOOKUP_COLUMNS:
+      value = values.get(column)
+      if value is not None:
+        values[column] = lookups.setdefault((column, value), value)
+    compact.append(CatalogRow(values))
+  return compact
+
+
+class SortedCatalogView:
+  """
+  A result set fetched once with every sort order precomputed as an
+  index permutation. Re-sorting (or paging through a sort order) only
+  reads the permutation, so it never needs another database round trip.
+  """
+  def __init__(self, rows, sortColumns, idColumn=None):
+    """
+    Build the view and its sort orders
+    Parameters:
+      rows: the result set (a list of dictionaries)
+      sortColumns: a dictionary of sort type -> (column, descending),
+        e.g. {"a-z": ("service_name", False), "z-a": ("service_name", True)}
+      idColumn: an optional unique column; ties are broken on it and
+        it identifies the last row of a page for page()
+    """
+    self.rows = list(rows)
+    self.sortColumns = dict(sortColumns)
+    self.idColumn = idColumn
+    self._rowIndex = ({row[idColumn]: i for i, row in enumerate(self.rows)}
+                      if idColumn else {})
+    self._orders = {}   # sort type -> array of row numbers in order
+    self._ranks = {}    # sort type -> array of each row's position
+
+    # Sort each column once ascending; descending orders are its reverse
+    ascending = {}
+    for sortType, (column, descending) in self.sortColumns.items():
+      if column not in ascending:
+        ascending[column] = self._sortAscending(column)
+      order = ascending[column]
+      self._orders[sortType] = array("I", reversed(order)) if descending else order
+
+    for sortType, order in self._orders.items():
+      rank = array("I", bytes(4 * len(order)))
+      for position, rowNumber in enumerate(order):
+        rank[rowNumber] = position
+      self._ranks[sortType] = rank
+
+  def _sortAscending(self, column):
+    """
+    Order row numbers by a column ascending (NULLs first, as in MySQL),
+    breaking ties on the id column (or row number)
+    """
+    rows = self.rows
+    idColumn = self.idColumn
+
+    def sortKey(i):
+      value = rows[i][column]
+      return (value is not None, value, rows[i][idColumn] if idColumn else i)
+
+    return array("I", sorted(range(len(rows)), key=sortKey))
+
+  def __len__(self):
+    return len(self.rows)
+
+  def sorted(self, sortType):
+    """
+    Get every row in a given sort order
+    Parameters:
+      sortType: one of the view's sort types
+    Return: a list of rows
+    """
+    rows = self.rows
+    return [rows[i] for i in self._orders[sortType]]
+
+  def page(self, sortType, pageSize, afterId=None):
+    """
+    Get one page of rows in a given sort order
+    Parameters:
+      sortType: one of the view's sort types
+      pageSize: the maximum number of rows to return
+      afterId: the id column value of the last row on the previous page
+        (None, or an id no longer in the view, starts at the first page)
+    Return: a dictionary with the page's rows and the (sort key, id)
+      cursor for the next page, or None if this is the last page
+    """
+    order = self._orders[sortType]
+    start = 0
+    if afterId is not None and afterId in self._rowIndex:
+      start = self._ranks[sortType][self._rowIndex[afterId]] + 1
+
+    rows = [self.rows[i] for i in order[start:start + pageSize]]
+    nextPage = None
+    if rows and start + pageSize < len(order):
+      column = self.sortColumns[sortType][0]
+      nextPage = (rows[-1][column], rows[-1][self.idColumn])
+
+    return {"rows": rows, "next": nextPage}
+
+  def select(self, ids, sortType):
+    """
+    Get the rows with the given ids in a given sort order
+    Parameters:
+      ids: an iterable of id column values (ids not in the view are skipped)
+      sortType: one of the view's sort types
+    Return: a list of rows
+    """
+    rank = self._ranks[sortType]
+    rowNumbers = [self._rowIndex[i] for i in ids if i in self._rowIndex]
+    rowNumbers.sort(key=rank.__getitem__)
+    return [self.rows[i] for i in rowNumbers]
@@ -1,8 +1,26 @@
 import pymysql
-from flask import flash, render_template
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from flask import flash, render_template, g
 
 DATABASE_NAME = "stream_easy"
 
+# Connection Pool Settings
+POOL_MAX_SIZE = 10            # max open connections per set of credentials
+POOL_MAX_IDLE_TIME = 300      # seconds a connection may sit idle in the pool
+POOL_MAX_LIFETIME = 3600      # seconds before a connection is recycled
+POOL_PING_INTERVAL = 5        # seconds idle before a checkout pings the server
+POOL_CHECKOUT_TIMEOUT = 10    # seconds to wait for a free connection
+
+# Parallel Query Settings
+QUERY_EXECUTOR_MAX_WORKERS = 4   # independent queries run at the same time
+
+# Streaming Query Settings
+STREAM_BATCH_SIZE = 200          # rows read from the server per fetchmany()
+
 
 def connectDatabase(hostName, userName, userPassword):
   """
@@ -22,6 +40,448 @@ def connectDatabase(hostName, userName, userPassword):
 
   return connection
 
+
+#=======================#
+#=== Connection Pool ===#
+#=======================#
+class PoolTimeoutError(pymysql.err.OperationalError):
+  """
+  Raised when no pooled connection becomes free within the checkout timeout.
+  Subclasses OperationalError so existing connection error handling applies.
+  """
+
+
+class PooledConnection:
+  """
+  A thin wrapper around a PyMySQL connection checked out from a pool.
+  All attributes are forwarded to the real connection, except close()
+  which returns the connection to its pool instead of closing the socket.
+  """
+  def __init__(self, pool, connection, createdAt):
+    self._pool = pool
+    self._connection = connection
+    self._createdAt = createdAt
+    self._released = False
+
+  def __getattr__(self, name):
+    return getattr(self._connection, name)
+
+  def close(self):
+    """
+    Return the connection to the pool. Safe to call more than once.
+    """
+    if not self._released:
+      self._released = True
+      self._pool.release(self)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, excValue, traceback):
+    if excType is not None:
+      try:
+        self._connection.rollback()
+      except pymysql.err.Error:
+        pass
+    self.close()
+
+
+class ConnectionPool:
+  """
+  A bounded, thread-safe pool of PyMySQL connections for one set of
+  database credentials. Idle connections are kept in LIFO order so the
+  most recently used (warmest) connection is handed out first.
+  """
+  def __init__(self, hostName, userName, userPassword,
+               maxSize=POOL_MAX_SIZE,
+               maxIdleTime=POOL_MAX_IDLE_TIME,
+               maxLifetime=POOL_MAX_LIFETIME,
+               pingInterval=POOL_PING_INTERVAL,
+               checkoutTimeout=POOL_CHECKOUT_TIMEOUT):
+    self.hostName = hostName
+    self.userName = userName
+    self.userPassword = userPassword
+    self.maxSize = maxSize
+    self.maxIdleTime = maxIdleTime
+    self.maxLifetime = maxLifetime
+    self.pingInterval = pingInterval
+    self.checkoutTimeout = checkoutTimeout
+
+    self._lock = threading.Condition()
+    self._idle = deque()     # (connection, createdAt, lastUsed)
+    self._size = 0           # open connections (idle + checked out)
+    self._closed = False
+
+    # Statistics
+    self._checkouts = 0
+    self._waits = 0
+    self._timeouts = 0
+    self._discarded = 0
+    self._checkoutTime = 0.0
+    self._maxCheckoutTime = 0.0
+
+  def _connect(self):
+    return connectDatabase(self.hostName, self.userName, self.userPassword)
+
+  def _discard(self, connection):
+    """
+    Close a connection that will not be returned to the pool.
+    Precondition: the pool lock is NOT held
+    """
+    try:
+      connection.close()
+    except pymysql.err.Error:
+      pass
+
+  def _isExpired(self, createdAt, lastUsed, now):
+    return (now - createdAt > self.maxLifetime or
+            now - lastUsed > self.maxIdleTime)
+
+  def _sweepIdle(self, now):
+    """
+    Remove every idle connection that is too old or has been idle for
+    too long, wherever it is in the deque (a fresh connection on top
+    must not shield expired ones below it).
+    Precondition: the pool lock is held
+    Return: the removed connections, to be discarded outside the lock
+    """
+    stale = [entry[0] for entry in self._idle if self._isExpired(entry[1], entry[2], now)]
+    if stale:
+      self._idle = deque(entry for entry in self._idle
+                         if not self._isExpired(entry[1], entry[2], now))
+      self._size -= len(stale)
+      self._discarded += len(stale)
+    return stale
+
+  def acquire(self):
+    """
+    Check out a healthy connection, waiting up to checkoutTimeout seconds
+    if the pool is at capacity.
+    Return: a PooledConnection
+    """
+    start = time.monotonic()
+    deadline = start + self.checkoutTimeout
+    waited = False
+    stale = []
+
+    with self._lock:
+      while True:
+        if self._closed:
+          raise pymysql.err.OperationalError("Connection pool is closed")
+        now = time.monotonic()
+        stale.extend(self._sweepIdle(now))
+        if self._idle:
+          connection, createdAt, lastUsed = self._idle.pop()
+          break
+        if self._size < self.maxSize:
+          self._size += 1
+          connection, createdAt, lastUsed = None, now, now
+          break
+        remaining = deadline - now
+        if remaining <= 0:
+          self._timeouts += 1
+          raise PoolTimeoutError("Timed out waiting for a database connection")
+        if not waited:
+          waited = True
+          self._waits += 1
+        self._lock.wait(remaining)
+
+    for old in stale:
+      self._discard(old)
+
+    # Open or health check the connection outside of the lock
+    try:
+      if connection is None:
+        connection = self._connect()
+      elif time.monotonic() - lastUsed > self.pingInterval:
+        threadId = connection.thread_id()
+        connection.ping(reconnect=True)
+        # A reconnect is a new connection - restart its lifetime
+        if connection.thread_id() != threadId:
+          createdAt = time.monotonic()
+    except Exception:
+      if connection is not None:
+        self._discard(connection)
+      with self._lock:
+        self._size -= 1
+        self._discarded += 1
+        self._lock.notify()
+      raise
+
+    elapsed = time.monotonic() - start
+    with self._lock:
+      self._checkouts += 1
+      self._checkoutTime += elapsed
+      self._maxCheckoutTime = max(self._maxCheckoutTime, elapsed)
+
+    return PooledConnection(self, connection, createdAt)
+
+  def release(self, pooled):
+    """
+    Return a checked out connection to the pool. Any open transaction is
+    rolled back first, so the next borrower never inherits uncommitted
+    writes or an old REPEATABLE READ snapshot. Connections that are
+    closed, fail to roll back, are past their lifetime, or are returned
+    to a closed pool are discarded.
+    Parameters:
+      pooled: a PooledConnection previously returned by acquire()
+    """
+    connection = pooled._connection
+    now = time.monotonic()
+    keep = (connection.open and
+            not self._closed and
+            now - pooled._createdAt <= self.maxLifetime)
+    if keep:
+      try:
+        connection.rollback()
+      except Exception:
+        keep = False
+
+    with self._lock:
+      if keep:
+        self._idle.append((connection, pooled._createdAt, now))
+      else:
+        self._size -= 1
+        self._discarded += 1
+      self._lock.notify()
+
+    if not keep:
+      self._discard(connection)
+
+  @contextmanager
+  def connection(self):
+    """
+    Context manager checkout. The connection is rolled back if the block
+    raises and is always returned to the pool on exit.
+    """
+    pooled = self.acquire()
+    with pooled:
+      yield pooled
+
+  def stats(self):
+    """
+    Get a snapshot of the pool's size and checkout statistics
+    Return: a dictionary of pool metrics
+    """
+    with self._lock:
+      idle = len(self._idle)
+      return {"host": self.hostName,
+              "user": self.userName,
+              "size": self._size,
+              "idle": idle,
+              "in_use": self._size - idle,
+              "max_size": self.maxSize,
+              "checkouts": self._checkouts,
+              "waits": self._waits,
+              "timeouts": self._timeouts,
+              "discarded": self._discarded,
+              "avg_checkout_ms": (1000 * self._checkoutTime / self._checkouts
+                                  if self._checkouts else 0.0),
+              "max_checkout_ms": 1000 * self._maxCheckoutTime}
+
+  def close(self):
+    """
+    Close every idle connection and stop handing out new ones. Connections
+    currently checked out are closed when they are released.
+    """
+    with self._lock:
+      self._closed = True
+      idle = [entry[0] for entry in self._idle]
+      self._size -= len(idle)
+      self._idle.clear()
+      self._lock.notify_all()
+    for connection in idle:
+      self._discard(connection)
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def getPool(hostName, userName, userPassword):
+  """
+  Get the connection pool for a set of credentials, creating it on first use.
+  Pools are keyed by (host, user, password), so a session that supplies a
+  different (e.g. wrong) password never closes a pool that is working.
+  A new pool is only registered once its first connection succeeds, so
+  failed logins (e.g. wrong passwords) never leave pools behind.
+  Parameters:
+    hostName (string) : name of the MySQL host
+    userName (string) : username for the database
+    userPassword (string) : password for the database
+  Return: a ConnectionPool
+  Raises the connection error if a new pool cannot connect
+  """
+  key = (hostName, userName, userPassword)
+  with _POOLS_LOCK:
+    pool = _POOLS.get(key)
+  if pool is not None:
+    return pool
+
+  # Connect outside the lock; the connection stays in the pool, warm
+  pool = ConnectionPool(hostName, userName, userPassword)
+  pool.acquire().close()
+
+  with _POOLS_LOCK:
+    registered = _POOLS.setdefault(key, pool)
+  if registered is not pool:
+    # Another thread registered the same credentials first
+    pool.close()
+  return registered
+
+
+def getPoolStats():
+  """
+  Get statistics for every connection pool in this process
+  Return: a list of dictionaries (one per pool)
+  """
+  with _POOLS_LOCK:
+    pools = list(_POOLS.values())
+  return [pool.stats() for pool in pools]
+
+
+def closePools():
+  """
+  Close every connection pool in this process. Call in a pre-forking
+  server's master once it is done with the database, so no socket is
+  inherited by (and shared with) the workers.
+  """
+  with _POOLS_LOCK:
+    pools = list(_POOLS.values())
+    _POOLS.clear()
+  for pool in pools:
+    pool.close()
+
+
+def reinitAfterFork():
+  """
+  Give a freshly forked worker its own pools, locks and query threads.
+  Anything inherited from the parent is dropped without being closed,
+  since its sockets (if any) still belong to the parent.
+  """
+  global _POOLS, _POOLS_LOCK, _EXECUTOR, _EXECUTOR_LOCK
+  _POOLS = {}
+  _POOLS_LOCK = threading.Lock()
+  _EXECUTOR = None
+  _EXECUTOR_LOCK = threading.Lock()
+
+
+@contextmanager
+def pooledConnection(hostName, userName, userPassword):
+  """
+  Check out a pooled database connection for the duration of a with block.
+  Parameters:
+    hostName (string) : name of the MySQL host
+    userName (string) : username for the database
+    userPassword (string) : password for the database
+  Return: a PooledConnection (returned to the pool on exit)
+  """
+  with getPool(hostName, userName, userPassword).connection() as connection:
+    yield connection
+
+
+#=======================#
+#=== Parallel Queries ==#
+#=======================#
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _getExecutor():
+  """
+  Get the shared query thread pool, creating it on first use
+  """
+  global _EXECUTOR
+  with _EXECUTOR_LOCK:
+    if _EXECUTOR is None:
+      _EXECUTOR = ThreadPoolExecutor(max_workers=QUERY_EXECUTOR_MAX_WORKERS,
+                                     thread_name_prefix="query")
+    return _EXECUTOR
+
+
+def _runOnPool(pool, queryHelper, args):
+  """
+  Run one SQL query helper on its own pooled connection and commit
+  """
+  with pool.connection() as connection:
+    with connection.cursor() as cursor:
+      result = queryHelper(cursor, *args)
+    connection.commit()
+  return result
+
+
+def runParallelQueries(hostName, userName, userPassword, queries):
+  """
+  Run a set of independent SQL query helpers at the same time, each on
+  its own pooled connection, so the total latency approaches that of
+  the slowest query rather than the sum of all of them.
+  Parameters:
+    hostName (string) : name of the MySQL host
+    userName (string) : username for the database
+    userPassword (string) : password for the database
+    queries: a dictionary of name -> (queryHelper, args), where each
+      query helper takes (cursor, *args)
+  Return: a dictionary of name -> result of that query helper
+    (the first error raised by any query is re-raised)
+  """
+  pool = getPool(hostName, userName, userPassword)
+
+  # Nothing to overlap - run inline and skip the thread hand off
+  if len(queries) <= 1:
+    return {name: _runOnPool(pool, queryHelper, args)
+            for name, (queryHelper, args) in queries.items()}
+
+  executor = _getExecutor()
+  futures = {name: executor.submit(_runOnPool, pool, queryHelper, args)
+             for name, (queryHelper, args) in queries.items()}
+  return {name: future.result() for name, future in futures.items()}
+
+
+#=======================#
+#=== Streamed Queries ==#
+#=======================#
+def streamRows(hostName, userName, userPassword, query, args=(),
+               batchSize=STREAM_BATCH_SIZE):
+  """
+  Run a query on a pooled connection with an unbuffered cursor and yield
+  its rows as they arrive, batchSize rows at a time, so the full result
+  set is never held in memory. The connection is returned to the pool
+  once the generator is exhausted or closed.
+  Parameters:
+    hostName (string) : name of the MySQL host
+    userName (string) : username for the database
+    userPassword (string) : password for the database
+    query (string) : the SQL to run (a single result set)
+    args: the query parameters
+    batchSize (int) : rows to fetch per round trip
+  Return: a generator of rows (dictionaries)
+  """
+  with pooledConnection(hostName, userName, userPassword) as connection:
+    cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+    try:
+      cursor.execute(query, args)
+      while True:
+        rows = cursor.fetchmany(batchSize)
+        if not rows:
+          break
+        for row in rows:
+          yield row
+    finally:
+      # Drains any unread rows so the connection can be reused
+      cursor.close()
+    connection.commit()
+
+
+def releaseConnections(exception=None):
+  """
+  Return any pooled connections still checked out by the current request.
+  Registered as an app context teardown so early returns and errors
+  never leak a connection out of the pool.
+  """
+  for connection in g.pop("pooled_connections", []):
+    connection.close()
+
+
 def getConnection(hostName, userName, userPassword):
     """
     Get a database connection object. Throw exceptions to the user
@@ -30,18 +490,20 @@ def getConnection(hostName, userName, userPassword):
         hostName (string) : name of the MySQL host
         userName (string) : username for the database
         userPassword (string) : password for the database
-    Return: a PyMSQL database connection object
+    Return: a pooled PyMSQL database connection object
+      (close() returns it to the pool)
     """
     try:
-      connection = connectDatabase(hostName,
-                                   userName,
-                                   userPassword)
+      connection = getPool(hostName,
+                           userName,
+                           userPassword).acquire()
     except pymysql.err.OperationalError:
       flash("Database Connection Error. Please Re-Enter Credentials.",
             category="error")
-      return render_template("home.html", 
-                             session=False, 
+      return render_template("home.html",
+                             session=False,
                              logged_in=False)
+    g.setdefault("pooled_connections", []).append(connection)
     return connection
 
-      
+
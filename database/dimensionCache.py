@@ -0,0 +1,127 @@
+import threading
+import time
+
+# Dimension Cache Settings
+DIMENSION_CHECK_INTERVAL = 60   # seconds between version checks against the database
+
+
+class DimensionCache:
+  """
+  An in-memory copy of the small lookup tables (service, genres, ratings)
+  used to turn the ids in content rows into names and logo paths.
+  The tables carry a version in catalog_version that triggers bump on
+  every change; the copy is reloaded only when that version moves.
+  The content table's version (moved by get_catalog_versions whenever
+  the content's row count or newest updated_at changes) is tracked
+  alongside, so every worker agrees on which catalog it is serving
+  (see views.catalogVersion).
+  """
+  def __init__(self, checkInterval=DIMENSION_CHECK_INTERVAL):
+    self.checkInterval = checkInterval
+    self.version = None
+    self.contentVersion = None
+    self.services = {}   # service_id -> service row
+    self.genres = {}     # genre_id -> genre_name
+    self.ratings = {}    # rating_id -> rating_name
+    self._checkedAt = 0.0
+    self._lock = threading.Lock()
+
+  def load(self, cursor):
+    """
+    Load every lookup table and its version in one call
+    Parameters:
+      cursor: An active connection / cursor to a MySQL Database
+    """
+    cursor.execute("CALL get_dimensions()")
+    version = cursor.fetchone()["version"]
+    cursor.nextset()
+    services = {row["service_id"]: row for row in cursor.fetchall()}
+    cursor.nextset()
+    genres = {row["genre_id"]: row["genre_name"] for row in cursor.fetchall()}
+    cursor.nextset()
+    ratings = {row["rating_id"]: row["rating_name"] for row in cursor.fetchall()}
+    self.loadTables(version, services, genres, ratings)
+
+  def loadTables(self, version, services, genres, ratings):
+    """
+    Replace the lookup tables, e.g. with those of a catalog snapshot
+    Parameters:
+      version: the version the tables were read at
+      services: a dictionary of service_id -> service row
+      genres: a dictionary of genre_id -> genre_name
+      ratings: a dictionary of rating_id -> rating_name
+    """
+    # Swap the tables in together so readers never see a mix of versions
+    with self._lock:
+      self.services, self.genres, self.ratings = services, genres, ratings
+      self.version = version
+      self._checkedAt = time.monotonic()
+
+  def needsCheck(self):
+    """
+    Return: True if the tables were never loaded or the version has not
+      been checked for checkInterval seconds
+    """
+    return (self.version is None or
+            time.monotonic() - self._checkedAt > self.checkInterval)
+
+  def refresh(self, cursor):
+    """
+    Reload the lookup tables if their version changed in the database,
+    and record the content table's current version
+    Parameters:
+      cursor: An active connection / cursor to a MySQL Database
+    Return: True if the tables were (re)loaded or the content changed,
+      False if both are already current
+    """
+    cursor.execute("CALL get_catalog_versions()")
+    row = cursor.fetchone()
+    contentChanged = row["content_version"] != self.contentVersion
+    with self._lock:
+      self.contentVersion = row["content_version"]
+    if row["dimensions_version"] == self.version:
+      with self._lock:
+        self._checkedAt = time.monotonic()
+      return contentChanged
+
+    self.load(cursor)
+    return True
+
+  def resolve(self, row):
+    """
+    Turn a slim content row (see get_catalog_ids) into a full catalog row
+    Parameters:
+      row: a content row with service_id, genre and rating ids
+    Return: a dictionary with the catalogView.CONTENT_COLUMNS
+    """
+    service = self.services.get(row["service_id"], {})
+    return {"guid": row["guid"],
+            "service_name": service.get("service_name"),
+            "subscription_price": service.get("subscription_price"),
+            "service_type": row["service_type"],
+            "image": service.get("image"),
+            "title": row["title"],
+            "genre_name": self.genres.get(row["genre"]),
+            "run_time_minutes": row["run_time_minutes"],
+            "num_seasons": row["num_seasons"],
+            "rating_name": self.ratings.get(row["rating"]),
+            "critic_score": row["critic_score"],
+            "description": row["description"]}
+
+
+_DIMENSIONS = {}
+_DIMENSIONS_LOCK = threading.Lock()
+
+
+def getDimensionCache(hostName):
+  """
+  Get the lookup table cache for a database host, creating it on first use
+  Parameters:
+    hostName (string) : name of the MySQL host
+  Return: a DimensionCache (empty until loaded or refreshed)
+  """
+  with _DIMENSIONS_LOCK:
+    dimensions = _DIMENSIONS.get(hostName)
+    if dimensions is None:
+      dimensions = _DIMENSIONS[hostName] = DimensionCache()
+  return dimensions
@@ -0,0 +1,112 @@
+import threading
+
+# Recommendation Settings
+RECOMMENDATION_TOP_K = 25      # titles kept per service and content type
+RECOMMENDATIONS_PER_TYPE = 2   # movies / tv shows recommended per service
+
+
+class RecommendationTable:
+  """
+  Each service's top K movies and tv shows by critic score, built from
+  a catalog view. Recommending only walks these short lists (skipping a
+  user's favorites), so its cost does not grow with the catalog.
+  When the catalog view is replaced (reloaded or changed) the table is
+  rebuilt on a background thread; requests keep using the previous
+  table until the new one is swapped in.
+  """
+  def __init__(self, topK=RECOMMENDATION_TOP_K):
+    self.topK = topK
+    self.source = None   # the catalog view the table was built from
+    self._top = {}       # (service_name, service_type) -> tuple of rows
+    self._pending = None
+    self._lock = threading.Lock()
+
+  def build(self, view):
+    """
+    Rebuild the table from a catalog view
+    Parameters:
+      view: a SortedCatalogView of content with a "popularity-high" order
+    """
+    top = {}
+    for row in view.sorted("popularity-high"):
+      picks = top.setdefault((row["service_name"], row["service_type"]), [])
+      if len(picks) < self.topK:
+        picks.append(row)
+
+    with self._lock:
+      self._top = {key: tuple(rows) for key, rows in top.items()}
+      self.source = view
+
+  def _rebuild(self, view):
+    try:
+      self.build(view)
+    finally:
+      with self._lock:
+        if self._pending is view:
+          self._pending = None
+
+  def refresh(self, view):
+    """
+    Bring the table up to date with a catalog view. The first build is
+    done in the caller's thread; later ones run in the background.
+    Parameters:
+      view: the current catalog view of content
+    Return: True if a rebuild was done or started
+    """
+    with self._lock:
+      if view is self.source or view is self._pending:
+        return False
+      background = self.source is not None
+      if background:
+        self._pending = view
+
+    if background:
+      threading.Thread(target=self._rebuild, args=(view,), daemon=True).start()
+    else:
+      self.build(view)
+    return True
+
+  def recommend(self, serviceNames, favoriteIds, perType=RECOMMENDATIONS_PER_TYPE):
+    """
+    Recommend the top movies and tv shows of each service, skipping
+    content already favorited
+    Parameters:
+      serviceNames: the user's service names, in display order
+      favoriteIds: the user's favorited content ids
+      perType: the number of movies (and of tv shows) per service
+    Return: a list of content rows, grouped by service in the order of
+      serviceNames, best critic score first
+    """
+    top = self._top
+    recs = []
+    for serviceName in serviceNames:
+      picked = []
+      for serviceType in ("Movie", "TV Show"):
+        count = 0
+        for row in top.get((serviceName, serviceType), ()):
+          if count == perType:
+            break
+          if row["guid"] not in favoriteIds:
+            picked.append(row)
+            count += 1
+      picked.sort(key=lambda rec: rec["critic_score"] or 0, reverse=True)
+      recs.extend(picked)
+    return recs
+
+
+_TABLES = {}
+_TABLES_LOCK = threading.Lock()
+
+
+def getRecommendationTable(hostName):
+  """
+  Get the recommendation table for a database host, creating it on first use
+  Parameters:
+    hostName (string) : name of the MySQL host
+  Return: a RecommendationTable (empty until refreshed)
+  """
+  with _TABLES_LOCK:
+    table = _TABLES.get(hostName)
+    if table is None:
+      table = _TABLES[hostName] = RecommendationTable()
+  return table
@@ -0,0 +1,111 @@
+import heapq
+import math
+import unicodedata
+from array import array
+from collections import Counter
+
+# Fraction of a query's trigrams a title must share to be a match.
+# Below 1.0 so that a typo or two still finds the intended title.
+MIN_MATCH_RATIO = 0.5
+
+
+def normalizeTitle(text):
+  """
+  Normalize text for matching: strip accents, lower case, and collapse
+  anything that is not a letter or digit into single spaces
+  Parameters:
+    text (string) : the text to normalize
+  Return: the normalized string
+  """
+  text = unicodedata.normalize("NFKD", text or "")
+  text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+  return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+def trigrams(text):
+  """
+  Get the set of 3 character grams of a normalized string. The string is
+  padded so short words and word boundaries still produce grams.
+  Parameters:
+    text (string) : normalized text (see normalizeTitle)
+  Return: a set of trigrams
+  """
+  padded = "  " + text + " "
+  return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleSearchIndex:
+  """
+  An in-memory trigram inverted index over content titles.
+  Posting lists are compact arrays of row numbers, built once from the
+  catalog and then only read, so a single index can be shared by every
+  request thread in a worker.
+  """
+  def __init__(self, rows):
+    """
+    Build the index
+    Parameters:
+      rows: content rows (dictionaries with at least guid, title,
+        service_type and critic_score), as returned by the catalog queries
+    """
+    self._rows = []
+    self._titles = []
+    self._gramCounts = array("I")
+    postings = {}
+
+    for row in rows:
+      rowId = len(self._rows)
+      title = normalizeTitle(row["title"])
+      grams = trigrams(title)
+      self._rows.append(row)
+      self._titles.append(title)
+      self._gramCounts.append(len(grams))
+      for gram in grams:
+        posting = postings.get(gram)
+        if posting is None:
+          posting = postings[gram] = array("I")
+        posting.append(rowId)
+
+    self._postings = postings
+
+  def __len__(self):
+    return len(self._rows)
+
+  def search(self, keyword, service_type=None, limit=100):
+    """
+    Find titles similar to a keyword. Results are ranked by whether the
+    title contains the keyword outright, then by trigram similarity
+    (Jaccard), then by critic score.
+    Parameters:
+      keyword (string) : the search term
+      service_type (string) : optional "Movie" or "TV Show" filter
+      limit (int) : the maximum number of rows to return
+    Return: a list of matching content rows, best match first
+    """
+    query = normalizeTitle(keyword)
+    if not query:
+      return [row for row in self._rows
+              if service_type is None or row["service_type"] == service_type][:limit]
+
+    grams = trigrams(query)
+    counts = Counter()
+    for gram in grams:
+      posting = self._postings.get(gram)
+      if posting is not None:
+        counts.update(posting)
+
+    needed = max(1, math.ceil(len(grams) * MIN_MATCH_RATIO))
+    scored = []
+    for rowId, matches in counts.items():
+      if matches < needed:
+        continue
+      row = self._rows[rowId]
+      if service_type is not None and row["service_type"] != service_type:
+        continue
+      similarity = matches / (len(grams) + self._gramCounts[rowId] - matches)
+      scored.append((query in self._titles[rowId],
+                     similarity,
+                     row["critic_score"] or 0,
+                     -rowId))
+
+    return [self._rows[-entry[3]] for entry in heapq.nlargest(limit, scored)]
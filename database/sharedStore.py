@@ -0,0 +1,166 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+try:
+  import redis   # optional - "pip install redis" for the redis backend
+except ImportError:
+  redis = None
+
+# Shared Store Settings
+SQLITE_BUSY_TIMEOUT = 5.0   # seconds a writer waits for another worker's lock
+STORE_DEFAULT_TTL = 86400   # seconds a value lives when no ttl is given
+STORE_PURGE_RATE = 0.01     # fraction of writes that also delete expired values
+
+
+class SQLiteStore:
+  """
+  A key / value store in a single SQLite file, shared by every worker
+  process on one host. The file is in WAL mode, so readers never block
+  the (short) writes and a read needs no lock on the whole file.
+  Each thread of each process opens its own connection on first use.
+  """
+  def __init__(self, path, defaultTtl=STORE_DEFAULT_TTL, purgeRate=STORE_PURGE_RATE):
+    self.path = path
+    self.defaultTtl = defaultTtl
+    self.purgeRate = purgeRate
+    self._local = threading.local()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    connection = self._connect()
+    connection.execute("CREATE TABLE IF NOT EXISTS store ("
+                       "  key TEXT PRIMARY KEY,"
+                       "  value BLOB NOT NULL,"
+                       "  expires_at REAL NOT NULL)")
+    connection.execute("CREATE INDEX IF NOT EXISTS store_expires ON store (expires_at)")
+
+  def _connect(self):
+    """
+    Get this thread's connection, opening a new one in a forked child
+    Return: a sqlite3 connection in autocommit mode
+    """
+    local = self._local
+    if getattr(local, "pid", None) != os.getpid():
+      local.connection = sqlite3.connect(self.path,
+                                         timeout=SQLITE_BUSY_TIMEOUT,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+      local.connection.execute("PRAGMA journal_mode=WAL")
+      local.connection.execute("PRAGMA synchronous=NORMAL")
+      local.pid = os.getpid()
+    return local.connection
+
+  def get(self, key):
+    """
+    Get a value
+    Parameters:
+      key (string) : the key
+    Return: the stored bytes, or None if missing or expired
+    """
+    row = self._connect().execute("SELECT value FROM store "
+                                  "WHERE key = ? AND expires_at > ?",
+                                  (key, time.time())).fetchone()
+    return row[0] if row else None
+
+  def set(self, key, value, ttl=None):
+    """
+    Store a value. A sampled fraction (purgeRate) of writes also deletes
+    every expired value, so expired sessions do not pile up in the file.
+    Parameters:
+      key (string) : the key
+      value (bytes) : the value
+      ttl (int) : optional seconds before the value expires
+    """
+    expiresAt = time.time() + (self.defaultTtl if ttl is None else ttl)
+    self._connect().execute("INSERT INTO store (key, value, expires_at) VALUES (?, ?, ?) "
+                            "ON CONFLICT (key) DO UPDATE SET "
+                            "  value = excluded.value, expires_at = excluded.expires_at",
+                            (key, value, expiresAt))
+    if random.random() < self.purgeRate:
+      self.purgeExpired()
+
+  def delete(self, key):
+    """
+    Remove a value if present
+    """
+    self._connect().execute("DELETE FROM store WHERE key = ?", (key,))
+
+  def incr(self, key):
+    """
+    Atomically add one to a counter (created at 0, never expires)
+    Parameters:
+      key (string) : the counter's key
+    Return: the new count
+    """
+    connection = self._connect()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+      row = connection.execute("SELECT value FROM store WHERE key = ?", (key,)).fetchone()
+      count = int(row[0]) + 1 if row else 1
+      connection.execute("INSERT OR REPLACE INTO store (key, value, expires_at) "
+                         "VALUES (?, ?, ?)", (key, str(count).encode(), float("inf")))
+      connection.execute("COMMIT")
+    except Exception:
+      connection.execute("ROLLBACK")
+      raise
+    return count
+
+  def purgeExpired(self):
+    """
+    Delete every expired value
+    Return: the number of values deleted
+    """
+    return self._connect().execute("DELETE FROM store WHERE expires_at <= ?",
+                                   (time.time(),)).rowcount
+
+
+class RedisStore:
+  """
+  A key / value store on a Redis server (or anything speaking the Redis
+  protocol), shared by every worker on every host. The redis client keeps
+  its own connection pool and reconnects in forked workers.
+  """
+  def __init__(self, url, defaultTtl=STORE_DEFAULT_TTL, prefix="streamEasy:"):
+    if redis is None:
+      raise RuntimeError("The redis backend needs the redis package (pip install redis)")
+    self.client = redis.Redis.from_url(url)
+    self.defaultTtl = defaultTtl
+    self.prefix = prefix
+
+  def get(self, key):
+    return self.client.get(self.prefix + key)
+
+  def set(self, key, value, ttl=None):
+    self.client.set(self.prefix + key, value,
+                    ex=int(self.defaultTtl if ttl is None else ttl))
+
+  def delete(self, key):
+    self.client.delete(self.prefix + key)
+
+  def incr(self, key):
+    return int(self.client.incr(self.prefix + key))
+
+  def purgeExpired(self):
+    # Redis expires keys itself
+    return 0
+
+
+def createStore(backend, sqlitePath=None, redisUrl=None, defaultTtl=STORE_DEFAULT_TTL):
+  """
+  Create a shared store
+  Parameters:
+    backend (string) : "sqlite" or "redis"
+    sqlitePath (string) : the database file for the sqlite backend
+    redisUrl (string) : the server url for the redis backend,
+      e.g. redis://localhost:6379/0
+    defaultTtl (int) : seconds a value lives when no ttl is given
+  Return: a SQLiteStore or RedisStore
+  """
+  if backend == "sqlite":
+    return SQLiteStore(sqlitePath, defaultTtl)
+  if backend == "redis":
+    return RedisStore(redisUrl, defaultTtl)
+  raise ValueError("Unknown shared store backend: %r" % (backend,))
@@ -0,0 +1,262 @@
+import os
+import re
+import shutil
+import threading
+
+try:
+  import numpy as np   # optional - "pip install numpy" to enable
+except ImportError:
+  np = None
+
+# Similarity Recommender Settings
+SIMILARITY_BATCH_USERS = 256   # users scored per matrix product
+NUMERIC_FEATURES = ("release_year", "run_time_minutes", "num_seasons", "critic_score")
+SERVICE_TYPES = ("Movie", "TV Show")
+FEATURE_FILES = ("guids", "service_ids", "service_types", "matrix")
+
+
+def removeOldFeatures(directory, prefix, version):
+  """
+  Delete the saved features of content versions older than version
+  (workers still using one keep their memory-mapped copy until they close it)
+  Parameters:
+    directory: where feature directories are saved
+    prefix: the "<prefix>-content-v<N>" name prefix of one database host
+    version: the current content version
+  """
+  pattern = re.compile(r"%s-content-v(\d+)$" % re.escape(prefix))
+  try:
+    names = os.listdir(directory)
+  except OSError:
+    return
+  for name in names:
+    match = pattern.match(name)
+    if match and int(match.group(1)) < version:
+      shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def similarityAvailable():
+  """
+  Return: True if NumPy is installed and the recommender can be used
+  """
+  return np is not None
+
+
+class ContentFeatures:
+  """
+  A feature vector for every title (one-hot genre, rating and content
+  type, plus standardized release year, run time, seasons and critic
+  score), scaled to unit length so a dot product is a cosine similarity.
+  A user's profile is the normalized mean of their favorites' vectors;
+  every title is scored against many profiles at once with one matrix
+  product. The arrays can be saved and re-opened memory-mapped, so every
+  worker on a host shares one copy through the page cache.
+  """
+  def __init__(self, version, guids, serviceIds, serviceTypes, matrix):
+    """
+    Parameters:
+      version: the content version the features were built from
+      guids: content ids, ascending (int64)
+      serviceIds: each title's service id (int32)
+      serviceTypes: each title's index in SERVICE_TYPES (int8)
+      matrix: the (titles x features) unit-length feature vectors (float32)
+    """
+    self.version = version
+    self.guids = guids
+    self.serviceIds = serviceIds
+    self.serviceTypes = serviceTypes
+    self.matrix = matrix
+    self._groups = {}
+
+  @classmethod
+  def fromRows(cls, version, rows):
+    """
+    Build the features from content rows
+    Parameters:
+      version: the content version the rows were read at
+      rows: rows with guid, service_id, service_type, genre, rating and
+        the NUMERIC_FEATURES columns (see get_content_features)
+    Return: a ContentFeatures
+    """
+    rows = sorted(rows, key=lambda row: row["guid"])
+    genres = {value: i for i, value in
+              enumerate(sorted({row["genre"] for row in rows if row["genre"] is not None}))}
+    ratings = {value: i for i, value in
+               enumerate(sorted({row["rating"] for row in rows if row["rating"] is not None}))}
+
+    ratingStart = len(genres)
+    typeStart = ratingStart + len(ratings)
+    numericStart = typeStart + len(SERVICE_TYPES)
+    matrix = np.zeros((len(rows), numericStart + len(NUMERIC_FEATURES)), dtype=np.float32)
+
+    serviceTypes = np.array([SERVICE_TYPES.index(row["service_type"]) for row in rows], dtype=np.int8)
+    matrix[np.arange(len(rows)), typeStart + serviceTypes] = 1.0
+    for i, row in enumerate(rows):
+      if row["genre"] is not None:
+        matrix[i, genres[row["genre"]]] = 1.0
+      if row["rating"] is not None:
+        matrix[i, ratingStart + ratings[row["rating"]]] = 1.0
+
+    # Numeric columns as z-scores; a missing value counts as the mean
+    for j, column in enumerate(NUMERIC_FEATURES):
+      values = np.array([np.nan if row[column] is None else row[column] for row in rows],
+                        dtype=np.float64)
+      present = ~np.isnan(values)
+      if present.any():
+        mean = values[present].mean()
+        std = values[present].std() or 1.0
+        matrix[:, numericStart + j] = np.where(present, (values - mean) / std, 0.0)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.maximum(norms, 1e-12)
+
+    return cls(version,
+               np.array([row["guid"] for row in rows], dtype=np.int64),
+               np.array([row["service_id"] for row in rows], dtype=np.int32),
+               serviceTypes,
+               matrix)
+
+  def save(self, path):
+    """
+    Write the arrays to a directory of .npy files. The directory is
+    written under a temporary name and renamed into place, so another
+    process never opens a half-written copy.
+    Parameters:
+      path: the directory to create (left alone if it already exists)
+    """
+    if os.path.isdir(path):
+      return
+    temporary = "%s.tmp-%d-%d" % (path, os.getpid(), threading.get_ident())
+    os.makedirs(temporary, exist_ok=True)
+    np.save(os.path.join(temporary, "guids.npy"), self.guids)
+    np.save(os.path.join(temporary, "service_ids.npy"), self.serviceIds)
+    np.save(os.path.join(temporary, "service_types.npy"), self.serviceTypes)
+    np.save(os.path.join(temporary, "matrix.npy"), self.matrix)
+    try:
+      os.rename(temporary, path)
+    except OSError:
+      # Another worker saved the same version first
+      shutil.rmtree(temporary, ignore_errors=True)
+
+  @classmethod
+  def load(cls, version, path):
+    """
+    Open saved features memory-mapped (read-only)
+    Parameters:
+      version: the content version the directory was saved for
+      path: a directory written by save()
+    Return: a ContentFeatures, or None if the directory does not exist
+    """
+    if not os.path.isdir(path):
+      return None
+    arrays = [np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+              for name in FEATURE_FILES]
+    return cls(version, *arrays)
+
+  def __len__(self):
+    return len(self.guids)
+
+  def rowNumbers(self, ids):
+    """
+    Get the row numbers of content ids (ids not in the features are skipped)
+    """
+    ids = np.fromiter(ids, dtype=np.int64)
+    if not len(self.guids):
+      return np.empty(0, dtype=np.intp)
+    positions = np.minimum(np.searchsorted(self.guids, ids), len(self.guids) - 1)
+    return positions[self.guids[positions] == ids]
+
+  def profiles(self, favoriteSets):
+    """
+    Build each user's profile from their favorites
+    Parameters:
+      favoriteSets: a list of collections of favorited content ids
+    Return: a (users x features) array; a user with no favorites gets zeros
+    """
+    profiles = np.zeros((len(favoriteSets), self.matrix.shape[1]), dtype=np.float32)
+    for i, favoriteIds in enumerate(favoriteSets):
+      rows = self.rowNumbers(favoriteIds)
+      if len(rows):
+        profile = self.matrix[rows].mean(axis=0)
+        profiles[i] = profile / max(np.linalg.norm(profile), 1e-12)
+    return profiles
+
+  def scoreBatches(self, favoriteSets):
+    """
+    Score every title for each user, SIMILARITY_BATCH_USERS users per
+    matrix product. Titles a user already favorited score -inf, as does
+    everything for a user with no (known) favorites.
+    Parameters:
+      favoriteSets: a list of collections of favorited content ids
+    Return: yields (first user index, (batch users x titles) scores)
+    """
+    for start in range(0, len(favoriteSets), SIMILARITY_BATCH_USERS):
+      batch = favoriteSets[start:start + SIMILARITY_BATCH_USERS]
+      profiles = self.profiles(batch)
+      scores = profiles @ self.matrix.T
+      scores[~profiles.any(axis=1)] = -np.inf
+      for i, favoriteIds in enumerate(batch):
+        scores[i, self.rowNumbers(favoriteIds)] = -np.inf
+      yield start, scores
+
+  def topK(self, favoriteSets, k):
+    """
+    Find each user's k titles most similar to their favorites
+    Parameters:
+      favoriteSets: a list of collections of favorited content ids
+      k: the number of titles per user
+    Return: a list (one per user) of content ids, most similar first
+      (empty for a user with no favorites)
+    """
+    results = []
+    k = min(k, len(self.guids))
+    if k <= 0:
+      return [[] for _ in favoriteSets]
+    for _, scores in self.scoreBatches(favoriteSets):
+      top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+      topScores = np.take_along_axis(scores, top, axis=1)
+      order = np.argsort(-topScores, axis=1, kind="stable")
+      for rowNumbers, rowScores in zip(np.take_along_axis(top, order, axis=1),
+                                       np.take_along_axis(topScores, order, axis=1)):
+        results.append(self.guids[rowNumbers[np.isfinite(rowScores)]].tolist())
+    return results
+
+  def _group(self, serviceId, serviceType):
+    """
+    Get the row numbers of one service's movies or tv shows
+    """
+    key = (serviceId, serviceType)
+    group = self._groups.get(key)
+    if group is None:
+      group = self._groups[key] = np.flatnonzero(
+        (self.serviceIds == serviceId) & (self.serviceTypes == SERVICE_TYPES.index(serviceType)))
+    return group
+
+  def recommendByService(self, favoriteSets, serviceSets, perType=2):
+    """
+    Find, for each user, the movies and tv shows of each of their
+    services most similar to their favorites
+    Parameters:
+      favoriteSets: a list of collections of favorited content ids
+      serviceSets: a list (one per user) of service ids
+      perType: the number of movies (and of tv shows) per service
+    Return: a list (one per user) of content ids, grouped by service in
+      the order of that user's service ids (empty for a user with no
+      favorites)
+    """
+    results = []
+    for start, scores in self.scoreBatches(favoriteSets):
+      for i in range(len(scores)):
+        picked = []
+        for serviceId in serviceSets[start + i]:
+          for serviceType in SERVICE_TYPES:
+            group = self._group(serviceId, serviceType)
+            if not len(group):
+              continue
+            groupScores = scores[i, group]
+            count = min(perType, len(group))
+            top = np.argpartition(-groupScores, count - 1)[:count]
+            top = top[np.isfinite(groupScores[top])]
+            picked.extend(self.guids[group[top]].tolist())
+        results.append(picked)
+    return results
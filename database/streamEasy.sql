@@ -53,10 +53,13 @@ DROP TABLE IF EXISTS `billing_monitor`;
 /*!40101 SET @saved_cs_client     = @@character_set_client */;
 /*!50503 SET character_set_client = utf8mb4 */;
 CREATE TABLE `billing_monitor` (
+  `billing_id` int NOT NULL AUTO_INCREMENT,
   `username` varchar(50) DEFAULT NULL,
   `service_id` int DEFAULT NULL,
   `date_added` timestamp NULL DEFAULT NULL,
-  `date_deleted` timestamp NULL DEFAULT NULL
+  `date_deleted` timestamp NULL DEFAULT NULL,
+  PRIMARY KEY (`billing_id`),
+  KEY `billing_user_date_idx` (`username`,`date_added`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -66,10 +69,62 @@ CREATE TABLE `billing_monitor` (
 
 LOCK TABLES `billing_monitor` WRITE;
 /*!40000 ALTER TABLE `billing_monitor` DISABLE KEYS */;
-INSERT INTO `billing_monitor` VALUES ('dbms',1,'2022-01-10 19:15:34','2022-01-20 03:12:33'),('dbms',1,'2022-02-12 23:47:47','2022-02-14 17:50:23'),('dbms',1,'2022-03-14 18:59:44','2022-03-22 22:51:24'),('dbms',1,'2022-04-12 22:41:46','2022-04-27 16:37:13'),('dbms',1,'2022-05-24 21:55:26','2022-05-27 18:42:53'),('dbms',1,'2022-06-11 00:50:13','2022-06-13 16:46:10'),('dbms',1,'2022-07-17 16:46:48','2022-07-25 02:27:17'),('dbms',1,'2022-08-16 20:46:26','2022-08-18 19:56:21'),('dbms',1,'2022-09-15 19:26:53','2022-09-27 02:20:35'),('dbms',1,'2022-10-14 18:38:22','2022-10-23 19:59:46'),('dbms',1,'2022-11-16 21:20:39','2022-11-27 02:59:14'),('dbms',1,'2022-12-22 23:11:41','2022-12-25 20:53:14'),('dbms',2,'2022-01-10 21:16:34','2022-01-12 18:41:20'),('dbms',2,'2022-02-16 01:50:37','2022-02-23 01:37:18'),('dbms',2,'2022-03-16 02:37:42','2022-03-21 20:17:49'),('dbms',2,'2022-04-16 19:41:46','2022-04-26 00:56:39'),('dbms',2,'2022-05-14 01:29:12','2022-05-18 19:44:48'),('dbms',2,'2022-06-21 02:16:20','2022-06-21 14:30:52'),('dbms',2,'2022-07-19 14:14:32','2022-07-20 15:19:57'),('dbms',2,'2022-08-12 18:18:36','2022-08-13 14:51:48'),('dbms',2,'2022-09-21 17:57:11','2022-09-24 23:10:58'),('dbms',2,'2022-10-21 01:46:30','2022-10-26 17:24:38'),('dbms',2,'2022-11-12 15:18:59','2022-11-14 23:44:50'),('dbms',2,'2022-12-14 17:54:26','2022-12-19 00:41:51'),('dbms',3,'2022-01-10 19:58:27','2022-01-27 15:12:46'),('dbms',3,'2022-02-19 00:42:32','2022-02-20 02:13:57'),('dbms',3,'2022-03-11 04:23:34','2022-03-14 19:43:30'),('dbms',3,'2022-04-12 00:10:44','2022-04-25 19:39:41'),('dbms',3,'2022-05-15 16:29:52','2022-05-23 01:29:45'),('dbms',3,'2022-06-14 23:51:57','2022-06-24 16:37:26'),('dbms',3,'2022-07-11 18:36:25','2022-07-12 17:29:32'),('dbms',3,'2022-08-12 00:28:46','2022-08-13 17:43:56'),('dbms',3,'2022-09-10 16:49:39','2022-09-13 18:20:28'),('dbms',3,'2022-10-11 16:33:54','2022-10-16 23:32:34'),('dbms',3,'2022-11-15 19:41:26','2022-11-18 18:42:25'),('dbms',3,'2022-12-11 20:27:28','2022-12-19 03:36:32'),('dbms',4,'2022-01-21 17:51:23','2022-01-28 00:34:29'),('dbms',4,'2022-02-14 00:30:16','2022-02-27 00:12:57'),('dbms',4,'2022-03-11 23:38:54','2022-03-15 00:13:34'),('dbms',4,'2022-04-19 20:56:53','2022-04-26 21:45:29'),('dbms',4,'2022-05-20 00:14:15','2022-05-23 01:10:11'),('dbms',4,'2022-06-16 18:10:22','2022-06-26 02:31:49'),('dbms',4,'2022-07-14 01:12:54','2022-07-19 20:33:17'),('dbms',4,'2022-08-25 22:29:37','2022-08-27 01:58:41'),('dbms',4,'2022-09-20 23:46:42','2022-09-25 01:27:27'),('dbms',4,'2022-10-19 22:27:46','2022-10-27 22:17:28'),('dbms',4,'2022-11-19 00:44:47','2022-11-25 16:34:31'),('dbms',4,'2022-12-13 20:22:56','2022-12-22 17:19:58'),('dbms',5,'2022-01-17 20:29:41','2022-01-21 18:26:38'),('dbms',5,'2022-02-11 19:31:26','2022-02-22 23:33:17'),('dbms',5,'2022-03-11 20:59:52','2022-03-12 17:59:29'),('dbms',5,'2022-04-15 22:57:19','2022-04-27 18:56:29'),('dbms',5,'2022-05-10 20:54:12','2022-05-21 01:50:52'),('dbms',5,'2022-06-15 16:46:22','2022-06-26 16:31:45'),('dbms',5,'2022-07-19 02:29:32','2022-07-21 22:32:27'),('dbms',5,'2022-08-11 20:18:29','2022-08-23 16:32:23'),('dbms',5,'2022-09-16 16:24:41','2022-09-26 20:16:25'),('dbms',5,'2022-10-11 20:45:35','2022-10-22 23:13:33'),('dbms',5,'2022-11-12 23:59:27','2022-11-21 23:55:19'),('dbms',5,'2022-12-15 02:45:43','2022-12-15 18:45:20'),('dbms',6,'2022-01-24 04:49:13','2022-01-28 01:46:53'),('dbms',6,'2022-02-18 18:16:21','2022-02-26 17:21:29'),('dbms',6,'2022-03-11 15:44:19','2022-03-14 23:36:56'),('dbms',6,'2022-04-14 17:52:22','2022-04-19 03:31:14'),('dbms',6,'2022-05-17 01:13:45','2022-05-17 18:22:45'),('dbms',6,'2022-06-12 15:46:52','2022-06-16 21:34:35'),('dbms',6,'2022-07-10 22:47:12','2022-07-17 20:11:53'),('dbms',6,'2022-08-11 21:15:36','2022-08-17 21:44:11'),('dbms',6,'2022-09-18 02:29:29','2022-09-20 00:59:25'),('dbms',6,'2022-10-13 18:51:54','2022-10-16 20:31:38'),('dbms',6,'2022-11-21 19:36:25','2022-11-27 15:37:29'),('dbms',6,'2022-12-10 18:36:41','2022-12-16 22:49:52'),('dbms',7,'2022-01-20 20:56:15','2022-01-21 15:22:43'),('dbms',7,'2022-02-23 15:22:25','2022-02-27 23:10:25'),('dbms',7,'2022-03-12 00:10:16','2022-03-26 20:28:26'),('dbms',7,'2022-04-11 15:57:35','2022-04-22 19:53:35'),('dbms',7,'2022-05-13 22:39:45','2022-05-23 17:41:32'),('dbms',7,'2022-06-23 19:13:53','2022-06-26 15:31:57'),('dbms',7,'2022-07-16 22:55:38','2022-07-24 20:25:40'),('dbms',7,'2022-08-20 18:38:54','2022-08-25 17:53:12'),('dbms',7,'2022-09-16 20:47:39','2022-09-21 16:27:15'),('dbms',7,'2022-10-16 17:36:18','2022-10-24 15:35:54'),('dbms',7,'2022-11-17 20:34:52','2022-11-27 00:18:55'),('dbms',7,'2022-12-22 18:32:21','2022-12-24 03:50:11'),('dbms',8,'2022-01-18 15:24:25','2022-01-26 19:23:40'),('dbms',8,'2022-02-17 02:50:46','2022-02-23 23:30:47'),('dbms',8,'2022-03-14 21:23:10','2022-03-20 18:30:41'),('dbms',8,'2022-04-15 00:47:14','2022-04-16 03:33:39'),('dbms',8,'2022-05-12 18:30:41','2022-05-14 22:50:41'),('dbms',8,'2022-06-13 18:18:17','2022-06-23 17:28:59'),('dbms',8,'2022-07-14 15:42:36','2022-07-27 15:48:38'),('dbms',8,'2022-08-18 01:52:34','2022-08-28 03:38:11'),('dbms',8,'2022-09-20 03:39:45','2022-09-20 15:57:39'),('dbms',8,'2022-10-20 14:47:36','2022-10-25 01:55:12'),('dbms',8,'2022-11-15 00:23:35','2022-11-24 00:10:48'),('dbms',8,'2022-12-26 04:31:42','2022-12-26 18:17:52'),('huds',7,'2022-12-09 16:27:02','2022-12-09 16:29:10'),('djr',1,'2022-12-09 16:28:47',NULL),('djr',2,'2022-12-09 16:28:49',NULL),('djr',4,'2022-12-09 16:28:51',NULL),('djr',8,'2022-12-09 16:28:52',NULL),('huds',1,'2022-12-09 16:29:15',NULL),('huds',2,'2022-12-09 16:29:16',NULL),('huds',8,'2022-12-09 16:29:18',NULL),('huds',3,'2022-12-09 16:29:20',NULL),('huds',5,'2022-12-09 16:29:22',NULL),('rohit1',7,'2022-12-09 16:29:40',NULL),('rohit1',8,'2022-12-09 16:29:41',NULL),('rohit1',1,'2022-12-09 16:29:43',NULL),('rohit1',6,'2022-12-09 16:29:45',NULL),('rohit1',3,'2022-12-09 16:29:48',NULL),('rohit123',1,'2022-12-09 16:30:05',NULL),('rohit123',2,'2022-12-09 16:30:07',NULL),('rohit123',3,'2022-12-09 16:30:08',NULL),('rohit123',5,'2022-12-09 16:30:11',NULL),('rohit123',4,'2022-12-09 16:30:14',NULL),('rohit123',6,'2022-12-09 16:30:15',NULL),('rohit1234',1,'2022-12-09 16:30:30',NULL),('rohit1234',7,'2022-12-09 16:30:32',NULL),('rohit1234',5,'2022-12-09 16:30:36',NULL),('ryandan',1,'2022-12-09 16:30:49',NULL),('ryandan',2,'2022-12-09 16:30:54',NULL),('ryandan',5,'2022-12-09 16:31:00',NULL),('dbms',2,'2022-12-09 16:32:33',NULL),('dbms',4,'2022-12-09 16:32:36',NULL),('dbms',3,'2022-12-09 16:32:41',NULL),('dbms',6,'2022-12-09 16:32:45',NULL),('dbms',1,'2022-12-09 16:33:53',NULL);
+INSERT INTO `billing_monitor` (`username`, `service_id`, `date_added`, `date_deleted`) VALUES ('dbms',1,'2022-01-10 19:15:34','2022-01-20 03:12:33'),('dbms',1,'2022-02-12 23:47:47','2022-02-14 17:50:23'),('dbms',1,'2022-03-14 18:59:44','2022-03-22 22:51:24'),('dbms',1,'2022-04-12 22:41:46','2022-04-27 16:37:13'),('dbms',1,'2022-05-24 21:55:26','2022-05-27 18:42:53'),('dbms',1,'2022-06-11 00:50:13','2022-06-13 16:46:10'),('dbms',1,'2022-07-17 16:46:48','2022-07-25 02:27:17'),('dbms',1,'2022-08-16 20:46:26','2022-08-18 19:56:21'),('dbms',1,'2022-09-15 19:26:53','2022-09-27 02:20:35'),('dbms',1,'2022-10-14 18:38:22','2022-10-23 19:59:46'),('dbms',1,'2022-11-16 21:20:39','2022-11-27 02:59:14'),('dbms',1,'2022-12-22 23:11:41','2022-12-25 20:53:14'),('dbms',2,'2022-01-10 21:16:34','2022-01-12 18:41:20'),('dbms',2,'2022-02-16 01:50:37','2022-02-23 01:37:18'),('dbms',2,'2022-03-16 02:37:42','2022-03-21 20:17:49'),('dbms',2,'2022-04-16 19:41:46','2022-04-26 00:56:39'),('dbms',2,'2022-05-14 01:29:12','2022-05-18 19:44:48'),('dbms',2,'2022-06-21 02:16:20','2022-06-21 14:30:52'),('dbms',2,'2022-07-19 14:14:32','2022-07-20 15:19:57'),('dbms',2,'2022-08-12 18:18:36','2022-08-13 14:51:48'),('dbms',2,'2022-09-21 17:57:11','2022-09-24 23:10:58'),('dbms',2,'2022-10-21 01:46:30','2022-10-26 17:24:38'),('dbms',2,'2022-11-12 15:18:59','2022-11-14 23:44:50'),('dbms',2,'2022-12-14 17:54:26','2022-12-19 00:41:51'),('dbms',3,'2022-01-10 19:58:27','2022-01-27 15:12:46'),('dbms',3,'2022-02-19 00:42:32','2022-02-20 02:13:57'),('dbms',3,'2022-03-11 04:23:34','2022-03-14 19:43:30'),('dbms',3,'2022-04-12 00:10:44','2022-04-25 19:39:41'),('dbms',3,'2022-05-15 16:29:52','2022-05-23 01:29:45'),('dbms',3,'2022-06-14 23:51:57','2022-06-24 16:37:26'),('dbms',3,'2022-07-11 18:36:25','2022-07-12 17:29:32'),('dbms',3,'2022-08-12 00:28:46','2022-08-13 17:43:56'),('dbms',3,'2022-09-10 16:49:39','2022-09-13 18:20:28'),('dbms',3,'2022-10-11 16:33:54','2022-10-16 23:32:34'),('dbms',3,'2022-11-15 19:41:26','2022-11-18 18:42:25'),('dbms',3,'2022-12-11 20:27:28','2022-12-19 03:36:32'),('dbms',4,'2022-01-21 17:51:23','2022-01-28 00:34:29'),('dbms',4,'2022-02-14 00:30:16','2022-02-27 00:12:57'),('dbms',4,'2022-03-11 23:38:54','2022-03-15 00:13:34'),('dbms',4,'2022-04-19 20:56:53','2022-04-26 21:45:29'),('dbms',4,'2022-05-20 00:14:15','2022-05-23 01:10:11'),('dbms',4,'2022-06-16 18:10:22','2022-06-26 02:31:49'),('dbms',4,'2022-07-14 01:12:54','2022-07-19 20:33:17'),('dbms',4,'2022-08-25 22:29:37','2022-08-27 01:58:41'),('dbms',4,'2022-09-20 23:46:42','2022-09-25 01:27:27'),('dbms',4,'2022-10-19 22:27:46','2022-10-27 22:17:28'),('dbms',4,'2022-11-19 00:44:47','2022-11-25 16:34:31'),('dbms',4,'2022-12-13 20:22:56','2022-12-22 17:19:58'),('dbms',5,'2022-01-17 20:29:41','2022-01-21 18:26:38'),('dbms',5,'2022-02-11 19:31:26','2022-02-22 23:33:17'),('dbms',5,'2022-03-11 20:59:52','2022-03-12 17:59:29'),('dbms',5,'2022-04-15 22:57:19','2022-04-27 18:56:29'),('dbms',5,'2022-05-10 20:54:12','2022-05-21 01:50:52'),('dbms',5,'2022-06-15 16:46:22','2022-06-26 16:31:45'),('dbms',5,'2022-07-19 02:29:32','2022-07-21 22:32:27'),('dbms',5,'2022-08-11 20:18:29','2022-08-23 16:32:23'),('dbms',5,'2022-09-16 16:24:41','2022-09-26 20:16:25'),('dbms',5,'2022-10-11 20:45:35','2022-10-22 23:13:33'),('dbms',5,'2022-11-12 23:59:27','2022-11-21 23:55:19'),('dbms',5,'2022-12-15 02:45:43','2022-12-15 18:45:20'),('dbms',6,'2022-01-24 04:49:13','2022-01-28 01:46:53'),('dbms',6,'2022-02-18 18:16:21','2022-02-26 17:21:29'),('dbms',6,'2022-03-11 15:44:19','2022-03-14 23:36:56'),('dbms',6,'2022-04-14 17:52:22','2022-04-19 03:31:14'),('dbms',6,'2022-05-17 01:13:45','2022-05-17 18:22:45'),('dbms',6,'2022-06-12 15:46:52','2022-06-16 21:34:35'),('dbms',6,'2022-07-10 22:47:12','2022-07-17 20:11:53'),('dbms',6,'2022-08-11 21:15:36','2022-08-17 21:44:11'),('dbms',6,'2022-09-18 02:29:29','2022-09-20 00:59:25'),('dbms',6,'2022-10-13 18:51:54','2022-10-16 20:31:38'),('dbms',6,'2022-11-21 19:36:25','2022-11-27 15:37:29'),('dbms',6,'2022-12-10 18:36:41','2022-12-16 22:49:52'),('dbms',7,'2022-01-20 20:56:15','2022-01-21 15:22:43'),('dbms',7,'2022-02-23 15:22:25','2022-02-27 23:10:25'),('dbms',7,'2022-03-12 00:10:16','2022-03-26 20:28:26'),('dbms',7,'2022-04-11 15:57:35','2022-04-22 19:53:35'),('dbms',7,'2022-05-13 22:39:45','2022-05-23 17:41:32'),('dbms',7,'2022-06-23 19:13:53','2022-06-26 15:31:57'),('dbms',7,'2022-07-16 22:55:38','2022-07-24 20:25:40'),('dbms',7,'2022-08-20 18:38:54','2022-08-25 17:53:12'),('dbms',7,'2022-09-16 20:47:39','2022-09-21 16:27:15'),('dbms',7,'2022-10-16 17:36:18','2022-10-24 15:35:54'),('dbms',7,'2022-11-17 20:34:52','2022-11-27 00:18:55'),('dbms',7,'2022-12-22 18:32:21','2022-12-24 03:50:11'),('dbms',8,'2022-01-18 15:24:25','2022-01-26 19:23:40'),('dbms',8,'2022-02-17 02:50:46','2022-02-23 23:30:47'),('dbms',8,'2022-03-14 21:23:10','2022-03-20 18:30:41'),('dbms',8,'2022-04-15 00:47:14','2022-04-16 03:33:39'),('dbms',8,'2022-05-12 18:30:41','2022-05-14 22:50:41'),('dbms',8,'2022-06-13 18:18:17','2022-06-23 17:28:59'),('dbms',8,'2022-07-14 15:42:36','2022-07-27 15:48:38'),('dbms',8,'2022-08-18 01:52:34','2022-08-28 03:38:11'),('dbms',8,'2022-09-20 03:39:45','2022-09-20 15:57:39'),('dbms',8,'2022-10-20 14:47:36','2022-10-25 01:55:12'),('dbms',8,'2022-11-15 00:23:35','2022-11-24 00:10:48'),('dbms',8,'2022-12-26 04:31:42','2022-12-26 18:17:52'),('huds',7,'2022-12-09 16:27:02','2022-12-09 16:29:10'),('djr',1,'2022-12-09 16:28:47',NULL),('djr',2,'2022-12-09 16:28:49',NULL),('djr',4,'2022-12-09 16:28:51',NULL),('djr',8,'2022-12-09 16:28:52',NULL),('huds',1,'2022-12-09 16:29:15',NULL),('huds',2,'2022-12-09 16:29:16',NULL),('huds',8,'2022-12-09 16:29:18',NULL),('huds',3,'2022-12-09 16:29:20',NULL),('huds',5,'2022-12-09 16:29:22',NULL),('rohit1',7,'2022-12-09 16:29:40',NULL),('rohit1',8,'2022-12-09 16:29:41',NULL),('rohit1',1,'2022-12-09 16:29:43',NULL),('rohit1',6,'2022-12-09 16:29:45',NULL),('rohit1',3,'2022-12-09 16:29:48',NULL),('rohit123',1,'2022-12-09 16:30:05',NULL),('rohit123',2,'2022-12-09 16:30:07',NULL),('rohit123',3,'2022-12-09 16:30:08',NULL),('rohit123',5,'2022-12-09 16:30:11',NULL),('rohit123',4,'2022-12-09 16:30:14',NULL),('rohit123',6,'2022-12-09 16:30:15',NULL),('rohit1234',1,'2022-12-09 16:30:30',NULL),('rohit1234',7,'2022-12-09 16:30:32',NULL),('rohit1234',5,'2022-12-09 16:30:36',NULL),('ryandan',1,'2022-12-09 16:30:49',NULL),('ryandan',2,'2022-12-09 16:30:54',NULL),('ryandan',5,'2022-12-09 16:31:00',NULL),('dbms',2,'2022-12-09 16:32:33',NULL),('dbms',4,'2022-12-09 16:32:36',NULL),('dbms',3,'2022-12-09 16:32:41',NULL),('dbms',6,'2022-12-09 16:32:45',NULL),('dbms',1,'2022-12-09 16:33:53',NULL);
 /*!40000 ALTER TABLE `billing_monitor` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `billing_monthly_usage`
+--
+
+DROP TABLE IF EXISTS `billing_monthly_usage`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `billing_monthly_usage` (
+  `username` varchar(50) NOT NULL,
+  `usage_year` int NOT NULL,
+  `usage_month` int NOT NULL,
+  `service_id` int NOT NULL,
+  `minutes` bigint NOT NULL DEFAULT '0',
+  PRIMARY KEY (`username`,`usage_year`,`usage_month`,`service_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `billing_monthly_usage`
+--
+
+LOCK TABLES `billing_monthly_usage` WRITE;
+/*!40000 ALTER TABLE `billing_monthly_usage` DISABLE KEYS */;
+INSERT INTO `billing_monthly_usage` VALUES ('dbms',2022,1,1,13436),('dbms',2022,1,2,2724),('dbms',2022,1,3,24194),('dbms',2022,1,4,9043),('dbms',2022,1,5,5636),('dbms',2022,1,6,5577),('dbms',2022,1,7,1106),('dbms',2022,1,8,11759),('dbms',2022,2,1,2522),('dbms',2022,2,2,10066),('dbms',2022,2,3,1531),('dbms',2022,2,4,18702),('dbms',2022,2,5,16081),('dbms',2022,2,6,11465),('dbms',2022,2,7,6228),('dbms',2022,2,8,9880),('dbms',2022,3,1,11751),('dbms',2022,3,2,8260),('dbms',2022,3,3,5239),('dbms',2022,3,4,4354),('dbms',2022,3,5,1259),('dbms',2022,3,6,4792),('dbms',2022,3,7,21378),('dbms',2022,3,8,8467),('dbms',2022,4,1,21235),('dbms',2022,4,2,13274),('dbms',2022,4,3,19888),('dbms',2022,4,4,10128),('dbms',2022,4,5,17039),('dbms',2022,4,6,6338),('dbms',2022,4,7,16076),('dbms',2022,4,8,1606),('dbms',2022,5,1,4127),('dbms',2022,5,2,6855),('dbms',2022,5,3,10619),('dbms',2022,5,4,4375),('dbms',2022,5,5,14696),('dbms',2022,5,6,1029),('dbms',2022,5,7,14101),('dbms',2022,5,8,3140),('dbms',2022,6,1,3835),('dbms',2022,6,2,734),('dbms',2022,6,3,13965),('dbms',2022,6,4,13461),('dbms',2022,6,5,15825),('dbms',2022,6,6,6107),('dbms',2022,6,7,4098),('dbms',2022,6,8,14350),('dbms',2022,7,1,10660),('dbms',2022,7,2,1505),('dbms',2022,7,3,1373),('dbms',2022,7,4,8360),('dbms',2022,7,5,4082),('dbms',2022,7,6,9924),('dbms',2022,7,7,11370),('dbms',2022,7,8,18726),('dbms',2022,8,1,2829),('dbms',2022,8,2,1233),('dbms',2022,8,3,2475),('dbms',2022,8,4,1649),('dbms',2022,8,5,17053),('dbms',2022,8,6,8668),('dbms',2022,8,7,7154),('dbms',2022,8,8,14505),('dbms',2022,9,1,16253),('dbms',2022,9,2,4633),('dbms',2022,9,3,4410),('dbms',2022,9,4,5860),('dbms',2022,9,5,14631),('dbms',2022,9,6,2789),('dbms',2022,9,7,6939),('dbms',2022,9,8,737),('dbms',2022,10,1,13041),('dbms',2022,10,2,8138),('dbms',2022,10,3,7618),('dbms',2022,10,4,11509),('dbms',2022,10,5,15987),('dbms',2022,10,6,4419),('dbms',2022,10,7,11399),('dbms',2022,10,8,6427),('dbms',2022,11,1,14738),('dbms',2022,11,2,3385),('dbms',2022,11,3,4260),('dbms',2022,11,4,9589),('dbms',2022,11,5,12955),('dbms',2022,11,6,8401),('dbms',2022,11,7,13184),('dbms',2022,11,8,12947),('dbms',2022,12,1,4181),('dbms',2022,12,2,6167),('dbms',2022,12,3,10509),('dbms',2022,12,4,12777),('dbms',2022,12,5,959),('dbms',2022,12,6,8893),('dbms',2022,12,7,1997),('dbms',2022,12,8,826),('djr',2022,12,1,0),('djr',2022,12,2,0),('djr',2022,12,4,0),('djr',2022,12,8,0),('huds',2022,12,1,0),('huds',2022,12,2,0),('huds',2022,12,3,0),('huds',2022,12,5,0),('huds',2022,12,7,2),('huds',2022,12,8,0),('rohit1',2022,12,1,0),('rohit1',2022,12,3,0),('rohit1',2022,12,6,0),('rohit1',2022,12,7,0),('rohit1',2022,12,8,0),('rohit123',2022,12,1,0),('rohit123',2022,12,2,0),('rohit123',2022,12,3,0),('rohit123',2022,12,4,0),('rohit123',2022,12,5,0),('rohit123',2022,12,6,0),('rohit1234',2022,12,1,0),('rohit1234',2022,12,5,0),('rohit1234',2022,12,7,0),('ryandan',2022,12,1,0),('ryandan',2022,12,2,0),('ryandan',2022,12,5,0);
+/*!40000 ALTER TABLE `billing_monthly_usage` ENABLE KEYS */;
+UNLOCK TABLES;
+
+--
+-- Table structure for table `catalog_version`
+--
+
+DROP TABLE IF EXISTS `catalog_version`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `catalog_version` (
+  `name` varchar(20) NOT NULL,
+  `version` bigint NOT NULL DEFAULT '1',
+  `signature` varchar(64) DEFAULT NULL,
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `catalog_version`
+--
+
+LOCK TABLES `catalog_version` WRITE;
+/*!40000 ALTER TABLE `catalog_version` DISABLE KEYS */;
+INSERT INTO `catalog_version` VALUES ('content',1,NULL),('dimensions',1,NULL);
+/*!40000 ALTER TABLE `catalog_version` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `content`
 --
@@ -89,10 +144,15 @@ CREATE TABLE `content` (
   `num_seasons` int DEFAULT NULL,
   `genre` int DEFAULT NULL,
   `description` text,
+  `updated_at` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6) /*!80023 INVISIBLE */,
   PRIMARY KEY (`guid`),
   KEY `service_content_fk` (`service_id`),
   KEY `genre_content_fk` (`genre`),
   KEY `rating_content_fk` (`rating`),
+  KEY `content_type_score_idx` (`service_type`,`critic_score`,`guid`),
+  KEY `content_type_title_idx` (`service_type`,`title`(100)),
+  KEY `content_updated_idx` (`updated_at`),
+  FULLTEXT KEY `content_title_desc_ft` (`title`,`description`),
   CONSTRAINT `genre_content_fk` FOREIGN KEY (`genre`) REFERENCES `genres` (`genre_id`) ON DELETE RESTRICT ON UPDATE CASCADE,
   CONSTRAINT `rating_content_fk` FOREIGN KEY (`rating`) REFERENCES `ratings` (`rating_id`) ON DELETE RESTRICT ON UPDATE CASCADE,
   CONSTRAINT `service_content_fk` FOREIGN KEY (`service_id`) REFERENCES `service` (`service_id`) ON DELETE CASCADE ON UPDATE CASCADE
@@ -133,6 +193,60 @@ LOCK TABLES `genres` WRITE;
 INSERT INTO `genres` VALUES (1,'Comedy'),(2,'Action'),(3,'Documentary'),(4,'Animation'),(5,'Drama'),(6,'Horror'),(7,'Fantasy'),(8,'Science Fiction'),(9,'Adventure'),(10,'Sports'),(11,'Western'),(12,'Nature'),(13,'Reality'),(14,'Game Shows'),(15,'Family'),(16,'Health & Wellness'),(17,'Crime'),(18,'Cooking'),(19,'Science & Technology'),(20,'Romantic'),(21,'Stand-Up Comedy'),(22,'Romance'),(23,'Historical'),(24,'Military and War'),(25,'Mystery'),(26,'Thrillers');
 /*!40000 ALTER TABLE `genres` ENABLE KEYS */;
 UNLOCK TABLES;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `genres_version_insert` AFTER INSERT ON `genres` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `genres_version_update` AFTER UPDATE ON `genres` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `genres_version_delete` AFTER DELETE ON `genres` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
 
 --
 -- Table structure for table `payment_method`
@@ -183,6 +297,60 @@ LOCK TABLES `ratings` WRITE;
 INSERT INTO `ratings` VALUES (1,'R'),(2,'PG-13'),(3,'G'),(4,'TV-14'),(5,'PG'),(6,'TV-PG'),(7,'TV-MA'),(8,'NR'),(9,'TV-G'),(10,'TV-NR'),(11,'TV-Y'),(12,'NC-17');
 /*!40000 ALTER TABLE `ratings` ENABLE KEYS */;
 UNLOCK TABLES;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `ratings_version_insert` AFTER INSERT ON `ratings` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `ratings_version_update` AFTER UPDATE ON `ratings` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `ratings_version_delete` AFTER DELETE ON `ratings` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
 
 --
 -- Table structure for table `service`
@@ -210,6 +378,85 @@ LOCK TABLES `service` WRITE;
 INSERT INTO `service` VALUES (1,'Netflix',6.99,'/static/images/Netflix-Logo.png'),(2,'Hulu',7.99,'/static/images/Hulu-logo.png'),(3,'Disney+',7.99,'/static/images/Disney+_logo.png'),(4,'Prime Video',8.99,'/static/images/Amazon-Prime-Video-logo.png'),(5,'HBO Max',9.99,'/static/images/HBO-Max-Logo.png'),(6,'Paramount+',9.99,'/static/images/Paramount+_logo.png'),(7,'Apple TV+',6.99,'/static/images/Apple-TV-logo.png'),(8,'Showtime Now',10.99,'/static/images/Showtime-logo.png');
 /*!40000 ALTER TABLE `service` ENABLE KEYS */;
 UNLOCK TABLES;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `service_version_insert` AFTER INSERT ON `service` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `service_version_update` AFTER UPDATE ON `service` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+/*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `service_version_delete` AFTER DELETE ON `service` FOR EACH ROW BEGIN
+	-- invalidates every app-side copy of the lookup tables
+	UPDATE catalog_version SET version = version + 1 WHERE name = 'dimensions';
+END */;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+
+--
+-- Table structure for table `service_popularity`
+--
+
+DROP TABLE IF EXISTS `service_popularity`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `service_popularity` (
+  `service_id` int NOT NULL,
+  `num_subscribed` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`service_id`),
+  CONSTRAINT `service_pop_fk` FOREIGN KEY (`service_id`) REFERENCES `service` (`service_id`) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `service_popularity`
+--
+
+LOCK TABLES `service_popularity` WRITE;
+/*!40000 ALTER TABLE `service_popularity` DISABLE KEYS */;
+INSERT INTO `service_popularity` VALUES (1,7),(2,5),(3,4),(4,3),(5,4),(6,3),(7,2),(8,3);
+/*!40000 ALTER TABLE `service_popularity` ENABLE KEYS */;
+UNLOCK TABLES;
 
 --
 -- Table structure for table `user`
@@ -328,8 +575,18 @@ UNLOCK TABLES;
 /*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
 DELIMITER ;;
 /*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `add_service` AFTER INSERT ON `user_services` FOR EACH ROW BEGIN
-	insert into billing_monitor
+	insert into billing_monitor (username, service_id, date_added, date_deleted)
 	values (new.username, new.service_id, current_timestamp(), NULL);
+
+	-- open this month's rollup row; minutes accrue when the interval closes
+	insert into billing_monthly_usage (username, usage_year, usage_month, service_id, minutes)
+	values (new.username, year(current_timestamp()), month(current_timestamp()), new.service_id, 0)
+	on duplicate key update minutes = minutes;
+
+	-- keep the per-service subscriber count current for get_subscription_metrics
+	insert into service_popularity (service_id, num_subscribed)
+	values (new.service_id, 1)
+	on duplicate key update num_subscribed = num_subscribed + 1;
 END */;;
 DELIMITER ;
 /*!50003 SET sql_mode              = @saved_sql_mode */ ;
@@ -346,6 +603,19 @@ DELIMITER ;
 /*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
 DELIMITER ;;
 /*!50003 CREATE*/ /*!50017 DEFINER=`root`@`localhost`*/ /*!50003 TRIGGER `delete_service` AFTER DELETE ON `user_services` FOR EACH ROW BEGIN
+	-- roll the closing interval's minutes into the month it was opened
+	INSERT INTO billing_monthly_usage (username, usage_year, usage_month, service_id, minutes)
+	SELECT * FROM (
+		SELECT username, YEAR(date_added) AS usage_year, MONTH(date_added) AS usage_month, service_id,
+			TIMESTAMPDIFF(minute, date_added, CURRENT_TIMESTAMP()) AS closed_minutes
+		FROM billing_monitor
+		WHERE
+			(username = old.username)
+				AND (service_id = old.service_id)
+				AND (date_deleted IS NULL)
+	) AS closed
+	ON DUPLICATE KEY UPDATE minutes = billing_monthly_usage.minutes + closed.closed_minutes;
+
 	UPDATE billing_monitor 
 	SET 
 		date_deleted = CURRENT_TIMESTAMP()
@@ -353,6 +623,13 @@ DELIMITER ;;
 		(username = old.username)
 			AND (service_id = old.service_id)
 			AND (date_deleted IS NULL);
+
+	UPDATE service_popularity
+	SET
+		num_subscribed = num_subscribed - 1
+	WHERE
+		(service_id = old.service_id)
+			AND (num_subscribed > 0);
 END */;;
 DELIMITER ;
 /*!50003 SET sql_mode              = @saved_sql_mode */ ;
@@ -508,6 +785,28 @@ DELIMITER ;
 /*!50003 SET character_set_client  = @saved_cs_client */ ;
 /*!50003 SET character_set_results = @saved_cs_results */ ;
 /*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP FUNCTION IF EXISTS `get_catalog_version` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` FUNCTION `get_catalog_version`(name_p VARCHAR(20)) RETURNS bigint
+    READS SQL DATA
+BEGIN
+    DECLARE version_p BIGINT;
+    SELECT version INTO version_p FROM catalog_version WHERE name = name_p;
+    RETURN COALESCE(version_p, 0);
+  END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
 /*!50003 DROP FUNCTION IF EXISTS `get_service_id` */;
 /*!50003 SET @saved_cs_client      = @@character_set_client */ ;
 /*!50003 SET @saved_cs_results     = @@character_set_results */ ;
@@ -713,14 +1012,19 @@ DELIMITER ;
 DELIMITER ;;
 CREATE DEFINER=`root`@`localhost` PROCEDURE `generateBill`(in bill_month int, in bill_year int, in user_id varchar(50))
 begin
+	declare month_start datetime default makedate(bill_year, 1) + interval (bill_month - 1) month;
+
 	with cte as (
-		select service_id, 
-			case
-				when date_deleted is not null then TIMESTAMPDIFF(minute, date_added, date_deleted)
-				when date_deleted is null then TIMESTAMPDIFF(minute, date_added, current_timestamp())
-			end as total_days
+		-- closed intervals: pre-aggregated by the delete_service trigger
+		select service_id, minutes as total_days
+		from billing_monthly_usage
+		where username = user_id and usage_year = bill_year and usage_month = bill_month
+		union all
+		-- open intervals: still accruing time, found by an index range scan
+		select service_id, TIMESTAMPDIFF(minute, date_added, current_timestamp()) as total_days
 		from billing_monitor
-		where username = user_id and month(date_added) = bill_month and year(date_added) = bill_year
+		where username = user_id and date_deleted is null
+			and date_added >= month_start and date_added < month_start + interval 1 month
 	), 
 	cte2 as (
 		select service_id, sum(total_days/60) as total
@@ -741,6 +1045,72 @@ DELIMITER ;
 /*!50003 SET character_set_client  = @saved_cs_client */ ;
 /*!50003 SET character_set_results = @saved_cs_results */ ;
 /*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `generateBillingSummary` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `generateBillingSummary`(in bill_month int, in bill_year int, in user_id varchar(50))
+begin
+	declare month_start datetime default makedate(bill_year, 1) + interval (bill_month - 1) month;
+
+	-- aggregate the month once; every result set below reads this table
+	drop temporary table if exists billing_summary;
+	create temporary table billing_summary
+	with cte as (
+		-- closed intervals: pre-aggregated by the delete_service trigger
+		select service_id, minutes as total_days
+		from billing_monthly_usage
+		where username = user_id and usage_year = bill_year and usage_month = bill_month
+		union all
+		-- open intervals: still accruing time, found by an index range scan
+		select service_id, TIMESTAMPDIFF(minute, date_added, current_timestamp()) as total_days
+		from billing_monitor
+		where username = user_id and date_deleted is null
+			and date_added >= month_start and date_added < month_start + interval 1 month
+	), 
+	cte2 as (
+		select service_id, sum(total_days/60) as total
+		from cte
+		group by 1
+	)
+	select service.image as image, service.service_name as name, cte2.total as time_spent, cte2.total * ((service.subscription_price/30)/24) as cost
+	from cte2
+	join service on
+		cte2.service_id = service.service_id;
+
+	-- result set 1: per service bill (generateBill)
+	select name, round(time_spent, 2) as time_spent, round(cost, 4) as cost
+	from billing_summary;
+
+	-- result set 2: monthly total (generateTotal)
+	select round(sum(cost), 2) as total_cost
+	from billing_summary;
+
+	-- result set 3: most viewed service (getMostViewed)
+	select image, name, round(time_spent, 2) as time_spent
+	from billing_summary
+	order by time_spent desc
+	limit 1;
+
+	-- result set 4: most billed service (getMostBilled)
+	select image, name, round(cost, 4) as cost
+	from billing_summary
+	order by cost desc
+	limit 1;
+
+	drop temporary table billing_summary;
+end ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
 /*!50003 DROP PROCEDURE IF EXISTS `generateTotal` */;
 /*!50003 SET @saved_cs_client      = @@character_set_client */ ;
 /*!50003 SET @saved_cs_results     = @@character_set_results */ ;
@@ -753,14 +1123,19 @@ DELIMITER ;
 DELIMITER ;;
 CREATE DEFINER=`root`@`localhost` PROCEDURE `generateTotal`(in bill_month int, in bill_year int, in user_id varchar(50))
 begin
+	declare month_start datetime default makedate(bill_year, 1) + interval (bill_month - 1) month;
+
 	with cte as (
-		select service_id, 
-			case
-				when date_deleted is not null then TIMESTAMPDIFF(minute, date_added, date_deleted)
-				when date_deleted is null then TIMESTAMPDIFF(minute, date_added, current_timestamp())
-			end as total_days
+		-- closed intervals: pre-aggregated by the delete_service trigger
+		select service_id, minutes as total_days
+		from billing_monthly_usage
+		where username = user_id and usage_year = bill_year and usage_month = bill_month
+		union all
+		-- open intervals: still accruing time, found by an index range scan
+		select service_id, TIMESTAMPDIFF(minute, date_added, current_timestamp()) as total_days
 		from billing_monitor
-		where username = user_id and month(date_added) = bill_month and year(date_added) = bill_year
+		where username = user_id and date_deleted is null
+			and date_added >= month_start and date_added < month_start + interval 1 month
 	), 
 	cte2 as (
 		select service_id, sum(total_days/60) as total
@@ -793,14 +1168,19 @@ DELIMITER ;
 DELIMITER ;;
 CREATE DEFINER=`root`@`localhost` PROCEDURE `getMostBilled`(in bill_month int, in bill_year int, in user_id varchar(50))
 begin
+	declare month_start datetime default makedate(bill_year, 1) + interval (bill_month - 1) month;
+
 	with cte as (
-		select service_id, 
-			case
-				when date_deleted is not null then TIMESTAMPDIFF(minute, date_added, date_deleted)
-				when date_deleted is null then TIMESTAMPDIFF(minute, date_added, current_timestamp())
-			end as total_days
+		-- closed intervals: pre-aggregated by the delete_service trigger
+		select service_id, minutes as total_days
+		from billing_monthly_usage
+		where username = user_id and usage_year = bill_year and usage_month = bill_month
+		union all
+		-- open intervals: still accruing time, found by an index range scan
+		select service_id, TIMESTAMPDIFF(minute, date_added, current_timestamp()) as total_days
 		from billing_monitor
-		where username = user_id and month(date_added) = bill_month and year(date_added) = bill_year
+		where username = user_id and date_deleted is null
+			and date_added >= month_start and date_added < month_start + interval 1 month
 	), 
 	cte2 as (
 		select service_id, sum(total_days/60) as total
@@ -835,14 +1215,19 @@ DELIMITER ;
 DELIMITER ;;
 CREATE DEFINER=`root`@`localhost` PROCEDURE `getMostViewed`(in bill_month int, in bill_year int, in user_id varchar(50))
 begin
+	declare month_start datetime default makedate(bill_year, 1) + interval (bill_month - 1) month;
+
 	with cte as (
-		select service_id, 
-			case
-				when date_deleted is not null then TIMESTAMPDIFF(minute, date_added, date_deleted)
-				when date_deleted is null then TIMESTAMPDIFF(minute, date_added, current_timestamp())
-			end as total_days
+		-- closed intervals: pre-aggregated by the delete_service trigger
+		select service_id, minutes as total_days
+		from billing_monthly_usage
+		where username = user_id and usage_year = bill_year and usage_month = bill_month
+		union all
+		-- open intervals: still accruing time, found by an index range scan
+		select service_id, TIMESTAMPDIFF(minute, date_added, current_timestamp()) as total_days
 		from billing_monitor
-		where username = user_id and month(date_added) = bill_month and year(date_added) = bill_year
+		where username = user_id and date_deleted is null
+			and date_added >= month_start and date_added < month_start + interval 1 month
 	), 
 	cte2 as (
 		select service_id, sum(total_days/60) as total
@@ -1051,7 +1436,7 @@ DELIMITER ;
 /*!50003 SET character_set_client  = @saved_cs_client */ ;
 /*!50003 SET character_set_results = @saved_cs_results */ ;
 /*!50003 SET collation_connection  = @saved_col_connection */ ;
-/*!50003 DROP PROCEDURE IF EXISTS `get_subscription_metrics` */;
+/*!50003 DROP PROCEDURE IF EXISTS `get_catalog_ids` */;
 /*!50003 SET @saved_cs_client      = @@character_set_client */ ;
 /*!50003 SET @saved_cs_results     = @@character_set_results */ ;
 /*!50003 SET @saved_col_connection = @@collation_connection */ ;
@@ -1061,59 +1446,282 @@ DELIMITER ;
 /*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
 /*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
 DELIMITER ;;
-CREATE DEFINER=`root`@`localhost` PROCEDURE `get_subscription_metrics`(IN sort_type ENUM("a-z",
-															"z-a", 
-                                                            "price-high", 
-                                                            "price-low", 
-                                                            "popularity-high", 
-                                                            "popularity-low"))
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_catalog_ids`(IN service_type_p ENUM("Movie", "TV Show"))
 BEGIN
-    IF sort_type = "a-z"
-      THEN
-        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, COALESCE(get_total_users(),0) AS total_users
-          FROM
-          (SELECT service_id, COALESCE(COUNT(*), 0) AS num_subscribed FROM user_services GROUP BY service_id) AS t
-          RIGHT OUTER JOIN service
-          ON service.service_id = t.service_id
-          ORDER BY service_name ASC;
-    ELSEIF sort_type = "z-a"
-      THEN
-        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, COALESCE(get_total_users(),0) AS total_users
-          FROM
-          (SELECT service_id, COALESCE(COUNT(*), 0) AS num_subscribed FROM user_services GROUP BY service_id) AS t
-          RIGHT OUTER JOIN service
-          ON service.service_id = t.service_id
-          ORDER BY service_name DESC;
-    ELSEIF sort_type = "price-high"
-      THEN
-        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, COALESCE(get_total_users(),0) AS total_users
-          FROM
-          (SELECT service_id, COALESCE(COUNT(*), 0) AS num_subscribed FROM user_services GROUP BY service_id) AS t
-          RIGHT OUTER JOIN service
+	-- No lookup joins: service, genre and rating are returned as ids
+	-- and resolved by the app's dimension cache
+	SELECT guid, service_id, service_type, title, genre, run_time_minutes, num_seasons, rating, critic_score, description
+		FROM content
+		WHERE service_type = service_type_p;
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `get_catalog_snapshot` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_catalog_snapshot`()
+BEGIN
+	-- every content row, with the version it was read at, for the
+	-- app's memory-mapped catalog snapshot
+	SELECT get_catalog_version('content') AS version;
+	SELECT guid, service_id, service_type, title, critic_score, release_year, rating, run_time_minutes, num_seasons, genre, description
+		FROM content
+		ORDER BY guid;
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `get_catalog_versions` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_catalog_versions`()
+BEGIN
+	-- The content version moves on its own: any insert, update or delete
+	-- changes the row count or the newest updated_at, and the first caller
+	-- to see a new signature bumps the version (later callers then match it)
+	DECLARE signature_p VARCHAR(64);
+	SELECT CONCAT(COUNT(*), '@', COALESCE(MAX(updated_at), '')) INTO signature_p FROM content;
+	UPDATE catalog_version SET version = version + 1, signature = signature_p
+		WHERE name = 'content' AND NOT (signature <=> signature_p);
+	SELECT get_catalog_version('content') AS content_version,
+	       get_catalog_version('dimensions') AS dimensions_version;
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `get_content_features` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_content_features`()
+BEGIN
+	-- the columns the app's similarity recommender builds its feature
+	-- matrix from, with the version they were read at
+	SELECT get_catalog_version('content') AS version;
+	SELECT guid, service_id, service_type, genre, rating, release_year, run_time_minutes, num_seasons, critic_score
+		FROM content
+		ORDER BY guid;
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `get_content_page` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_content_page`(IN service_type_p ENUM("Movie", "TV Show"),
+                                  IN sort_type ENUM("a-z",
+                                                    "z-a",
+                                                    "price-high",
+                                                    "price-low",
+                                                    "popularity-high",
+                                                    "popularity-low"),
+                                  IN page_size INT)
+BEGIN
+    -- The first page_size rows in a sort order (the streamed library).
+    -- Later pages are served from the app's in-memory catalog views.
+    IF sort_type = "a-z"
+      THEN
+		SELECT guid, service_name, subscription_price, service_type, image, title, genre_name, run_time_minutes, num_seasons, rating_name, critic_score, description
+			FROM content
+				INNER JOIN service
+					ON content.service_id = service.service_id
+				INNER JOIN genres
+					ON content.genre = genres.genre_id
+				INNER JOIN ratings
+					ON content.rating = ratings.rating_id
+		  WHERE service_type = service_type_p
+          ORDER BY service_name ASC, guid ASC
+          LIMIT page_size;
+    ELSEIF sort_type = "z-a"
+      THEN
+		SELECT guid, service_name, subscription_price, service_type, image, title, genre_name, run_time_minutes, num_seasons, rating_name, critic_score, description
+			FROM content
+				INNER JOIN service
+					ON content.service_id = service.service_id
+				INNER JOIN genres
+					ON content.genre = genres.genre_id
+				INNER JOIN ratings
+					ON content.rating = ratings.rating_id
+		  WHERE service_type = service_type_p
+          ORDER BY service_name DESC, guid DESC
+          LIMIT page_size;
+    ELSEIF sort_type = "price-high"
+      THEN
+		SELECT guid, service_name, subscription_price, service_type, image, title, genre_name, run_time_minutes, num_seasons, rating_name, critic_score, description
+			FROM content
+				INNER JOIN service
+					ON content.service_id = service.service_id
+				INNER JOIN genres
+					ON content.genre = genres.genre_id
+				INNER JOIN ratings
+					ON content.rating = ratings.rating_id
+		  WHERE service_type = service_type_p
+          ORDER BY subscription_price DESC, guid DESC
+          LIMIT page_size;
+    ELSEIF sort_type = "price-low"
+      THEN
+		SELECT guid, service_name, subscription_price, service_type, image, title, genre_name, run_time_minutes, num_seasons, rating_name, critic_score, description
+			FROM content
+				INNER JOIN service
+					ON content.service_id = service.service_id
+				INNER JOIN genres
+					ON content.genre = genres.genre_id
+				INNER JOIN ratings
+					ON content.rating = ratings.rating_id
+		  WHERE service_type = service_type_p
+          ORDER BY subscription_price ASC, guid ASC
+          LIMIT page_size;
+    ELSEIF sort_type = "popularity-high"
+      THEN
+		SELECT guid, service_name, subscription_price, service_type, image, title, genre_name, run_time_minutes, num_seasons, rating_name, critic_score, description
+			FROM content
+				INNER JOIN service
+					ON content.service_id = service.service_id
+				INNER JOIN genres
+					ON content.genre = genres.genre_id
+				INNER JOIN ratings
+					ON content.rating = ratings.rating_id
+		  WHERE service_type = service_type_p
+          ORDER BY critic_score DESC, guid DESC
+          LIMIT page_size;
+    ELSEIF sort_type = "popularity-low"
+      THEN
+		SELECT guid, service_name, subscription_price, service_type, image, title, genre_name, run_time_minutes, num_seasons, rating_name, critic_score, description
+			FROM content
+				INNER JOIN service
+					ON content.service_id = service.service_id
+				INNER JOIN genres
+					ON content.genre = genres.genre_id
+				INNER JOIN ratings
+					ON content.rating = ratings.rating_id
+		  WHERE service_type = service_type_p
+          ORDER BY critic_score ASC, guid ASC
+          LIMIT page_size;
+    END IF;
+  END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `get_dimensions` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_dimensions`()
+BEGIN
+	-- the lookup tables and their version, as four result sets
+	SELECT get_catalog_version('dimensions') AS version;
+	SELECT service_id, service_name, subscription_price, image FROM service;
+	SELECT genre_id, genre_name FROM genres;
+	SELECT rating_id, rating_name FROM ratings;
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `get_subscription_metrics` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_subscription_metrics`(IN sort_type ENUM("a-z",
+															"z-a", 
+                                                            "price-high", 
+                                                            "price-low", 
+                                                            "popularity-high", 
+                                                            "popularity-low"))
+BEGIN
+    DECLARE total_users INT DEFAULT COALESCE(get_total_users(),0);
+
+    IF sort_type = "a-z"
+      THEN
+        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, total_users
+          FROM service
+          LEFT OUTER JOIN service_popularity AS t
+          ON service.service_id = t.service_id
+          ORDER BY service_name ASC;
+    ELSEIF sort_type = "z-a"
+      THEN
+        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, total_users
+          FROM service
+          LEFT OUTER JOIN service_popularity AS t
+          ON service.service_id = t.service_id
+          ORDER BY service_name DESC;
+    ELSEIF sort_type = "price-high"
+      THEN
+        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, total_users
+          FROM service
+          LEFT OUTER JOIN service_popularity AS t
           ON service.service_id = t.service_id
           ORDER BY subscription_price DESC;
     ELSEIF sort_type = "price-low"
       THEN
-        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, COALESCE(get_total_users(),0) AS total_users
-          FROM
-          (SELECT service_id, COALESCE(COUNT(*), 0) AS num_subscribed FROM user_services GROUP BY service_id) AS t
-          RIGHT OUTER JOIN service
+        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, total_users
+          FROM service
+          LEFT OUTER JOIN service_popularity AS t
           ON service.service_id = t.service_id
           ORDER BY subscription_price ASC;
     ELSEIF sort_type = "popularity-high"
       THEN
-        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, COALESCE(get_total_users(),0) AS total_users
-          FROM
-          (SELECT service_id, COALESCE(COUNT(*), 0) AS num_subscribed FROM user_services GROUP BY service_id) AS t
-          RIGHT OUTER JOIN service
+        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, total_users
+          FROM service
+          LEFT OUTER JOIN service_popularity AS t
           ON service.service_id = t.service_id
           ORDER BY num_subscribed DESC;
     ELSEIF sort_type = "popularity-low"
       THEN
-        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, COALESCE(get_total_users(),0) AS total_users
-          FROM
-          (SELECT service_id, COALESCE(COUNT(*), 0) AS num_subscribed FROM user_services GROUP BY service_id) AS t
-          RIGHT OUTER JOIN service
+        SELECT service_name, subscription_price, image, COALESCE(num_subscribed,0) AS num_subscribed, total_users
+          FROM service
+          LEFT OUTER JOIN service_popularity AS t
           ON service.service_id = t.service_id
           ORDER BY num_subscribed ASC;
     END IF;
@@ -1167,6 +1775,49 @@ DELIMITER ;
 /*!50003 SET character_set_client  = @saved_cs_client */ ;
 /*!50003 SET character_set_results = @saved_cs_results */ ;
 /*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `get_user_dashboard` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_user_dashboard`(IN username_p VARCHAR(50))
+BEGIN
+  -- one round trip for the subscriptions dashboard: two result sets
+  -- (recommendations are ranked in the app against its favorites cache)
+  CALL get_user_services(username_p);
+  SELECT getTotalCost(username_p) AS total_monthly_cost;
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `get_user_favorite_ids` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `get_user_favorite_ids`(IN username_p VARCHAR(50))
+BEGIN
+  SELECT content_id
+    FROM user_favorites
+    WHERE username = username_p;
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
 /*!50003 DROP PROCEDURE IF EXISTS `get_user_favorites` */;
 /*!50003 SET @saved_cs_client      = @@character_set_client */ ;
 /*!50003 SET @saved_cs_results     = @@character_set_results */ ;
@@ -1321,6 +1972,62 @@ DELIMITER ;
 /*!50003 SET character_set_client  = @saved_cs_client */ ;
 /*!50003 SET character_set_results = @saved_cs_results */ ;
 /*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `search_content` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `search_content`(IN service_type_p ENUM("Movie", "TV Show"),
+                                IN keyword VARCHAR(255),
+                                IN limit_p INT,
+                                IN offset_p INT)
+BEGIN
+    -- Strip full-text operators, then require every word as a prefix: "star wa" -> "+star* +wa*"
+    DECLARE clean_keyword VARCHAR(255) DEFAULT TRIM(REGEXP_REPLACE(keyword, '[-+<>()~*"@]+', ' '));
+    DECLARE boolean_query VARCHAR(1024) DEFAULT CONCAT('+', REGEXP_REPLACE(clean_keyword, '[[:space:]]+', '* +'), '*');
+
+    IF CHAR_LENGTH(clean_keyword) < 3
+      THEN
+        -- Too short for the full-text index: title prefix match on content_type_title_idx
+		SELECT guid, service_name, service_type, image, title, genre_name, run_time_minutes, num_seasons, rating_name, critic_score, description,
+               0 AS relevance
+			FROM content 
+				INNER JOIN service
+					ON content.service_id = service.service_id
+				INNER JOIN genres
+					ON content.genre = genres.genre_id
+				INNER JOIN ratings
+					ON content.rating = ratings.rating_id
+			WHERE service_type = service_type_p
+			AND title LIKE CONCAT(clean_keyword, "%")
+			ORDER BY title ASC
+			LIMIT offset_p, limit_p;
+    ELSE
+		SELECT guid, service_name, service_type, image, title, genre_name, run_time_minutes, num_seasons, rating_name, critic_score, description,
+               MATCH(title, description) AGAINST (boolean_query IN BOOLEAN MODE) AS relevance
+			FROM content 
+				INNER JOIN service
+					ON content.service_id = service.service_id
+				INNER JOIN genres
+					ON content.genre = genres.genre_id
+				INNER JOIN ratings
+					ON content.rating = ratings.rating_id
+			WHERE service_type = service_type_p
+			AND MATCH(title, description) AGAINST (boolean_query IN BOOLEAN MODE)
+			ORDER BY relevance DESC, critic_score DESC
+			LIMIT offset_p, limit_p;
+    END IF;
+END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
 /*!50003 DROP PROCEDURE IF EXISTS `search_movies` */;
 /*!50003 SET @saved_cs_client      = @@character_set_client */ ;
 /*!50003 SET @saved_cs_results     = @@character_set_results */ ;
@@ -1377,6 +2084,108 @@ DELIMITER ;
 /*!50003 SET character_set_client  = @saved_cs_client */ ;
 /*!50003 SET character_set_results = @saved_cs_results */ ;
 /*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `subscribe_service` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `subscribe_service`(IN username_p VARCHAR(50),
+                                   IN service_name_p VARCHAR(50))
+BEGIN
+    DECLARE service_id_p INT DEFAULT get_service_id(service_name_p);
+    DECLARE changed INT DEFAULT 0;
+
+    -- idempotent: a duplicate click leaves the row (and the add_service trigger) alone
+    IF service_id_p IS NOT NULL
+      THEN
+        INSERT INTO user_services (username, service_id)
+          VALUES (username_p, service_id_p)
+          ON DUPLICATE KEY UPDATE service_id = service_id;
+        SET changed = ROW_COUNT();
+    END IF;
+
+    SELECT changed > 0 AS changed;
+    CALL get_user_dashboard(username_p);
+  END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `toggle_user_favorite` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `toggle_user_favorite`(IN username_p VARCHAR(50),
+                                      IN content_id_p INT,
+                                      IN favorite_p TINYINT(1))
+BEGIN
+    -- favorite_p: TRUE to favorite, FALSE to unfavorite, NULL to flip
+    DECLARE changed INT DEFAULT 0;
+    DECLARE favorited TINYINT(1) DEFAULT FALSE;
+
+    IF favorite_p IS NULL OR NOT favorite_p
+      THEN
+        DELETE FROM user_favorites
+          WHERE username = username_p AND content_id = content_id_p;
+        SET changed = ROW_COUNT();
+    END IF;
+
+    IF favorite_p OR (favorite_p IS NULL AND changed = 0)
+      THEN
+        INSERT INTO user_favorites (username, content_id)
+          VALUES (username_p, content_id_p)
+          ON DUPLICATE KEY UPDATE content_id = content_id;
+        SET changed = ROW_COUNT();
+        SET favorited = TRUE;
+    END IF;
+
+    SELECT favorited, changed > 0 AS changed;
+  END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
+/*!50003 DROP PROCEDURE IF EXISTS `unsubscribe_service` */;
+/*!50003 SET @saved_cs_client      = @@character_set_client */ ;
+/*!50003 SET @saved_cs_results     = @@character_set_results */ ;
+/*!50003 SET @saved_col_connection = @@collation_connection */ ;
+/*!50003 SET character_set_client  = utf8mb4 */ ;
+/*!50003 SET character_set_results = utf8mb4 */ ;
+/*!50003 SET collation_connection  = utf8mb4_0900_ai_ci */ ;
+/*!50003 SET @saved_sql_mode       = @@sql_mode */ ;
+/*!50003 SET sql_mode              = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION' */ ;
+DELIMITER ;;
+CREATE DEFINER=`root`@`localhost` PROCEDURE `unsubscribe_service`(IN username_p VARCHAR(50),
+                                     IN service_name_p VARCHAR(50))
+BEGIN
+    DECLARE service_id_p INT DEFAULT get_service_id(service_name_p);
+    DECLARE changed INT DEFAULT 0;
+
+    DELETE FROM user_services
+      WHERE username = username_p AND service_id = service_id_p;
+    SET changed = ROW_COUNT();
+
+    SELECT changed > 0 AS changed;
+    CALL get_user_dashboard(username_p);
+  END ;;
+DELIMITER ;
+/*!50003 SET sql_mode              = @saved_sql_mode */ ;
+/*!50003 SET character_set_client  = @saved_cs_client */ ;
+/*!50003 SET character_set_results = @saved_cs_results */ ;
+/*!50003 SET collation_connection  = @saved_col_connection */ ;
 /*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
 
 /*!40101 SET SQL_MODE=@OLD_SQL_MODE */;
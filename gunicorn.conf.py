@@ -0,0 +1,28 @@
+"""
+Gunicorn settings for running StreamEasy across every core:
+  $ gunicorn -c gunicorn.conf.py
+Every setting can be overridden from the environment.
+"""
+import multiprocessing
+import os
+
+# Server
+wsgi_app = "wsgi:app"
+bind = os.environ.get("STREAMEASY_BIND", "0.0.0.0:8000")
+
+# Workers: processes for CPU parallelism, threads to overlap database waits
+workers = int(os.environ.get("STREAMEASY_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("STREAMEASY_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.environ.get("STREAMEASY_TIMEOUT", 30))
+
+# Load the app (and warm its caches) once in the master, then fork
+preload_app = True
+
+
+def post_fork(server, worker):
+  """
+  Give each worker its own database connection pools and query threads
+  """
+  from database.dbHelpers import reinitAfterFork
+  reinitAfterFork()
@@ -0,0 +1,39 @@
+import sys
+import pytest
+from database.cacheHelpers import catalogCache, dataVersions, favoritesCache
+from website import create_app
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+  monkeypatch.setenv("STREAMEASY_SESSION_DB", str(tmp_path / "sessions.db"))
+  monkeypatch.setenv("STREAMEASY_SNAPSHOT_DIR", "")
+  monkeypatch.setenv("STREAMEASY_FEATURE_DIR", str(tmp_path / "features"))
+  app = create_app()
+  app.config["TESTING"] = True
+  yield app
+  dataVersions.useStore(None)
+  catalogCache.clear()
+  favoritesCache.clear()
+
+
+@pytest.fixture
+def views():
+  # website.views is the blueprint; this is the module
+  return sys.modules["website.views"]
+
+
+@pytest.fixture
+def client(app):
+  """
+  A test client logged in as alice on a connected database
+  """
+  client = app.test_client()
+  with client.session_transaction() as session:
+    session.update(db_connected=True,
+                   logged_in=True,
+                   user_id="alice",
+                   hostName="localhost",
+                   userName="root",
+                   userPassword="password")
+  return client
@@ -0,0 +1,80 @@
+from database.cacheHelpers import FavoritesCache, LRUCache, VersionCounters
+from database.sharedStore import SQLiteStore
+
+
+def test_lru_eviction():
+  cache = LRUCache(maxEntries=2)
+  cache.set(("a",), 1)
+  cache.set(("b",), 2)
+  cache.get(("a",))
+  cache.set(("c",), 3)
+  assert cache.get(("b",)) is None
+  assert cache.get(("a",)) == 1
+  assert cache.stats()["evictions"] == 1
+
+
+def test_lru_ttl_and_invalidate_prefix():
+  cache = LRUCache()
+  cache.set(("old",), 1, ttl=-1)
+  assert cache.get(("old",), "missing") == "missing"
+  cache.set(("view", "a"), 1)
+  cache.set(("view", "b"), 2)
+  cache.set(("other",), 3)
+  cache.invalidatePrefix(("view",))
+  assert cache.get(("view", "a")) is None
+  assert cache.get(("other",)) == 3
+
+
+def test_get_or_load_loads_once():
+  cache = LRUCache()
+  calls = []
+  def loader():
+    calls.append(1)
+    return "rows"
+  assert cache.getOrLoad(("movies",), loader) == "rows"
+  assert cache.getOrLoad(("movies",), loader) == "rows"
+  assert len(calls) == 1
+  assert cache.stats()["hits"] == 1
+
+
+def test_favorites_copy_on_write():
+  cache = FavoritesCache()
+  cache.set(("alice",), frozenset({1}))
+  before = cache.get(("alice",))
+  cache.add(("alice",), 2)
+  cache.discard(("alice",), 1)
+  assert cache.get(("alice",)) == frozenset({2})
+  assert before == frozenset({1})
+
+
+def test_favorites_not_cached_are_left_alone():
+  cache = FavoritesCache()
+  cache.add(("bob",), 1)
+  assert cache.get(("bob",)) is None
+
+
+def test_favorites_move_to_new_key():
+  cache = FavoritesCache()
+  cache.set(("alice", 1), frozenset({1}))
+  cache.add(("alice", 1), 2, newKey=("alice", 2))
+  assert cache.get(("alice", 1)) is None
+  assert cache.get(("alice", 2)) == frozenset({1, 2})
+
+
+def test_version_counters():
+  versions = VersionCounters()
+  assert not versions.shared
+  assert versions.get(("favorites", "alice")) == 0
+  assert versions.bump(("favorites", "alice")) == 1
+  assert versions.get(("favorites", "alice")) == 1
+
+
+def test_version_counters_shared_between_workers(tmp_path):
+  path = str(tmp_path / "store.db")
+  worker, other = VersionCounters(), VersionCounters()
+  worker.useStore(SQLiteStore(path))
+  other.useStore(SQLiteStore(path))
+  assert worker.shared
+  worker.bump(("services",))
+  assert other.bump(("services",)) == 2
+  assert worker.get(("services",)) == 2
@@ -0,0 +1,115 @@
+import pytest
+from decimal import Decimal
+from database.catalogSnapshot import CatalogSnapshot, SnapshotCache, writeSnapshot
+
+SERVICES = [{"service_id": 1, "service_name": "Netflix",
+             "subscription_price": Decimal("15.49"), "image": "Netflix-Logo.png"}]
+GENRES = {6: "Horror"}
+RATINGS = {2: "PG-13"}
+
+
+def contentRow(guid, serviceType, title, **values):
+  row = {"guid": guid, "service_id": 1, "service_type": serviceType, "title": title,
+         "description": "", "genre": 6, "rating": 2, "release_year": 2016,
+         "run_time_minutes": None, "num_seasons": None, "critic_score": None}
+  row.update(values)
+  return row
+
+
+ROWS = [contentRow(3, "TV Show", "Firefly Lane", num_seasons=1, critic_score=67,
+                   description="Best friends Tully and Kate"),
+        contentRow(1, "Movie", "Zoombies", run_time_minutes=87, critic_score=48),
+        contentRow(2, "Movie", "Amélie", genre=None)]
+
+
+class FakeCursor:
+  """
+  Answers the version query and the export procedures from fixed data
+  """
+  def __init__(self, contentVersion, dimensionsVersion):
+    self.versions = {"content": contentVersion, "dimensions": dimensionsVersion}
+    self.exports = 0
+    self._results = []
+
+  def execute(self, query):
+    if query == "CALL get_catalog_versions()":
+      self._results = [[{"content_version": self.versions["content"],
+                         "dimensions_version": self.versions["dimensions"]}]]
+    elif query == "CALL get_dimensions()":
+      self.exports += 1
+      self._results = [[{"version": self.versions["dimensions"]}], SERVICES,
+                       [{"genre_id": k, "genre_name": v} for k, v in GENRES.items()],
+                       [{"rating_id": k, "rating_name": v} for k, v in RATINGS.items()]]
+    elif query == "CALL get_catalog_snapshot()":
+      self._results = [[{"version": self.versions["content"]}], ROWS]
+
+  def fetchone(self):
+    return self._results[0][0]
+
+  def fetchall(self):
+    return self._results[0]
+
+  def nextset(self):
+    self._results.pop(0)
+
+
+def test_round_trip(tmp_path):
+  path = str(tmp_path / "localhost.catalog")
+  writeSnapshot(path, 5, 7, ROWS, SERVICES, GENRES, RATINGS)
+  snapshot = CatalogSnapshot.open(path)
+
+  assert (snapshot.contentVersion, snapshot.dimensionsVersion) == (5, 7)
+  assert len(snapshot) == 3
+  assert list(snapshot.contentRows()) == sorted(ROWS, key=lambda row: row["guid"])
+  assert [row["guid"] for row in snapshot.contentRows("Movie")] == [1, 2]
+  services, genres, ratings = snapshot.lookups()
+  assert services == {1: SERVICES[0]}
+  assert (genres, ratings) == (GENRES, RATINGS)
+
+
+def test_unreadable_file(tmp_path):
+  path = tmp_path / "localhost.catalog"
+  assert CatalogSnapshot.open(str(path)) is None
+  path.write_bytes(b"not a snapshot")
+  assert CatalogSnapshot.open(str(path)) is None
+
+
+def test_refresh_exports_on_version_change(tmp_path):
+  path = str(tmp_path / "localhost.catalog")
+  cache = SnapshotCache(path)
+  cursor = FakeCursor(1, 1)
+  assert cache.needsCheck()
+  assert cache.refresh(cursor)
+  assert not cache.needsCheck()
+  assert cache.refresh(cursor) is False
+  assert cursor.exports == 1
+
+  cursor.versions["content"] = 2
+  assert cache.refresh(cursor)
+  assert cursor.exports == 2
+  assert cache.snapshot.contentVersion == 2
+
+
+def test_refresh_reopens_another_workers_export(tmp_path):
+  path = str(tmp_path / "localhost.catalog")
+  writeSnapshot(path, 4, 1, ROWS, SERVICES, GENRES, RATINGS)
+  cache = SnapshotCache(path)
+  cursor = FakeCursor(4, 1)
+  assert cache.refresh(cursor)
+  assert cursor.exports == 0
+  assert cache.snapshot.contentVersion == 4
+
+
+def test_failed_refresh_backs_off(tmp_path):
+  blocker = tmp_path / "not-a-directory"
+  blocker.write_text("")
+  cache = SnapshotCache(str(blocker / "localhost.catalog"))
+  cursor = FakeCursor(1, 1)
+  with pytest.raises(OSError):
+    cache.refresh(cursor)
+  # no retry (and no export) on every request until the interval passes
+  assert cache.snapshot is None
+  assert not cache.needsCheck()
+
+  cache.checkInterval = -1
+  assert cache.needsCheck()
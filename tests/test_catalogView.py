@@ -0,0 +1,57 @@
+from database.catalogView import CatalogRow, SortedCatalogView, compactRows
+
+SORT_COLUMNS = {"a-z": ("title", False),
+                "z-a": ("title", True),
+                "popularity-high": ("critic_score", True),
+                "popularity-low": ("critic_score", False)}
+
+
+def makeView():
+  rows = [{"guid": 1, "title": "Bravo", "critic_score": 70},
+          {"guid": 2, "title": "Alpha", "critic_score": None},
+          {"guid": 3, "title": "Delta", "critic_score": 90},
+          {"guid": 4, "title": "Charlie", "critic_score": 70}]
+  return SortedCatalogView(rows, SORT_COLUMNS, idColumn="guid")
+
+
+def guids(rows):
+  return [row["guid"] for row in rows]
+
+
+def test_sort_orders():
+  view = makeView()
+  assert guids(view.sorted("a-z")) == [2, 1, 4, 3]
+  assert guids(view.sorted("z-a")) == [3, 4, 1, 2]
+  # NULLs sort first ascending, ties are broken on the id
+  assert guids(view.sorted("popularity-low")) == [2, 1, 4, 3]
+  assert guids(view.sorted("popularity-high")) == [3, 4, 1, 2]
+
+
+def test_paging():
+  view = makeView()
+  page = view.page("a-z", 2)
+  assert guids(page["rows"]) == [2, 1]
+  assert page["next"] == ("Bravo", 1)
+
+  page = view.page("a-z", 2, afterId=page["next"][1])
+  assert guids(page["rows"]) == [4, 3]
+  assert page["next"] is None
+
+
+def test_paging_after_unknown_id_starts_over():
+  view = makeView()
+  assert guids(view.page("z-a", 2, afterId=42)["rows"]) == [3, 4]
+
+
+def test_select():
+  view = makeView()
+  assert guids(view.select([3, 1, 42, 2], "a-z")) == [2, 1, 3]
+
+
+def test_compact_rows_share_lookup_values():
+  rows = compactRows([{"guid": 1, "service_name": "".join(["Net", "flix"])},
+                      {"guid": 2, "service_name": "".join(["Net", "flix"])}])
+  assert isinstance(rows[0], CatalogRow)
+  assert rows[0]["service_name"] is rows[1]["service_name"]
+  assert rows[0].get("title") is None
+  assert dict(rows[1])["guid"] == 2
@@ -0,0 +1,113 @@
+import gzip
+import zlib
+import pytest
+from flask import Flask, Response, stream_with_context
+from website import compression
+from website.compression import gzipStream, initCompression, minifyTemplate
+
+PAGE = "<p>" + "streamEasy " * 100 + "</p>"
+
+
+class FakeBrotli:
+  @staticmethod
+  def compress(body, quality):
+    return b"br:" + body
+
+
+@pytest.fixture
+def client():
+  app = Flask(__name__)
+  initCompression(app)
+
+  @app.route("/page")
+  def page():
+    response = Response(PAGE, mimetype="text/html")
+    response.set_etag("abc")
+    return response
+
+  @app.route("/small")
+  def small():
+    return Response("<p>hi</p>", mimetype="text/html")
+
+  @app.route("/stream")
+  def stream():
+    return Response(stream_with_context(iter(["<p>", "one", "</p>", ""])), mimetype="text/html")
+
+  return app.test_client()
+
+
+def test_gzip(client):
+  response = client.get("/page", headers={"Accept-Encoding": "gzip"})
+  assert response.headers["Content-Encoding"] == "gzip"
+  assert "Accept-Encoding" in response.headers["Vary"]
+  assert gzip.decompress(response.get_data()).decode() == PAGE
+  # the compressed bytes differ per encoding
+  assert response.headers["ETag"] == 'W/"abc"'
+
+
+def test_brotli_is_preferred(client, monkeypatch):
+  monkeypatch.setattr(compression, "brotli", FakeBrotli)
+  response = client.get("/page", headers={"Accept-Encoding": "gzip, br"})
+  assert response.headers["Content-Encoding"] == "br"
+  assert response.get_data() == b"br:" + PAGE.encode()
+
+
+def test_brotli_needs_the_module(client, monkeypatch):
+  monkeypatch.setattr(compression, "brotli", None)
+  response = client.get("/page", headers={"Accept-Encoding": "br"})
+  assert "Content-Encoding" not in response.headers
+  assert response.get_data(as_text=True) == PAGE
+
+
+def test_small_and_unaccepted_responses_are_sent_as_is(client):
+  response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+  assert "Content-Encoding" not in response.headers
+  response = client.get("/page")
+  assert "Content-Encoding" not in response.headers
+  assert response.headers["ETag"] == '"abc"'
+
+
+def test_streamed_gzip(client):
+  response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+  assert response.headers["Content-Encoding"] == "gzip"
+  assert "Content-Length" not in response.headers
+  assert gzip.decompress(response.get_data()) == b"<p>one</p>"
+
+
+def test_gzip_stream_flushes_every_chunk_and_closes_the_source():
+  closed = []
+  def chunks():
+    try:
+      yield "<p>"
+      yield b"one"
+    finally:
+      closed.append(True)
+
+  decompressor = zlib.decompressobj(31)
+  stream = gzipStream(chunks(), 6)
+  # each chunk can be decoded as soon as it arrives
+  assert decompressor.decompress(next(stream)) == b"<p>"
+  assert decompressor.decompress(next(stream)) == b"one"
+  stream.close()
+  assert closed == [True]
+
+
+def test_minify_template():
+  source = """
+    <div>
+      <!-- a comment -->
+      <!--[if IE]><p>old</p><![endif]-->
+      <p>{{ title }}</p>
+
+    </div>
+  """
+  assert minifyTemplate(source) == ("<div>\n<!--[if IE]><p>old</p><![endif]-->\n"
+                                    "<p>{{ title }}</p>\n</div>")
+
+
+def test_minifying_loader(tmp_path):
+  (tmp_path / "page.html").write_text("<ul>\n  <!-- items -->\n  <li>{{ item }}</li>\n</ul>\n")
+  app = Flask(__name__, template_folder=str(tmp_path))
+  initCompression(app)
+  with app.app_context():
+    assert app.jinja_env.get_template("page.html").render(item="one") == "<ul>\n<li>one</li>\n</ul>"
@@ -0,0 +1,146 @@
+import pymysql
+import pytest
+from database import dbHelpers
+from database.dbHelpers import ConnectionPool, PoolTimeoutError, getPool
+
+
+class FakeConnection:
+  def __init__(self, threadId):
+    self.threadId = threadId
+    self.open = True
+    self.rollbacks = 0
+    self.failRollback = False
+    self.reconnectAs = None
+
+  def thread_id(self):
+    return self.threadId
+
+  def ping(self, reconnect=False):
+    if self.reconnectAs is not None:
+      self.threadId, self.reconnectAs = self.reconnectAs, None
+
+  def rollback(self):
+    if self.failRollback:
+      raise ConnectionError("lost connection")
+    self.rollbacks += 1
+
+  def close(self):
+    self.open = False
+
+
+class FakePool(ConnectionPool):
+  def __init__(self, **kwargs):
+    super().__init__("localhost", "root", "password", **kwargs)
+    self.opened = []
+
+  def _connect(self):
+    connection = FakeConnection(len(self.opened) + 1)
+    self.opened.append(connection)
+    return connection
+
+
+def test_released_connection_is_reused():
+  pool = FakePool(maxSize=2)
+  first = pool.acquire()
+  first.close()
+  second = pool.acquire()
+  assert second._connection is first._connection
+  assert len(pool.opened) == 1
+  assert pool.stats()["in_use"] == 1
+
+
+def test_close_twice_releases_once():
+  pool = FakePool(maxSize=2)
+  pooled = pool.acquire()
+  pooled.close()
+  pooled.close()
+  assert pool.stats()["idle"] == 1
+
+
+def test_checkout_times_out_when_full():
+  pool = FakePool(maxSize=1, checkoutTimeout=0.05)
+  pool.acquire()
+  with pytest.raises(PoolTimeoutError):
+    pool.acquire()
+  stats = pool.stats()
+  assert stats["timeouts"] == 1
+  assert stats["waits"] == 1
+
+
+def test_release_rolls_back():
+  pool = FakePool(maxSize=1)
+  pooled = pool.acquire()
+  pooled.close()
+  assert pooled._connection.rollbacks == 1
+  assert pool.stats()["idle"] == 1
+
+
+def test_failed_rollback_discards_connection():
+  pool = FakePool(maxSize=1)
+  pooled = pool.acquire()
+  pooled._connection.failRollback = True
+  pooled.close()
+  assert not pooled._connection.open
+  stats = pool.stats()
+  assert stats["size"] == 0
+  assert stats["discarded"] == 1
+  assert pool.acquire()._connection is not pooled._connection
+
+
+def test_block_error_rolls_back():
+  pool = FakePool(maxSize=1)
+  with pytest.raises(ValueError):
+    with pool.connection() as pooled:
+      raise ValueError()
+  # once by __exit__, once by release()
+  assert pooled._connection.rollbacks == 2
+  assert pool.stats()["idle"] == 1
+
+
+def test_expired_connection_is_not_reused():
+  pool = FakePool(maxSize=1, maxLifetime=0)
+  pooled = pool.acquire()
+  pooled.close()
+  assert not pooled._connection.open
+  assert pool.acquire()._connection is not pooled._connection
+
+
+def test_reconnect_restarts_lifetime():
+  pool = FakePool(maxSize=1, pingInterval=0)
+  pooled = pool.acquire()
+  createdAt = pooled._createdAt
+  pooled.close()
+  pooled._connection.reconnectAs = 99
+  pooled = pool.acquire()
+  assert pooled._createdAt > createdAt
+
+
+def test_expired_connections_below_a_fresh_one_are_swept():
+  pool = FakePool(maxSize=2, maxIdleTime=60)
+  old, fresh = pool.acquire(), pool.acquire()
+  old.close()
+  fresh.close()
+  # the older connection sits below the fresh one in the LIFO deque
+  pool._idle[0] = (old._connection, pool._idle[0][1], pool._idle[0][2] - 120)
+  assert pool.acquire()._connection is fresh._connection
+  assert not old._connection.open
+  assert pool.stats()["discarded"] == 1
+
+
+def test_pools_are_registered_only_after_connecting(monkeypatch):
+  def connect(hostName, userName, userPassword):
+    if userPassword != "password":
+      raise pymysql.err.OperationalError(1045, "Access denied")
+    return FakeConnection(1)
+
+  monkeypatch.setattr(dbHelpers, "_POOLS", {})
+  monkeypatch.setattr(dbHelpers, "connectDatabase", connect)
+  for password in ("wrong", "also wrong"):
+    with pytest.raises(pymysql.err.OperationalError):
+      getPool("localhost", "root", password)
+  assert dbHelpers._POOLS == {}
+
+  pool = getPool("localhost", "root", "password")
+  assert getPool("localhost", "root", "password") is pool
+  assert list(dbHelpers._POOLS) == [("localhost", "root", "password")]
+  assert pool.stats()["idle"] == 1
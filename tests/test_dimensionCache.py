@@ -0,0 +1,79 @@
+from database.dimensionCache import DimensionCache
+
+SERVICES = [{"service_id": 1, "service_name": "Netflix",
+             "subscription_price": 15, "image": "Netflix-Logo.png"}]
+
+
+class FakeCursor:
+  """
+  Answers the version query and get_dimensions() from fixed data
+  """
+  def __init__(self, contentVersion, dimensionsVersion):
+    self.versions = {"content": contentVersion, "dimensions": dimensionsVersion}
+    self.loads = 0
+    self._results = []
+
+  def execute(self, query):
+    if query == "CALL get_catalog_versions()":
+      self._results = [[{"content_version": self.versions["content"],
+                         "dimensions_version": self.versions["dimensions"]}]]
+    elif query == "CALL get_dimensions()":
+      self.loads += 1
+      self._results = [[{"version": self.versions["dimensions"]}], SERVICES,
+                       [{"genre_id": 6, "genre_name": "Horror"}],
+                       [{"rating_id": 2, "rating_name": "PG-13"}]]
+
+  def fetchone(self):
+    return self._results[0][0]
+
+  def fetchall(self):
+    return self._results[0]
+
+  def nextset(self):
+    self._results.pop(0)
+
+
+def test_refresh_loads_only_on_version_change():
+  dimensions = DimensionCache()
+  cursor = FakeCursor(1, 1)
+  assert dimensions.needsCheck()
+  assert dimensions.refresh(cursor)
+  assert not dimensions.needsCheck()
+  assert dimensions.refresh(cursor) is False
+  assert cursor.loads == 1
+
+  cursor.versions["dimensions"] = 2
+  assert dimensions.refresh(cursor)
+  assert cursor.loads == 2
+  assert dimensions.version == 2
+
+
+def test_content_change_is_reported_without_reloading():
+  dimensions = DimensionCache()
+  cursor = FakeCursor(1, 1)
+  dimensions.refresh(cursor)
+  cursor.versions["content"] = 2
+  assert dimensions.refresh(cursor)
+  assert dimensions.contentVersion == 2
+  assert cursor.loads == 1
+
+
+def test_check_interval():
+  dimensions = DimensionCache(checkInterval=-1)
+  dimensions.refresh(FakeCursor(1, 1))
+  assert dimensions.needsCheck()
+
+
+def test_resolve():
+  dimensions = DimensionCache()
+  dimensions.refresh(FakeCursor(1, 1))
+  row = dimensions.resolve({"guid": 7, "service_id": 1, "service_type": "Movie",
+                            "title": "Zoombies", "genre": 6, "rating": 99,
+                            "run_time_minutes": 87, "num_seasons": None,
+                            "critic_score": 48, "description": ""})
+  assert row["service_name"] == "Netflix"
+  assert row["image"] == "Netflix-Logo.png"
+  assert row["genre_name"] == "Horror"
+  # unknown ids resolve to None rather than failing the whole view
+  assert row["rating_name"] is None
+  assert row["title"] == "Zoombies"
@@ -0,0 +1,59 @@
+import time
+from database.catalogView import SortedCatalogView
+from database.recommendations import RecommendationTable
+
+SORT_COLUMNS = {"popularity-high": ("critic_score", True)}
+
+
+def makeView(scores):
+  rows = [{"guid": guid, "service_name": serviceName, "service_type": serviceType,
+           "critic_score": score}
+          for guid, (serviceName, serviceType, score) in enumerate(scores, 1)]
+  return SortedCatalogView(rows, SORT_COLUMNS, idColumn="guid")
+
+
+VIEW = makeView([("Netflix", "Movie", 50),
+                 ("Netflix", "Movie", 90),
+                 ("Netflix", "Movie", 70),
+                 ("Netflix", "TV Show", 80),
+                 ("Hulu", "Movie", 60),
+                 ("Hulu", "TV Show", None)])
+
+
+def guids(rows):
+  return [row["guid"] for row in rows]
+
+
+def test_build_keeps_top_k():
+  table = RecommendationTable(topK=2)
+  table.build(VIEW)
+  assert guids(table._top[("Netflix", "Movie")]) == [2, 3]
+  assert table.source is VIEW
+
+
+def test_recommend_skips_favorites():
+  table = RecommendationTable()
+  table.refresh(VIEW)
+  assert guids(table.recommend(["Netflix"], frozenset())) == [2, 4, 3]
+  assert guids(table.recommend(["Netflix"], frozenset({2}))) == [4, 3, 1]
+  # services keep the user's order
+  assert guids(table.recommend(["Hulu", "Netflix"], frozenset(), perType=1)) == [5, 6, 2, 4]
+
+
+def test_top_k_limits_recommendations_after_favorites():
+  table = RecommendationTable(topK=2)
+  table.refresh(VIEW)
+  assert guids(table.recommend(["Netflix"], frozenset({2}))) == [4, 3]
+
+
+def test_refresh_rebuilds_in_the_background():
+  table = RecommendationTable()
+  assert table.refresh(VIEW)
+  assert not table.refresh(VIEW)
+
+  view = makeView([("Netflix", "Movie", 10)])
+  assert table.refresh(view)
+  deadline = time.monotonic() + 5
+  while table.source is not view and time.monotonic() < deadline:
+    time.sleep(0.01)
+  assert guids(table.recommend(["Netflix"], frozenset())) == [1]
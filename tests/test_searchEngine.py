@@ -0,0 +1,50 @@
+from database.searchEngine import TitleSearchIndex, normalizeTitle
+
+
+def makeIndex():
+  return TitleSearchIndex([
+    {"guid": 1, "title": "The Office", "service_type": "TV Show", "critic_score": 80},
+    {"guid": 2, "title": "Office Space", "service_type": "Movie", "critic_score": 70},
+    {"guid": 3, "title": "Offices", "service_type": "Movie", "critic_score": 90},
+    {"guid": 4, "title": "Pokémon", "service_type": "TV Show", "critic_score": 60},
+    {"guid": 5, "title": "Zoombies", "service_type": "Movie", "critic_score": 48},
+    {"guid": 6, "title": "Spac", "service_type": "Movie", "critic_score": 99},
+    {"guid": 7, "title": "Zoombies", "service_type": "TV Show", "critic_score": 75}])
+
+
+def guids(rows):
+  return [row["guid"] for row in rows]
+
+
+def test_normalize_title():
+  assert normalizeTitle("  Pokémon: The FIRST Movie!! ") == "pokemon the first movie"
+
+
+def test_ranked_by_similarity():
+  assert guids(makeIndex().search("office")) == [3, 2, 1]
+
+
+def test_containing_the_keyword_ranks_first():
+  # "Spac" shares more of its trigrams with the keyword, but does not contain it
+  assert guids(makeIndex().search("space")) == [2, 6]
+
+
+def test_ties_ranked_by_critic_score():
+  assert guids(makeIndex().search("zoombies")) == [7, 5]
+
+
+def test_typos_and_accents():
+  index = makeIndex()
+  assert guids(index.search("zoombeis")) == [7, 5]
+  assert guids(index.search("pokemon")) == [4]
+
+
+def test_service_type_filter_and_limit():
+  index = makeIndex()
+  assert guids(index.search("office", service_type="Movie")) == [3, 2]
+  assert guids(index.search("office", service_type="TV Show")) == [1]
+  assert guids(index.search("office", limit=1)) == [3]
+
+
+def test_empty_keyword_returns_everything():
+  assert guids(makeIndex().search("", service_type="Movie")) == [2, 3, 5, 6]
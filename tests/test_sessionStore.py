@@ -0,0 +1,98 @@
+import pickle
+import pytest
+from flask import Flask, session
+from database.sharedStore import SQLiteStore
+from website.sessionStore import SESSION_KEY_PREFIX, LazySession, StoreSessionInterface
+
+
+class CountingStore(SQLiteStore):
+  def __init__(self, path):
+    super().__init__(path)
+    self.reads = 0
+
+  def get(self, key):
+    self.reads += 1
+    return super().get(key)
+
+
+@pytest.fixture
+def store(tmp_path):
+  return CountingStore(str(tmp_path / "sessions.db"))
+
+
+@pytest.fixture
+def client(store):
+  app = Flask(__name__)
+  app.secret_key = "test"
+  app.session_interface = StoreSessionInterface(store)
+
+  @app.route("/login")
+  def login():
+    session["user_id"] = "alice"
+    return "ok"
+
+  @app.route("/whoami")
+  def whoami():
+    return session.get("user_id", "nobody")
+
+  @app.route("/logout")
+  def logout():
+    session.clear()
+    return "ok"
+
+  @app.route("/static-page")
+  def staticPage():
+    return "no session"
+
+  return app.test_client()
+
+
+def test_session_round_trip(client, store):
+  response = client.get("/login")
+  assert "session=" in response.headers["Set-Cookie"]
+  assert client.get("/whoami").get_data(as_text=True) == "alice"
+  # reading the session does not write it back or reissue the cookie
+  assert "Set-Cookie" not in client.get("/whoami").headers
+
+
+def test_untouched_session_is_not_read(client, store):
+  client.get("/login")
+  reads = store.reads
+  response = client.get("/static-page")
+  assert store.reads == reads
+  assert "Cookie" not in response.headers.get("Vary", "")
+
+
+def test_cleared_session_is_deleted(client, store):
+  client.get("/login")
+  keys = [key for key, in store._connect().execute("SELECT key FROM store")]
+  assert len(keys) == 1 and keys[0].startswith(SESSION_KEY_PREFIX)
+
+  client.get("/logout")
+  assert store.get(keys[0]) is None
+  assert client.get("/whoami").get_data(as_text=True) == "nobody"
+
+
+def test_forged_cookie_starts_a_new_session(client, store):
+  client.get("/login")
+  client.set_cookie("session", "forged.cookie")
+  assert client.get("/whoami").get_data(as_text=True) == "nobody"
+
+
+def test_lazy_session_loads_once(store):
+  store.set(SESSION_KEY_PREFIX + "sid", pickle.dumps({"a": 1}))
+  lazy = LazySession(store, "sid", new=False)
+  assert not lazy.loaded and store.reads == 0
+  assert lazy["a"] == 1 and lazy.get("a") == 1
+  assert store.reads == 1
+  assert not lazy.modified
+  lazy.setdefault("a", 2)
+  assert not lazy.modified
+  lazy.pop("a")
+  assert lazy.modified
+
+
+def test_unknown_session_id_is_new(store):
+  lazy = LazySession(store, "missing", new=False)
+  assert not lazy
+  assert lazy.new
@@ -0,0 +1,99 @@
+import pytest
+from database import sharedStore
+from database.sharedStore import RedisStore, SQLiteStore, createStore
+
+
+class FakeRedisClient:
+  """
+  The few Redis commands RedisStore uses, kept in a dictionary
+  """
+  def __init__(self, url):
+    self.url = url
+    self.values = {}
+    self.ttls = {}
+
+  def get(self, key):
+    return self.values.get(key)
+
+  def set(self, key, value, ex=None):
+    self.values[key] = value
+    self.ttls[key] = ex
+
+  def delete(self, key):
+    self.values.pop(key, None)
+
+  def incr(self, key):
+    self.values[key] = str(int(self.values.get(key, 0)) + 1).encode()
+    return int(self.values[key])
+
+
+class FakeRedis:
+  class Redis:
+    from_url = FakeRedisClient
+
+
+def storedKeys(store):
+  return [row[0] for row in store._connect().execute("SELECT key FROM store ORDER BY key")]
+
+
+def test_get_set_delete(tmp_path):
+  store = SQLiteStore(str(tmp_path / "store.db"))
+  store.set("a", b"1")
+  assert store.get("a") == b"1"
+  store.set("a", b"2")
+  assert store.get("a") == b"2"
+  store.delete("a")
+  assert store.get("a") is None
+
+
+def test_expired_values_are_not_returned(tmp_path):
+  store = SQLiteStore(str(tmp_path / "store.db"), purgeRate=0)
+  store.set("old", b"1", ttl=-1)
+  assert store.get("old") is None
+  assert storedKeys(store) == ["old"]
+
+
+def test_purge_expired(tmp_path):
+  store = SQLiteStore(str(tmp_path / "store.db"), purgeRate=0)
+  store.set("old", b"1", ttl=-1)
+  store.set("new", b"2")
+  assert store.purgeExpired() == 1
+  assert storedKeys(store) == ["new"]
+
+
+def test_writes_purge_expired_values(tmp_path):
+  store = SQLiteStore(str(tmp_path / "store.db"), purgeRate=0)
+  store.set("old", b"1", ttl=-1)
+  store.purgeRate = 1
+  store.set("new", b"2")
+  assert storedKeys(store) == ["new"]
+
+
+def test_incr(tmp_path):
+  store = SQLiteStore(str(tmp_path / "store.db"))
+  assert store.incr("counter") == 1
+  assert store.incr("counter") == 2
+  assert store.get("counter") == b"2"
+
+
+def test_redis_store(monkeypatch):
+  monkeypatch.setattr(sharedStore, "redis", FakeRedis)
+  store = createStore("redis", redisUrl="redis://cache:6379/0", defaultTtl=60)
+  assert isinstance(store, RedisStore)
+  assert store.client.url == "redis://cache:6379/0"
+
+  store.set("a", b"1")
+  store.set("b", b"2", ttl=5.5)
+  assert store.get("a") == b"1"
+  assert store.client.ttls == {"streamEasy:a": 60, "streamEasy:b": 5}
+  store.delete("a")
+  assert store.get("a") is None
+  assert store.incr("counter") == 1
+  assert store.incr("counter") == 2
+  assert store.purgeExpired() == 0
+
+
+def test_redis_store_needs_the_package(monkeypatch):
+  monkeypatch.setattr(sharedStore, "redis", None)
+  with pytest.raises(RuntimeError):
+    RedisStore("redis://localhost:6379/0")
@@ -0,0 +1,68 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from database.similarity import ContentFeatures, removeOldFeatures
+
+
+def contentRow(guid, serviceId, serviceType, genre, rating, criticScore):
+  return {"guid": guid, "service_id": serviceId, "service_type": serviceType,
+          "genre": genre, "rating": rating, "release_year": 2020,
+          "run_time_minutes": 90 if serviceType == "Movie" else None,
+          "num_seasons": 2 if serviceType == "TV Show" else None,
+          "critic_score": criticScore}
+
+
+ROWS = [contentRow(1, 1, "Movie", 6, 2, 50),     # horror movies
+        contentRow(2, 1, "Movie", 6, 2, 55),
+        contentRow(3, 2, "Movie", 6, 2, 52),
+        contentRow(4, 1, "Movie", 9, 5, 90),     # a comedy
+        contentRow(5, 1, "TV Show", 6, 2, 50),
+        contentRow(6, 2, "TV Show", 9, 5, 80)]
+
+
+def makeFeatures():
+  return ContentFeatures.fromRows(1, ROWS)
+
+
+def test_vectors_are_unit_length():
+  features = makeFeatures()
+  assert np.allclose(np.linalg.norm(features.matrix, axis=1), 1.0)
+
+
+def test_top_k():
+  features = makeFeatures()
+  top = features.topK([{1}, {4, 6}, set(), {42}], 2)
+  assert top[0] == [3, 2]   # 3 has the closer critic score
+  assert 4 not in top[1] and 6 not in top[1] and len(top[1]) == 2
+  # no favorites, or none the features know of: nothing to recommend
+  assert top[2] == [] and top[3] == []
+
+
+def test_top_k_skips_favorites():
+  assert makeFeatures().topK([{1, 2, 3, 4, 5}], 3) == [[6]]
+
+
+def test_recommend_by_service():
+  features = makeFeatures()
+  picks = features.recommendByService([{1}], [[2, 1]], perType=1)
+  assert picks == [[3, 6, 2, 5]]
+
+
+def test_save_and_load(tmp_path):
+  features = makeFeatures()
+  path = str(tmp_path / "localhost-content-v1")
+  features.save(path)
+  loaded = ContentFeatures.load(1, path)
+  assert np.array_equal(loaded.guids, features.guids)
+  assert np.array_equal(loaded.matrix, features.matrix)
+  assert loaded.topK([{1}], 2) == features.topK([{1}], 2)
+  assert ContentFeatures.load(2, str(tmp_path / "localhost-content-v2")) is None
+
+
+def test_remove_old_features(tmp_path):
+  for name in ("localhost-content-v1", "localhost-content-v2", "otherhost-content-v1"):
+    (tmp_path / name).mkdir()
+  removeOldFeatures(str(tmp_path), "localhost", 2)
+  assert sorted(path.name for path in tmp_path.iterdir()) == ["localhost-content-v2",
+                                                              "otherhost-content-v1"]
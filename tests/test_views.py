@@ -0,0 +1,173 @@
+import pymysql
+import pytest
+from database.catalogSnapshot import SnapshotCache
+from database.catalogView import SortedCatalogView, compactRows
+from database.recommendations import RecommendationTable
+
+
+def contentView(views, count):
+  rows = [{"guid": guid, "service_name": "Netflix", "subscription_price": 15,
+           "service_type": "Movie", "image": "Netflix-Logo.png", "title": "Movie %d" % guid,
+           "genre_name": "Horror", "run_time_minutes": 90, "num_seasons": None,
+           "rating_name": "PG-13", "critic_score": guid, "description": ""}
+          for guid in range(1, count + 1)]
+  return SortedCatalogView(compactRows(rows), views.CONTENT_SORT_COLUMNS, idColumn="guid")
+
+
+def test_library_pages(client, views, monkeypatch):
+  view = contentView(views, views.EXPLORE_PAGE_SIZE + 10)
+  monkeypatch.setattr(views, "getCatalogView", lambda name: view)
+  monkeypatch.setattr(views, "catalogVersion", lambda: (1, 1, 1))
+
+  page = client.get("/views/explore?option=all_movies").get_data(as_text=True)
+  assert page.count("Favorite!") == views.EXPLORE_PAGE_SIZE
+  # popularity-high is the default order: the last row on page one has score 11
+  assert "after_id=11" in page
+  assert "First Page" not in page
+
+  page = client.get("/views/explore?option=all_movies&after_id=11").get_data(as_text=True)
+  assert page.count("Favorite!") == 10
+  assert "Next Page" not in page
+  assert "First Page" in page
+
+
+def test_search_results_have_no_page_links(client, views, monkeypatch):
+  view = contentView(views, 3)
+  monkeypatch.setattr(views, "searchCatalog", lambda serviceType, keyword: view.rows)
+
+  page = client.post("/views/explore", data={"movie_search": "movie"}).get_data(as_text=True)
+  assert page.count("Favorite!") == 3
+  for link in ("First Page", "Next Page", "Show All"):
+    assert link not in page
+
+
+def test_search_falls_back_to_full_text(client, views, monkeypatch):
+  view = contentView(views, 3)
+  monkeypatch.setattr(views, "getCatalogViews", lambda *names: (view, contentView(views, 0)))
+  queries = []
+  def runQuery(queryHelper, *args):
+    queries.append((queryHelper, args))
+    return [view.rows[0]]
+  monkeypatch.setattr(views, "runQuery", runQuery)
+
+  page = client.post("/views/explore", data={"movie_search": "movie 2"}).get_data(as_text=True)
+  assert page.count("Favorite!") == 3
+  assert queries == []
+
+  # no title matches, so the description is searched in the database
+  page = client.post("/views/explore", data={"movie_search": " heist "}).get_data(as_text=True)
+  assert page.count("Favorite!") == 1
+  assert queries == [(views.get_movie_search, ("heist", views.SEARCH_RESULT_LIMIT))]
+
+
+def test_unchanged_page_is_not_modified(client, views, monkeypatch):
+  view = contentView(views, 3)
+  monkeypatch.setattr(views, "getContentView", lambda: view)
+  monkeypatch.setattr(views, "getFavoriteIds", lambda username: frozenset({1, 2}))
+  monkeypatch.setattr(views, "catalogVersion", lambda: (1, 1, 1))
+
+  response = client.get("/views/explore")
+  etag = response.headers["ETag"]
+  assert response.status_code == 200
+  assert response.headers["Cache-Control"] == "private, no-cache"
+
+  response = client.get("/views/explore", headers={"If-None-Match": etag})
+  assert response.status_code == 304
+
+  views.dataVersions.bump(("localhost", "favorites", "alice"))
+  response = client.get("/views/explore", headers={"If-None-Match": etag})
+  assert response.status_code == 200
+  assert response.headers["ETag"] != etag
+
+
+def test_no_etag_without_a_shared_store(client, views, monkeypatch):
+  view = contentView(views, 3)
+  monkeypatch.setattr(views, "getContentView", lambda: view)
+  monkeypatch.setattr(views, "getFavoriteIds", lambda username: frozenset({1}))
+  monkeypatch.setattr(views, "catalogVersion", lambda: (1, 1, 1))
+  views.dataVersions.useStore(None)
+
+  response = client.get("/views/explore")
+  assert response.status_code == 200
+  assert "ETag" not in response.headers
+
+
+def recommendationSetup(views, monkeypatch, similar):
+  view = contentView(views, 4)
+  calls = []
+  def recommendSimilar(userServices, favoriteIds):
+    calls.append(favoriteIds)
+    return similar()
+  monkeypatch.setattr(views, "getContentView", lambda: view)
+  monkeypatch.setattr(views, "recommendSimilar", recommendSimilar)
+  monkeypatch.setattr(views, "similarityAvailable", lambda: True)
+  monkeypatch.setattr(views, "getRecommendationTable",
+                      lambda hostName: RecommendationTable())
+  return view, calls
+
+
+def test_similar_recommendations_are_opt_in(app, views, monkeypatch):
+  view, calls = recommendationSetup(views, monkeypatch, lambda: [view.rows[3]])
+  services = [{"service_name": "Netflix"}]
+  with app.test_request_context():
+    # the top K table by critic score, skipping the favorite
+    assert [row["guid"] for row in views.recommendContent(services, frozenset({4}))] == [3, 2]
+    assert calls == []
+
+    app.config["SIMILAR_RECOMMENDATIONS"] = True
+    assert [row["guid"] for row in views.recommendContent(services, frozenset({1}))] == [4]
+    assert calls == [frozenset({1})]
+
+
+def test_similar_recommendation_failures_fall_back(app, views, monkeypatch):
+  def unwritable():
+    raise PermissionError("feature_cache")
+  recommendationSetup(views, monkeypatch, unwritable)
+  app.config["SIMILAR_RECOMMENDATIONS"] = True
+  with app.test_request_context():
+    recs = views.recommendContent([{"service_name": "Netflix"}], frozenset({1}))
+  assert [row["guid"] for row in recs] == [4, 3]
+
+
+def test_features_are_kept_in_memory_when_they_cannot_be_saved(app, views, tmp_path):
+  pytest.importorskip("numpy")
+  class FakeCursor:
+    def execute(self, query):
+      self.results = ([[{"content_version": 3}]] if query == "CALL get_catalog_versions()" else
+                      [[{"version": 3}], [{"guid": 1, "service_id": 1, "service_type": "Movie",
+                                           "genre": 6, "rating": 2, "release_year": 2020,
+                                           "run_time_minutes": 90, "num_seasons": None,
+                                           "critic_score": 50}]])
+    def fetchone(self):
+      return self.results[0][0]
+    def fetchall(self):
+      return self.results[0]
+    def nextset(self):
+      self.results.pop(0)
+
+  unwritable = tmp_path / "feature_cache"
+  unwritable.write_text("not a directory")
+  with app.test_request_context():
+    features = views.loadContentFeatures(FakeCursor(), str(unwritable))
+  assert list(features.guids) == [1]
+
+
+
+def test_failed_snapshot_check_is_not_retried_on_every_request(app, views, tmp_path, monkeypatch):
+  class DownCursor:
+    def execute(self, query):
+      raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+
+  snapshots = SnapshotCache(str(tmp_path / "localhost.catalog"))
+  monkeypatch.setattr(views, "getSnapshotCache", lambda hostName, directory: snapshots)
+  checks = []
+  def runQuery(queryHelper, *args):
+    checks.append(queryHelper)
+    return queryHelper(DownCursor(), *args)
+  monkeypatch.setattr(views, "runQuery", runQuery)
+
+  app.config["CATALOG_SNAPSHOT_DIR"] = str(tmp_path)
+  with app.test_request_context():
+    assert views.getCatalogSnapshot() is None
+    assert views.getCatalogSnapshot() is None
+  assert len(checks) == 1
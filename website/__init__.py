@@ -1,7 +1,13 @@
+import os
 from flask import Flask
-from flask_session import Session
 from .views import views
 from .auth import auth
+from database.dbHelpers import releaseConnections
+from database.cacheHelpers import dataVersions
+from .compression import initCompression
+from .sessionStore import initSessions
+
+STATIC_IMAGE_MAX_AGE = 86400  # seconds browsers may reuse a service logo
 
 
 def create_app():
@@ -10,18 +16,53 @@ def create_app():
   Register blueprints (views / auth)
   Return: A Flask Application
   """
-  # Create the app and a session
+  # Create the app
   app = Flask(__name__)
-  cookies = Session()
 
   # Configure the app
   app.config["SECRET_KEY"] = "dsflkjhawl1435kfdgdf234556543gdhfg"
   app.config["SESSION_PERMANENT"] = False
+
+  # Session backend: "sqlite" (shared by the workers on this host),
+  # "redis" (shared across hosts) or "filesystem" (Flask-Session)
+  app.config["SESSION_BACKEND"] = os.environ.get("STREAMEASY_SESSION_BACKEND", "sqlite")
+  app.config["SESSION_SQLITE_PATH"] = os.environ.get("STREAMEASY_SESSION_DB",
+                                                     os.path.join(os.getcwd(), "flask_session", "sessions.db"))
+  app.config["SESSION_REDIS_URL"] = os.environ.get("STREAMEASY_REDIS_URL", "redis://localhost:6379/0")
   app.config["SESSION_TYPE"] = "filesystem"
-  app.config['SESSION_FILE_THRESHOLD'] = 10
+  app.config['SESSION_FILE_THRESHOLD'] = 500
+
+  # Memory-mapped catalog snapshots, exported once per content version
+  # and read by every worker instead of querying the catalog (each worker
+  # still builds its own catalog views from it). Set to an empty string
+  # to always read the catalog from the database
+  app.config["CATALOG_SNAPSHOT_DIR"] = os.environ.get("STREAMEASY_SNAPSHOT_DIR",
+                                                      os.path.join(os.getcwd(), "catalog_cache"))
+
+  # Rank recommendations by similarity to the user's favorites instead
+  # of by critic score alone (needs NumPy). The recommender's feature
+  # matrices are saved to FEATURE_CACHE_DIR and memory-mapped by every
+  # worker on this host
+  app.config["SIMILAR_RECOMMENDATIONS"] = os.environ.get("STREAMEASY_SIMILAR_RECOMMENDATIONS", "0") == "1"
+  app.config["FEATURE_CACHE_DIR"] = os.environ.get("STREAMEASY_FEATURE_DIR",
+                                                   os.path.join(os.getcwd(), "feature_cache"))
+
+  # Static files are only the service logos - let browsers keep them
+  app.config["SEND_FILE_MAX_AGE_DEFAULT"] = STATIC_IMAGE_MAX_AGE
+
+  # Compress pages of at least COMPRESS_MIN_SIZE bytes (gzip, or brotli
+  # when installed) and serve whitespace-minified templates
+  app.config["COMPRESS_MIN_SIZE"] = 500
+  app.config["COMPRESS_LEVEL"] = 6
+  initCompression(app)
+
+  # Initialize Session - a shared store also keeps the data versions
+  # behind per-user caches in step across workers
+  store = initSessions(app)
+  dataVersions.useStore(store)
 
-  # Initialize Session
-  cookies.init_app(app)
+  # Return pooled database connections at the end of every request
+  app.teardown_appcontext(releaseConnections)
   
   # Register Blueprints
   app.register_blueprint(views, url_prefix="/views")
@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for, session
-from database.dbHelpers import connectDatabase, getConnection
+from database.dbHelpers import pooledConnection, getConnection
+from database.dimensionCache import getDimensionCache
 import pymysql
 
 #=====================================#
@@ -95,14 +96,24 @@ def home():
     - If successful, proceed to login
     """
     try:
-      connection = connectDatabase(session.get("hostName"),
-                                   session.get("userName"),
-                                   session.get("userPassword"))
+      # Checking out a pooled connection validates the credentials and
+      # leaves a warm connection in the pool for the next request.
+      # The lookup tables are loaded on it (first connection only) so
+      # catalog pages can resolve service, genre and rating ids without
+      # joins. Later version checks go through views.getDimensions(),
+      # which also drops the views built from older tables.
+      with pooledConnection(session.get("hostName"),
+                            session.get("userName"),
+                            session.get("userPassword")) as connection:
+        dimensions = getDimensionCache(session.get("hostName"))
+        if dimensions.version is None:
+          with connection.cursor() as cursor:
+            dimensions.refresh(cursor)
+        connection.commit()
 
-      # Successful connection -- Close Cursor and Redirect to Login
+      # Successful connection -- Return it to the Pool and Redirect to Login
       flash("Database connection was successful!", category="sucess")
       session["db_connected"] = True
-      connection.close()
       return redirect(url_for("auth.login"))  # Route to login
 
     except pymysql.err.OperationalError:
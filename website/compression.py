@@ -0,0 +1,172 @@
+import gzip
+import os
+import re
+import zlib
+from flask import request
+from jinja2 import FileSystemLoader
+
+try:
+  import brotli   # optional - "pip install brotli" to enable
+except ImportError:
+  brotli = None
+
+# Compression Settings (overridable in app.config)
+COMPRESS_MIN_SIZE = 500        # bytes below which a response is sent as is
+COMPRESS_LEVEL = 6             # gzip level (1 fastest - 9 smallest)
+COMPRESS_BROTLI_QUALITY = 5    # brotli quality (0 fastest - 11 smallest)
+COMPRESS_MIMETYPES = ("text/html", "text/css", "text/plain",
+                      "application/json", "application/javascript")
+
+# HTML comments, except IE conditional comments
+HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+
+
+#=============================#
+#=== Template Minification ===#
+#=============================#
+def minifyTemplate(source):
+  """
+  Whitespace-minify a Jinja / HTML template: HTML comments are removed,
+  every line is stripped of its indentation and blank lines are dropped.
+  Line breaks are kept, so whitespace between words and tags still renders
+  the same.
+  Parameters:
+    source (string) : the template source
+  Return: the minified template source
+  """
+  source = HTML_COMMENT.sub("", source)
+  return "\n".join(line.strip() for line in source.splitlines() if line.strip())
+
+
+class MinifyingLoader(FileSystemLoader):
+  """
+  A template loader that minifies each template as it is loaded. Jinja
+  compiles and caches the result, so the work is done once per template
+  per process, at first use.
+  """
+  def get_source(self, environment, template):
+    source, filename, uptodate = super().get_source(environment, template)
+    return minifyTemplate(source), filename, uptodate
+
+
+#============================#
+#=== Response Compression ===#
+#============================#
+def chooseEncoding(acceptEncoding):
+  """
+  Pick the best content coding the client accepts
+  Parameters:
+    acceptEncoding: the request's parsed Accept-Encoding header
+  Return: "br", "gzip" or None
+  """
+  if brotli is not None and acceptEncoding["br"]:
+    return "br"
+  if acceptEncoding["gzip"]:
+    return "gzip"
+  return None
+
+
+def gzipStream(chunks, level):
+  """
+  Gzip a streamed response body chunk by chunk. Each chunk is flushed
+  (Z_SYNC_FLUSH) so the client can render it before the stream ends.
+  Parameters:
+    chunks: the response's iterable of str / bytes chunks
+    level: the gzip level (1 fastest - 9 smallest)
+  Return: yields gzip-encoded bytes
+  """
+  compressor = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31: gzip header
+  try:
+    for chunk in chunks:
+      if isinstance(chunk, str):
+        chunk = chunk.encode("utf-8")
+      if chunk:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+  finally:
+    # Let the wrapped generator clean up (e.g. release its connection)
+    close = getattr(chunks, "close", None)
+    if close is not None:
+      close()
+
+
+def compressStreamedResponse(response, config):
+  """
+  Gzip a streamed response as it is sent, if the client accepts gzip.
+  Streams are never buffered, so the size threshold does not apply and
+  brotli (which has no incremental flush here) is not used.
+  Parameters:
+    response: a streamed Flask response
+    config: the app's config (for the COMPRESS_* settings)
+  Return: the (possibly compressed) response
+  """
+  response.vary.add("Accept-Encoding")
+  if not request.accept_encodings["gzip"]:
+    return response
+
+  response.response = gzipStream(response.response,
+                                 config.get("COMPRESS_LEVEL", COMPRESS_LEVEL))
+  response.headers["Content-Encoding"] = "gzip"
+  response.headers.pop("Content-Length", None)
+  return response
+
+
+def compressResponse(response, config):
+  """
+  Compress a response body in place if the client accepts it and it is
+  worth compressing
+  Parameters:
+    response: a Flask response
+    config: the app's config (for the COMPRESS_* settings)
+  Return: the (possibly compressed) response
+  """
+  if (response.status_code != 200 or
+      response.direct_passthrough or
+      "Content-Encoding" in response.headers or
+      response.mimetype not in config.get("COMPRESS_MIMETYPES", COMPRESS_MIMETYPES)):
+    return response
+
+  if response.is_streamed:
+    return compressStreamedResponse(response, config)
+
+  response.vary.add("Accept-Encoding")
+  encoding = chooseEncoding(request.accept_encodings)
+  if encoding is None:
+    return response
+
+  body = response.get_data()
+  if len(body) < config.get("COMPRESS_MIN_SIZE", COMPRESS_MIN_SIZE):
+    return response
+
+  if encoding == "br":
+    body = brotli.compress(body, quality=config.get("COMPRESS_BROTLI_QUALITY",
+                                                    COMPRESS_BROTLI_QUALITY))
+  else:
+    body = gzip.compress(body, compresslevel=config.get("COMPRESS_LEVEL",
+                                                        COMPRESS_LEVEL))
+
+  response.set_data(body)
+  response.headers["Content-Encoding"] = encoding
+
+  # The bytes now differ per encoding, so a strong ETag would be wrong
+  etag, weak = response.get_etag()
+  if etag and not weak:
+    response.set_etag(etag, weak=True)
+
+  return response
+
+
+def initCompression(app):
+  """
+  Enable template minification and response compression for an app.
+  Must be called before the app's first template is rendered.
+  Parameters:
+    app: the Flask application
+  """
+  app.jinja_loader = MinifyingLoader(os.path.join(app.root_path, app.template_folder))
+  app.jinja_env.trim_blocks = True
+  app.jinja_env.lstrip_blocks = True
+
+  @app.after_request
+  def compress(response):
+    return compressResponse(response, app.config)
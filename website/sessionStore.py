@@ -0,0 +1,199 @@
+import os
+import pickle
+import secrets
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from database.sharedStore import createStore
+
+SESSION_KEY_PREFIX = "session:"
+
+
+class LazySession(dict, SessionMixin):
+  """
+  A server-side session that is only read from the store the first time
+  a request looks at it. A request that never touches the session costs
+  no store round trip, and is not written back.
+  """
+  def __init__(self, store, sid, new):
+    super().__init__()
+    self.store = store
+    self.sid = sid
+    self.new = new
+    self.loaded = False
+    self.modified = False
+    self.accessed = False
+
+  def _load(self):
+    """
+    Read the session's data on first access
+    """
+    if self.loaded:
+      return
+    self.loaded = True
+    self.accessed = True
+    if not self.new:
+      data = self.store.get(SESSION_KEY_PREFIX + self.sid)
+      if data is not None:
+        dict.update(self, pickle.loads(data))
+      else:
+        self.new = True   # expired or unknown id
+
+  # Reads
+  def __getitem__(self, key):
+    self._load()
+    return super().__getitem__(key)
+
+  def __contains__(self, key):
+    self._load()
+    return super().__contains__(key)
+
+  def __iter__(self):
+    self._load()
+    return super().__iter__()
+
+  def __len__(self):
+    self._load()
+    return super().__len__()
+
+  def __bool__(self):
+    self._load()
+    return super().__len__() > 0
+
+  def get(self, key, default=None):
+    self._load()
+    return super().get(key, default)
+
+  def keys(self):
+    self._load()
+    return super().keys()
+
+  def values(self):
+    self._load()
+    return super().values()
+
+  def items(self):
+    self._load()
+    return super().items()
+
+  def copy(self):
+    self._load()
+    return dict(self)
+
+  # Writes
+  def __setitem__(self, key, value):
+    self._load()
+    super().__setitem__(key, value)
+    self.modified = True
+
+  def __delitem__(self, key):
+    self._load()
+    super().__delitem__(key)
+    self.modified = True
+
+  def setdefault(self, key, default=None):
+    self._load()
+    if key not in self:
+      self.modified = True
+    return super().setdefault(key, default)
+
+  def pop(self, key, *default):
+    self._load()
+    self.modified = True
+    return super().pop(key, *default)
+
+  def popitem(self):
+    self._load()
+    self.modified = True
+    return super().popitem()
+
+  def update(self, *args, **kwargs):
+    self._load()
+    super().update(*args, **kwargs)
+    self.modified = True
+
+  def clear(self):
+    self._load()
+    super().clear()
+    self.modified = True
+
+
+class StoreSessionInterface(SessionInterface):
+  """
+  Keep session data in a shared store (see database/sharedStore.py).
+  The cookie only carries a signed, random session id.
+  """
+  def __init__(self, store):
+    self.store = store
+
+  def _signer(self, app):
+    return Signer(app.secret_key, salt="streamEasy-session")
+
+  def open_session(self, app, request):
+    cookie = request.cookies.get(self.get_cookie_name(app))
+    if cookie:
+      try:
+        sid = self._signer(app).unsign(cookie).decode()
+        return LazySession(self.store, sid, new=False)
+      except BadSignature:
+        pass
+    return LazySession(self.store, secrets.token_urlsafe(32), new=True)
+
+  def save_session(self, app, session, response):
+    # Never touched: nothing to read back, nothing to write
+    if not session.loaded:
+      return
+
+    name = self.get_cookie_name(app)
+    domain = self.get_cookie_domain(app)
+    path = self.get_cookie_path(app)
+    response.vary.add("Cookie")
+
+    if not session:
+      if session.modified:
+        self.store.delete(SESSION_KEY_PREFIX + session.sid)
+        response.delete_cookie(name, domain=domain, path=path)
+      return
+
+    if not session.modified:
+      return
+
+    lifetime = app.permanent_session_lifetime.total_seconds()
+    self.store.set(SESSION_KEY_PREFIX + session.sid,
+                   pickle.dumps(dict(session), pickle.HIGHEST_PROTOCOL),
+                   ttl=lifetime)
+    if session.new:
+      response.set_cookie(name,
+                          self._signer(app).sign(session.sid).decode(),
+                          expires=self.get_expiration_time(app, session),
+                          httponly=self.get_cookie_httponly(app),
+                          domain=domain,
+                          path=path,
+                          secure=self.get_cookie_secure(app),
+                          samesite=self.get_cookie_samesite(app))
+
+
+def initSessions(app):
+  """
+  Set up the app's sessions from SESSION_BACKEND:
+    "filesystem" - Flask-Session files (one process / host only)
+    "sqlite"     - a WAL-mode SQLite file shared by the workers on a host
+    "redis"      - a Redis server shared by every worker on every host
+  The sqlite / redis store is returned so it can also hold other data
+  shared between workers.
+  Parameters:
+    app: the Flask application
+  Return: the shared store, or None for the filesystem backend
+  """
+  backend = app.config.get("SESSION_BACKEND", "filesystem")
+  if backend == "filesystem":
+    from flask_session import Session
+    Session().init_app(app)
+    return None
+
+  store = createStore(backend,
+                      sqlitePath=app.config.get("SESSION_SQLITE_PATH",
+                                                os.path.join(os.getcwd(), "flask_session", "sessions.db")),
+                      redisUrl=app.config.get("SESSION_REDIS_URL", "redis://localhost:6379/0"),
+                      defaultTtl=int(app.permanent_session_lifetime.total_seconds()))
+  app.session_interface = StoreSessionInterface(store)
+  return store
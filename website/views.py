@@ -1,12 +1,42 @@
 from flask import Blueprint, render_template, request, redirect, session, flash, url_for
-from database.dbHelpers import getConnection
+from flask import Response, current_app, stream_with_context, g
+from database.dbHelpers import getConnection, pooledConnection, runParallelQueries, streamRows
+from database.cacheHelpers import catalogCache, favoritesCache, dataVersions
+from database.searchEngine import TitleSearchIndex
+from database.catalogView import SortedCatalogView, compactRows
+from database.dimensionCache import getDimensionCache
+from database.catalogSnapshot import getSnapshotCache
+from database.recommendations import getRecommendationTable
+from database.similarity import ContentFeatures, removeOldFeatures, similarityAvailable
 import pymysql
 from datetime import datetime
 import calendar
+import hashlib
+import itertools
+import os
+import re
 import time
 
 FILTER_TYPES = ["a-z", "z-a", "price-high", "price-low", "popularity-high", "popularity-low"]
 
+# Sort type -> (column, descending) for the in-memory catalog views
+SERVICE_SORT_COLUMNS = {"a-z": ("service_name", False),
+                        "z-a": ("service_name", True),
+                        "price-high": ("subscription_price", True),
+                        "price-low": ("subscription_price", False),
+                        "popularity-high": ("num_subscribed", True),
+                        "popularity-low": ("num_subscribed", False)}
+CONTENT_SORT_COLUMNS = {"a-z": ("service_name", False),
+                        "z-a": ("service_name", True),
+                        "price-high": ("subscription_price", True),
+                        "price-low": ("subscription_price", False),
+                        "popularity-high": ("critic_score", True),
+                        "popularity-low": ("critic_score", False)}
+EXPLORE_PAGE_SIZE = 50  # movies / tv shows rendered per explore page
+EXPLORE_STREAM_MAX_ROWS = 100000  # cap on a streamed (unpaged) library
+SEARCH_RESULT_LIMIT = 100  # default cap on search results
+SEARCH_INDEX_TTL = 3600  # seconds before the in-process title index is rebuilt
+
 #=====================================#
 #==== SQL QUERY - HELPER FUNCTIONS ===#
 #=====================================#
@@ -32,180 +62,89 @@ def getAllServices(cursor, sort_type):
   return result
 
 
-def getAllUserServices(cursor, username):
-  """
-  Get a result set of all services a given user subscribes to
-  Precondition: Username has already been validated
-  Parameters:
-    cursor: An active connection / cursor to a MySQL Database
-    username: A given user in the database
-  Return: A dictionary/result set of all services a user subscribes to
-  """
-  query = "CALL get_user_services(%s)"
-  cursor.execute(query, (username))
-  result = cursor.fetchall()
-
-  return result
-
-
-def checkUserServiceExists(cursor, username, serviceName):
-  """
-  Check whether or not a given user is subscribed to a given service
-  Precondition: username and service name are valid
-  Parameters:
-    cursor: An active connection / cursor to a MySQL Database
-    username: A given user in the database
-    serviceName: A given service offered / in the database
-  Returns: True if the given user is subscribed to the given service,
-    otherwise False
-  """
-  query = "SELECT check_subscription_status(%s, %s)"
-  cursor.execute(query, (username, serviceName))
-  result = cursor.fetchall()
-
-  return bool(list(result[0].values())[0])
-
-
-def checkUserFavoriteExists(cursor, username, contentId):
+def toggleFavorite(cursor, username, contentId, favorite=None):
   """
-  Check whether or not a given user has favorited a movie or show
-  Precondition: username and content id are valid
+  Favorite or unfavorite a piece of content for a given user. The
+  existence check and the change happen in one call, so repeated
+  clicks are harmless.
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
     username: A given user in the database
     contentId: A given id for a piece of content in the database
-  Returns: True if the given user has favorited the given content,
-    otherwise False
+    favorite: True to favorite, False to unfavorite, None to flip
+  Return: a dictionary with the new state ("favorited") and whether
+    anything changed ("changed")
   """
-  query = "SELECT check_favorite_status(%s, %s)"
-  cursor.execute(query, (username, contentId))
-  result = cursor.fetchall()
+  query = "CALL toggle_user_favorite(%s, %s, %s)"
+  cursor.execute(query, (username, contentId, favorite))
+  result = cursor.fetchone()
 
-  return bool(list(result[0].values())[0])
+  return {"favorited": bool(result["favorited"]),
+          "changed": bool(result["changed"])}
 
 
-def addNewService(cursor, username, serviceName):
+def getCatalogIds(cursor, service_type):
   """
-  Add a subscription / service for a given user
-  Precondition: user is not already subscribed to the given service
+  Get every movie or tv show, unordered, with service, genre and rating
+  as ids (no lookup joins). Resolve them with the dimension cache.
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
-    username: A given user in the database
-    serviceName: A given service offered / in the database
-      which the user is not already subscribed to
-  Return: True if the operation was a success, False otherwise
+    service_type: "Movie" or "TV Show"
+  Return: A dictionary/result set of all offered content of that type
   """
-  query = "CALL add_new_service(%s, %s)"
-  cursor.execute(query, (username, serviceName))
-  
-  return checkUserServiceExists(cursor, username, serviceName)
-
-
-def addNewFavorite(cursor, username, contentId):
-  """
-  Add a favorited content for a given user
-  Precondition: user has not already favorited a given piece of content
-  Parameters:
-    cursor: An active connection / cursor to a MySQL Database
-    username: A given user in the database
-    contentId: A given id for a piece of content in the database  
-  Return: True if the operation was a success, False otherwise
-  """
-  query = "CALL add_new_user_favorite(%s, %s)"
-  cursor.execute(query, (username, contentId))
-  
-  return checkUserFavoriteExists(cursor, username, contentId)
-
+  query = "CALL get_catalog_ids(%s)"
+  cursor.execute(query, (service_type,))
+  result = cursor.fetchall()
 
-def removeFavorite(cursor, username, contentId):
-  """
-  Remove a favorited content for a given user
-  Precondition: user has already favorited a given piece of content
-  Parameters:
-    cursor: An active connection / cursor to a MySQL Database
-    username: A given user in the database
-    contentId: A given id for a piece of content in the database  
-  Return: True if the operation was a success, False otherwise
-  """
-  query = "CALL remove_user_favorite(%s, %s)"
-  cursor.execute(query, (username, contentId))
-  
-  return not checkUserFavoriteExists(cursor, username, contentId)
+  return result
 
 
-def removeService(cursor, username, serviceName):
+def getUserFavoriteIds(cursor, username):
   """
-  Remove/End a subscription / service for a given user
-  Precondition: user is subscribed to the given service
+  Get the content ids a given user has favorited
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
     username: A given user in the database
-    serviceName: A given service offered / in the database
-      which the user is subscribed to
-  Return: True if the operation was a success, False otherwise
+  Return: A list of content ids
   """
-  query = "CALL remove_service(%s, %s)"
-  cursor.execute(query, (username, serviceName))
-
-  return not checkUserServiceExists(cursor, username, serviceName)
-
-
-def getAllMovies(cursor, sort_type):
-  """
-  Get a result set of all the movies offered and popularity metrics
-  in a given sorted order:
-    a-z
-    z-a
-    popularity-high
-    popularity-low
-  Parameters:
-    cursor: An active connection / cursor to a MySQL Database
-    sort_type: A sort type from the list of valid options above
-  Return: A dictionary/result set of all offered movies
-  """
-  query = "CALL get_all_movies(%s)"
-  cursor.execute(query, (sort_type))
+  query = "CALL get_user_favorite_ids(%s)"
+  cursor.execute(query, (username,))
   result = cursor.fetchall()
 
-  return result
+  return [row["content_id"] for row in result]
 
 
-def getAllTvShows(cursor, sort_type):
+def get_movie_search(cursor, keyword, limit=SEARCH_RESULT_LIMIT, offset=0):
   """
-  Get a result set of all the tv shows offered and popularity metrics
-  in a given sorted order:
-    a-z
-    z-a
-    popularity-high
-    popularity-low
+  Get a result set of movies from a given search term, ranked by
+  full-text relevance (short keywords use a title prefix match).
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
-    sort_type: A sort type from the list of valid options above
-  Return: A dictionary/result set of all offered tv shows
+    keyword: A search term (title or description)
+    limit: The maximum number of results to return
+    offset: The number of ranked results to skip
+  Return: A result set of movies that are similar to the keyword
   """
-  query = "CALL get_all_tv_shows(%s)"
-  cursor.execute(query, (sort_type))
+  query = "CALL search_content(%s, %s, %s, %s)"
+  cursor.execute(query, ("Movie", keyword, limit, offset))
   result = cursor.fetchall()
 
   return result
 
 
-def getUserFavorites(cursor, username, sort_type):
+def get_tv_search(cursor, keyword, limit=SEARCH_RESULT_LIMIT, offset=0):
   """
-  Get a result set of all user favorites and popularity metrics
-  in a given sorted order:
-    a-z
-    z-a
-    popularity-high
-    popularity-low
+  Get a result set of tv shows from a given search term, ranked by
+  full-text relevance (short keywords use a title prefix match).
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
-    username: A given user in the database
-    sort_type: A sort type from the list of valid options above
-  Return: A dictionary/result set of all user favorites
+    keyword: A search term (title or description)
+    limit: The maximum number of results to return
+    offset: The number of ranked results to skip
+  Return: A result set of tv shows that are similar to the keyword
   """
-  query = "CALL get_user_favorites(%s, %s)"
-  cursor.execute(query, (username, sort_type))
+  query = "CALL search_content(%s, %s, %s, %s)"
+  cursor.execute(query, ("TV Show", keyword, limit, offset))
   result = cursor.fetchall()
 
   return result
@@ -303,119 +242,729 @@ def addBillingAddress(cursor, card_number, street_name, city, state, zip_code):
   cursor.execute(query, (card_number, street_name, city, state, zip_code))
 
 
-def getTotalCost(cursor, username):
+def getBillingSummary(cursor, month, year, username):
   """
-  Get the total cost incurred by a user from the subscribed services.
+  Get a user's bill, total, most viewed and most billed service for
+  a given month in one round trip. The procedure aggregates the month
+  once and returns four result sets, read in order with nextset().
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
+    month: The billing month (1 - 12)
+    year: The billing year
     username: The username in the database for the given user
-  Return: Total monthly cost of all the subscriptions
+  Return: a dictionary with the per service bill (rows), the total
+    (row), the most viewed service (row) and the most billed service (row)
   """
-  query = "SELECT getTotalCost(%s) as total_monthly_cost"
-  cursor.execute(query, (username,))
-  result = cursor.fetchone()['total_monthly_cost']
+  query = "CALL generateBillingSummary(%s, %s, %s)"
+  cursor.execute(query, (month, year, username))
+  bill = cursor.fetchall()
+  cursor.nextset()
+  total = cursor.fetchone()
+  cursor.nextset()
+  mostViewed = cursor.fetchone()
+  cursor.nextset()
+  mostBilled = cursor.fetchone()
 
-  return result
+  return {"bill": bill,
+          "total": total,
+          "most_viewed": mostViewed,
+          "most_billed": mostBilled}
 
 
-def get_user_recommendations(cursor, username):
+def getUserDashboard(cursor, username):
   """
-  Get user recommendations based on subscribed services.
-  The user will receive top 2 movies and top 2 tv shows from
-  each service which they are subscribed to and for content
-  which they have not favorited.
+  Get a user's services and total monthly cost for the subscription
+  dashboard in one round trip. The procedure returns two result sets,
+  read in order with nextset(). Recommendations are not included; they
+  depend on the user's favorites (see recommendContent).
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
     username: The username in the database for the given user
-  Return: a set of user recommendation (content)
-  """
-  # get the user's services
-  query = "CALL get_user_service_ids(%s)"
-  cursor.execute(query, (username))
-  user_services = cursor.fetchall()
-  result = []
-
-  # get a list of ids
-  ids = []
-  for dic in user_services:
-    ids.append(int(dic['service_id']))
-  
-  for id in ids:
-    query = "CALL get_top_recs(%s, %s)"
-    cursor.execute(query, (username, id))
-    recs = cursor.fetchall()
-    for dic in recs:
-      result.append(dic)
+  Return: a dictionary with the user's services and total monthly cost
+  """
+  query = "CALL get_user_dashboard(%s)"
+  cursor.execute(query, (username,))
 
-  return result
+  return readDashboard(cursor)
 
 
-def get_movie_search(cursor, keyword):
+def readDashboard(cursor):
   """
-  Get a result set of movies from a given search term.
+  Read the dashboard result sets (see get_user_dashboard),
+  starting at the cursor's current result set
+  Parameters:
+    cursor: A cursor positioned on the user's services result set
+  Return: a dictionary with the user's services and total monthly cost
+  """
+  userServices = cursor.fetchall()
+  cursor.nextset()
+  totalCost = cursor.fetchone()["total_monthly_cost"]
+
+  return {"user_services": userServices,
+          "total_monthly_cost": totalCost}
+
+
+def subscribeService(cursor, username, serviceName):
+  """
+  Subscribe a user to a service. Safe to repeat: the existence check
+  and the insert are a single statement, so a duplicate click is a no-op.
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
-    keyword: A search term (title) 
-  Return: A result set of movies that are similar to the keyword
+    username: A given user in the database
+    serviceName: A given service offered / in the database
+  Return: a dictionary with "changed" (True if the user was not already
+    subscribed) and the user's updated "dashboard" (see getUserDashboard)
   """
-  query = "CALL search_movies(%s)"
-  cursor.execute(query, (keyword))
-  result = cursor.fetchall()
+  query = "CALL subscribe_service(%s, %s)"
+  cursor.execute(query, (username, serviceName))
+  changed = bool(cursor.fetchone()["changed"])
+  cursor.nextset()
 
-  return result
+  return {"changed": changed, "dashboard": readDashboard(cursor)}
 
 
-def get_tv_search(cursor, keyword):
+def unsubscribeService(cursor, username, serviceName):
   """
-  Get a result set of tv shows from a given search term.
+  Unsubscribe a user from a service. Safe to repeat: removing a service
+  the user is not subscribed to is a no-op.
   Parameters:
     cursor: An active connection / cursor to a MySQL Database
-    keyword: A search term (title) 
-  Return: A result set of tv shows that are similar to the keyword
+    username: A given user in the database
+    serviceName: A given service offered / in the database
+  Return: a dictionary with "changed" (True if the user was subscribed)
+    and the user's updated "dashboard" (see getUserDashboard)
   """
-  query = "CALL search_tv_shows(%s)"
-  cursor.execute(query, (keyword))
-  result = cursor.fetchall()
+  query = "CALL unsubscribe_service(%s, %s)"
+  cursor.execute(query, (username, serviceName))
+  changed = bool(cursor.fetchone()["changed"])
+  cursor.nextset()
 
-  return result
+  return {"changed": changed, "dashboard": readDashboard(cursor)}
 
 
-def getBill(cursor, month, year, username):
-  query = "CALL generateBill(%s, %s, %s)"
-  cursor.execute(query, (month, year, username))
-  result = cursor.fetchall()
+#===================================#
+#=== CACHED RESULT SET - HELPERS ===#
+#===================================#
+def cacheKey(*parts):
+  """
+  Build a catalog cache key scoped to the connected database host
+  Parameters:
+    parts: the name of the result set followed by its arguments
+  Return: a tuple usable as a catalog cache key
+  """
+  return (session.get("hostName"),) + parts
 
+
+def runQuery(queryHelper, *args):
+  """
+  Run a SQL query helper on a pooled connection for the current session
+  Parameters:
+    queryHelper: a SQL query helper taking (cursor, *args)
+    args: the remaining arguments for the query helper
+  Return: the result of the query helper
+  """
+  with pooledConnection(session.get("hostName"),
+                        session.get("userName"),
+                        session.get("userPassword")) as connection:
+    with connection.cursor() as cursor:
+      result = queryHelper(cursor, *args)
+    connection.commit()
   return result
 
 
-def getTotal(cursor, month, year, username):
-  query = "CALL generateTotal(%s, %s, %s)"
-  cursor.execute(query, (month, year, username))
-  result = cursor.fetchone()
+def runQueries(queries):
+  """
+  Run independent SQL query helpers in parallel for the current session
+  Parameters:
+    queries: a dictionary of name -> (queryHelper, args)
+  Return: a dictionary of name -> result of that query helper
+  """
+  return runParallelQueries(session.get("hostName"),
+                            session.get("userName"),
+                            session.get("userPassword"),
+                            queries)
 
-  return result
 
+def getCachedResult(key, queryHelper, *args):
+  """
+  Get a result set from the shared, process-level catalog cache.
+  On a miss the query helper is run on a pooled connection and the
+  result is cached, so result sets never need to live in the session.
+  Parameters:
+    key: a cache key built with cacheKey()
+    queryHelper: a SQL query helper taking (cursor, *args)
+    args: the remaining arguments for the query helper
+  Return: the cached result of the query helper (read-only)
+  """
+  return catalogCache.getOrLoad(key, lambda: runQuery(queryHelper, *args))
 
-def getMostViewed(cursor, month, year, username):
-  query = "CALL getMostViewed(%s, %s, %s)"
-  cursor.execute(query, (month, year, username))
-  result = cursor.fetchone()
 
-  return result
+def searchCatalog(service_type, keyword, limit=SEARCH_RESULT_LIMIT):
+  """
+  Search titles with the in-process trigram index. The index is built
+  once per worker from the movie and tv show catalog views and kept in
+  the catalog cache, so title searches make no database round trip
+  until it is refreshed. A keyword no title matches is looked up in the
+  database's full-text index over titles and descriptions instead
+  (see get_movie_search / get_tv_search).
+  Parameters:
+    service_type: "Movie" or "TV Show"
+    keyword: A search term (title or description)
+    limit: The maximum number of results to return
+  Return: A ranked result set of content similar to the keyword
+  """
+  results = getSearchIndex().search(keyword, service_type, limit)
+  if results or not keyword.strip():
+    return results
 
+  queryHelper = get_movie_search if service_type == "Movie" else get_tv_search
+  return runQuery(queryHelper, keyword.strip(), limit)
 
-def getMostBilled(cursor, month, year, username):
-  query = "CALL getMostBilled(%s, %s, %s)"
-  cursor.execute(query, (month, year, username))
-  result = cursor.fetchone()
 
-  return result
+def getSearchIndex():
+  """
+  Get the in-process title search index, building it on first use
+  Return: a TitleSearchIndex over every movie and tv show
+  """
+  def buildIndex():
+    movies, tvShows = getCatalogViews("all_movies", "all_tv")
+    return TitleSearchIndex(movies.rows + tvShows.rows)
+
+  return catalogCache.getOrLoad(cacheKey("search_index"),
+                                buildIndex,
+                                ttl=SEARCH_INDEX_TTL)
+
+
+def refreshSearchIndex():
+  """
+  Drop the in-process title search index and the movie and tv show
+  catalog views so the next request rebuilds them.
+  Call after content is added, changed or removed.
+  """
+  catalogCache.invalidate(cacheKey("view", "all_movies"))
+  catalogCache.invalidate(cacheKey("view", "all_tv"))
+  catalogCache.invalidate(cacheKey("view", "all_content"))
+  catalogCache.invalidate(cacheKey("search_index"))
+
+
+def getCatalogSnapshot():
+  """
+  Get the memory-mapped catalog snapshot for the connected host. Its
+  versions are checked against the database at most every
+  SNAPSHOT_CHECK_INTERVAL seconds; when the content or lookup tables
+  changed, a new snapshot is opened (exported first if no worker has
+  yet) and the content views are rebuilt from it on next use. If the
+  check fails (e.g. an unwritable CATALOG_SNAPSHOT_DIR) the previous
+  snapshot, or the database, is used until the next check.
+  Return: a CatalogSnapshot, or None if snapshots are disabled or none
+    could be opened
+  """
+  directory = current_app.config.get("CATALOG_SNAPSHOT_DIR")
+  if not directory:
+    return None
+
+  snapshots = getSnapshotCache(session.get("hostName"), directory)
+  if snapshots.needsCheck():
+    loaded = snapshots.snapshot is not None
+    try:
+      if runQuery(snapshots.refresh) and loaded:
+        refreshSearchIndex()
+    except (OSError, pymysql.err.Error) as error:
+      current_app.logger.warning("Catalog snapshot check failed: %s", error)
+  return snapshots.snapshot
+
+
+def getDimensions():
+  """
+  Get the lookup tables (service, genres, ratings) for the connected
+  host, from the catalog snapshot when there is one. Otherwise their
+  version (and the content's) is checked at most every
+  DIMENSION_CHECK_INTERVAL seconds. When either changes, the tables are
+  reloaded as needed and the content views are rebuilt on next use.
+  Return: a DimensionCache
+  """
+  dimensions = getDimensionCache(session.get("hostName"))
+  snapshot = getCatalogSnapshot()
+  if snapshot is not None:
+    dimensions.contentVersion = snapshot.contentVersion
+    # Versions only grow: never go back to an older snapshot's tables
+    if dimensions.version is None or snapshot.dimensionsVersion > dimensions.version:
+      loaded = dimensions.version is not None
+      dimensions.loadTables(snapshot.dimensionsVersion, *snapshot.lookups())
+      if loaded:
+        refreshSearchIndex()
+    return dimensions
+
+  if dimensions.needsCheck():
+    loaded = dimensions.version is not None
+    if runQuery(dimensions.refresh) and loaded:
+      refreshSearchIndex()
+  return dimensions
+
+
+def buildCatalogView(name, rows):
+  """
+  Build the pre-sorted view for a catalog dataset from its result set.
+  Movie and tv show rows have their ids resolved by the dimension cache
+  and are stored compactly (see compactRows); "all_content" reuses the
+  movie and tv show row objects as they are.
+  Parameters:
+    name: "services", "all_movies", "all_tv" or "all_content"
+    rows: the dataset's result set (see catalogQuery)
+  Return: a SortedCatalogView
+  """
+  if name == "services":
+    return SortedCatalogView(rows, SERVICE_SORT_COLUMNS)
+  if name != "all_content":
+    dimensions = getDimensions()
+    rows = compactRows(dimensions.resolve(row) for row in rows)
+  return SortedCatalogView(rows, CONTENT_SORT_COLUMNS, idColumn="guid")
+
+
+def catalogQuery(name):
+  """
+  Get the SQL query helper and arguments that load a catalog dataset
+  Parameters:
+    name: "services", "all_movies" or "all_tv"
+  Return: a (queryHelper, args) tuple
+  """
+  if name == "services":
+    return (getAllServices, (FILTER_TYPES[0],))
+  return (getCatalogIds, ("Movie" if name == "all_movies" else "TV Show",))
+
+
+def viewKey(name):
+  """
+  Build the catalog cache key of a catalog view. The services view is
+  keyed by the shared popularity version, so a subscription change in
+  any worker makes every worker reload it.
+  Parameters:
+    name: "services", "all_movies" or "all_tv"
+  Return: a catalog cache key
+  """
+  if name == "services":
+    return cacheKey("view", name, dataVersions.get(cacheKey("services")))
+  return cacheKey("view", name)
+
+
+def getCatalogViews(*names):
+  """
+  Get several in-memory, pre-sorted catalog views. Views missing from
+  the catalog cache are loaded in parallel, one pooled connection each;
+  movies and tv shows are read from the catalog snapshot when there is
+  one, without querying the database.
+  Parameters:
+    names: any of "services", "all_movies" or "all_tv"
+  Return: a list of SortedCatalogView in the order of names
+  """
+  loaded = {name: catalogCache.get(viewKey(name)) for name in names}
+  missing = [name for name, view in loaded.items() if view is None]
+
+  if missing:
+    snapshot = getCatalogSnapshot() if missing != ["services"] else None
+    results = runQueries({name: catalogQuery(name) for name in missing
+                          if name == "services" or snapshot is None})
+    for name in missing:
+      if name not in results:
+        results[name] = snapshot.contentRows("Movie" if name == "all_movies" else "TV Show")
+      loaded[name] = buildCatalogView(name, results[name])
+      catalogCache.set(viewKey(name), loaded[name])
+
+  return [loaded[name] for name in names]
+
+
+def getCatalogView(name):
+  """
+  Get an in-memory, pre-sorted view of a catalog dataset. Each dataset
+  is fetched once and kept in the catalog cache; every FILTER_TYPES
+  order is served from it without another database round trip.
+  Parameters:
+    name: "services", "all_movies" or "all_tv"
+  Return: a SortedCatalogView
+  """
+  return getCatalogViews(name)[0]
+
+
+def getContentView():
+  """
+  Get a pre-sorted view over every movie and tv show, built in memory
+  from the two content catalog views (no extra database round trip)
+  Return: a SortedCatalogView keyed by guid
+  """
+  def buildView():
+    movies, tvShows = getCatalogViews("all_movies", "all_tv")
+    return buildCatalogView("all_content", movies.rows + tvShows.rows)
+
+  return catalogCache.getOrLoad(cacheKey("view", "all_content"), buildView)
+
+
+def getFavoriteIds(username):
+  """
+  Get a user's favorited content ids from the favorites cache, loading
+  them on a miss. The cached set is updated in place when the user
+  favorites or unfavorites something (see updateFavoriteCache). Entries
+  are keyed by the user's favorites version, so a change made in another
+  worker (with a shared store) is picked up on the next read.
+  Parameters:
+    username: The username in the database for the given user
+  Return: a frozenset of content ids
+  """
+  version = dataVersions.get(cacheKey("favorites", username))
+  return favoritesCache.getOrLoad(cacheKey("favorite_ids", username, version),
+                                  lambda: frozenset(runQuery(getUserFavoriteIds, username)))
+
+
+def loadContentFeatures(cursor, directory):
+  """
+  Open the content feature matrix for the database's current content
+  version, building and saving it if no worker has yet. Directories
+  saved for older content versions are deleted.
+  Parameters:
+    cursor: An active connection / cursor to a MySQL Database
+    directory: where feature matrices are saved (FEATURE_CACHE_DIR)
+  Return: a ContentFeatures (memory-mapped when loaded from disk)
+  """
+  prefix = re.sub(r"[^\w.-]", "_", session.get("hostName") or "")
+
+  cursor.execute("CALL get_catalog_versions()")
+  version = cursor.fetchone()["content_version"]
+  features = ContentFeatures.load(version, os.path.join(directory, "%s-content-v%d" % (prefix, version)))
+  if features is None:
+    cursor.execute("CALL get_content_features()")
+    version = cursor.fetchone()["version"]
+    cursor.nextset()
+    features = ContentFeatures.fromRows(version, cursor.fetchall())
+    try:
+      features.save(os.path.join(directory, "%s-content-v%d" % (prefix, version)))
+    except OSError as error:
+      # e.g. an unwritable FEATURE_CACHE_DIR - this worker keeps its copy in memory
+      current_app.logger.warning("Could not save content features: %s", error)
+  removeOldFeatures(directory, prefix, version)
+  return features
+
+
+def getContentFeatures():
+  """
+  Get the content feature matrix for the connected host. It is kept in
+  the catalog cache; when the entry expires the content version is
+  checked and the matrix reopened (or rebuilt if the content changed).
+  Return: a ContentFeatures
+  """
+  return catalogCache.getOrLoad(cacheKey("content_features"),
+                                lambda: runQuery(loadContentFeatures,
+                                                 current_app.config["FEATURE_CACHE_DIR"]))
+
+
+def similarityEnabled():
+  """
+  Return: True if the similarity recommender is switched on
+    (SIMILAR_RECOMMENDATIONS) and NumPy is installed
+  """
+  return bool(current_app.config.get("SIMILAR_RECOMMENDATIONS")) and similarityAvailable()
+
+
+def recommendSimilar(userServices, favoriteIds):
+  """
+  Recommend the 2 movies and 2 tv shows from each service a user
+  subscribes to that are most similar to the content they favorited
+  Parameters:
+    userServices: the user's services (rows with a service_name)
+    favoriteIds: the user's favorited content ids (not empty)
+  Return: a list of content rows, grouped by service in the order of
+    userServices, best critic score first
+  """
+  serviceIds = {row["service_name"]: serviceId
+                for serviceId, row in getDimensions().services.items()}
+  names = [row["service_name"] for row in userServices]
+  guids = getContentFeatures().recommendByService([favoriteIds],
+                                                  [[serviceIds[name] for name in names
+                                                    if name in serviceIds]])[0]
+
+  # select() orders by critic score; regroup by service keeping that order
+  byService = {name: [] for name in names}
+  for row in getContentView().select(guids, "popularity-high"):
+    byService[row["service_name"]].append(row)
+  return [row for name in names for row in byService[name]]
+
+
+def recommendContent(userServices, favoriteIds):
+  """
+  Recommend the top 2 movies and top 2 tv shows from each service a
+  user subscribes to, skipping content they have already favorited.
+  Titles are ranked by critic score, from the host's precomputed top K
+  table, which is rebuilt in the background whenever the content view
+  is reloaded. When the similarity recommender is switched on (see
+  similarityEnabled) and the user has favorites, titles are ranked by
+  similarity to those favorites instead (see recommendSimilar); the top
+  K table is still used if that fails or finds nothing (e.g. the
+  favorites are not in the feature matrix yet).
+  Parameters:
+    userServices: the user's services (rows with a service_name)
+    favoriteIds: the user's favorited content ids
+  Return: a list of content rows, grouped by service in the order of
+    userServices, best critic score first
+  """
+  if favoriteIds and similarityEnabled():
+    try:
+      recs = recommendSimilar(userServices, favoriteIds)
+    except Exception:
+      current_app.logger.exception("Similar recommendations failed, using the top K table")
+      recs = None
+    if recs:
+      return recs
+
+  table = getRecommendationTable(session.get("hostName"))
+  table.refresh(getContentView())
+  return table.recommend([row["service_name"] for row in userServices], favoriteIds)
+
+
+def warmCatalog():
+  """
+  Load everything shared by all users for the session's database host:
+  the catalog snapshot, the lookup tables, the catalog views, the recommendation table, the
+  title search index and (if similarityEnabled) the content feature matrix.
+  Run once in a pre-forking server's master (see wsgi.py) so every
+  worker starts with them already in memory.
+  """
+  getCatalogSnapshot()
+  getDimensions()
+  getCatalogViews("services", "all_movies", "all_tv")
+  getRecommendationTable(session.get("hostName")).refresh(getContentView())
+  getSearchIndex()
+  if similarityEnabled():
+    getContentFeatures()
+
+
+def renderContentPage(option):
+  """
+  Render one page of the movie ("all_movies") or tv show ("all_tv")
+  library from its in-memory catalog view. The page starts after the
+  row whose guid is in the query string (after_id), as written by the
+  template's Next Page link.
+  Parameters:
+    option: "all_movies" or "all_tv"
+  Return: The explore page (rendered from template)
+  """
+  filterKey = "current_movie_filter" if option == "all_movies" else "current_tv_filter"
+
+  if not session.get(filterKey):
+    session[filterKey] = FILTER_TYPES[4]
+
+  sortType = session.get(filterKey)
+  afterGuid = request.args.get("after_id", type=int)
+  page = getCatalogView(option).page(sortType, EXPLORE_PAGE_SIZE, afterGuid)
+
+  return render_template("explore.html", 
+                         session=True, 
+                         logged_in=True, 
+                         option=option,  
+                         data=page["rows"],
+                         next_page=page["next"],
+                         first_page=afterGuid is None,
+                         paged=True)
+
+
+def renderDashboard():
+  """
+  Render the "my_sub" subscriptions tab for the logged in user. The
+  dashboard is loaded with a single call (see getUserDashboard) and
+  kept in the catalog cache until the user's services change;
+  recommendations are ranked in memory against the favorites cache.
+  Return: The subscriptions page (rendered from template)
+  """
+  version = dataVersions.get(cacheKey("subscriptions", session.get("user_id")))
+  dashboard = getCachedResult(cacheKey("dashboard", session.get("user_id"), version),
+                              getUserDashboard,
+                              session.get("user_id"))
+  recommended = recommendContent(dashboard["user_services"],
+                                 getFavoriteIds(session.get("user_id")))
+
+  return render_template("subscriptions.html", 
+                         session=True, 
+                         logged_in=True, 
+                         option="my_sub", 
+                         data=dashboard["user_services"],
+                         recommended=recommended,
+                         total_cost=dashboard["total_monthly_cost"])
+
+
+def streamTemplate(templateName, **context):
+  """
+  Render a template incrementally. Jinja's Template.generate() yields
+  the page in chunks as the template's loops consume their data, so
+  rows reach the browser while later rows are still being read.
+  Parameters:
+    templateName: the template to render
+    context: the template variables (generators are consumed lazily)
+  Return: a streamed Response
+  """
+  current_app.update_template_context(context)
+  template = current_app.jinja_env.get_template(templateName)
+  return Response(stream_with_context(template.generate(context)))
+
+
+def streamContentLibrary(option):
+  """
+  Stream the whole movie ("all_movies") or tv show ("all_tv") library
+  in the current sort order. Rows are read from an unbuffered cursor in
+  batches and rendered as they arrive, so memory stays flat no matter
+  how large the catalog is.
+  Parameters:
+    option: "all_movies" or "all_tv"
+  Return: The explore page (streamed from template)
+  """
+  filterKey = "current_movie_filter" if option == "all_movies" else "current_tv_filter"
+
+  if not session.get(filterKey):
+    session[filterKey] = FILTER_TYPES[4]
+
+  serviceType = "Movie" if option == "all_movies" else "TV Show"
+  rows = streamRows(session.get("hostName"),
+                    session.get("userName"),
+                    session.get("userPassword"),
+                    "CALL get_content_page(%s, %s, %s)",
+                    (serviceType, session.get(filterKey), EXPLORE_STREAM_MAX_ROWS))
+
+  # Read the first row up front so an empty library still renders
+  # "No Matching Results Found!" (a generator is always truthy)
+  first = next(rows, None)
+  data = itertools.chain([first], rows) if first is not None else []
+
+  return streamTemplate("explore.html",
+                        session=True,
+                        logged_in=True,
+                        option=option,
+                        data=data,
+                        next_page=None,
+                        first_page=True,
+                        paged=True,
+                        streamed=True)
+
+
+def updateSubscriptionCache(username, serviceName, change, dashboard):
+  """
+  Bring cached data up to date after a user subscribes or unsubscribes:
+  a change in popularity bumps the shared services version, so every
+  worker reloads the services view on next use, and the dashboard
+  returned by the procedure is stored
+  Parameters:
+    username: The username in the database for the given user
+    serviceName: The service that was added or removed
+    change: +1 for a new subscription, -1 for a removed one, 0 if
+      nothing changed
+    dashboard: the user's dashboard as returned with the change
+  """
+  if change:
+    version = dataVersions.bump(cacheKey("services"))
+    catalogCache.invalidate(cacheKey("view", "services", version - 1))
+
+  version = dataVersions.bump(cacheKey("subscriptions", username))
+  catalogCache.invalidate(cacheKey("dashboard", username, version - 1))
+  catalogCache.set(cacheKey("dashboard", username, version), dashboard)
+
+
+def updateFavoriteCache(username, contentId, favorited):
+  """
+  Apply a favorite or unfavorite to the user's cached favorite ids
+  Parameters:
+    username: The username in the database for the given user
+    contentId: The content that was favorited or unfavorited
+    favorited: the content's new favorite state
+  """
+  versionKey = cacheKey("favorites", username)
+  version = dataVersions.get(versionKey)
+  newVersion = dataVersions.bump(versionKey)
+
+  # If another worker changed the favorites in between, the cached set is
+  # missing that change - leave it to be reloaded under the new version
+  if newVersion != version + 1:
+    return
+  key = cacheKey("favorite_ids", username, version)
+  newKey = cacheKey("favorite_ids", username, newVersion)
+  if favorited:
+    favoritesCache.add(key, int(contentId), newKey)
+  else:
+    favoritesCache.discard(key, int(contentId), newKey)
+
+
+#==========================#
+#=== HTTP CACHE HELPERS ===#
+#==========================#
+def catalogVersion():
+  """
+  Get the version of the catalog this worker serves: the database's
+  content and lookup table versions (polled at most once a minute, see
+  getDimensions) and the shared version of service popularity. Every
+  worker serving the same data reports the same version.
+  Return: a tuple of versions
+  """
+  dimensions = getDimensions()
+  return (dimensions.contentVersion,
+          dimensions.version,
+          dataVersions.get(cacheKey("services")))
+
+
+def notModified(*dataNames):
+  """
+  Check the client's cached copy of a GET page before doing any work.
+  The ETag covers the URL, the session's user and sort filters, and the
+  versions of the data the page shows, so it changes exactly when the
+  rendered page would. At most a version poll hits the database.
+  Pages are only validated when the versions are kept in a shared store
+  (see sessionStore.py): per-process versions miss changes made in other
+  workers, so a 304 could hand back a stale page.
+  Parameters:
+    dataNames: the data the page depends on - "catalog" and / or
+      per-user "favorites" / "subscriptions"
+  Return: a 304 response if the client's copy is current, otherwise None
+    (the ETag is then added to the rendered page, see addCacheValidators)
+  """
+  # A pending flash message makes this render unique
+  if session.get("_flashes") or not dataVersions.shared:
+    return None
+
+  username = session.get("user_id")
+  versions = tuple(catalogVersion() if name == "catalog"
+                   else dataVersions.get(cacheKey(name, username))
+                   for name in dataNames)
+  key = (request.full_path,
+         session.get("hostName"),
+         username,
+         session.get("current_movie_filter"),
+         session.get("current_tv_filter"),
+         session.get("current_favorite_filter")) + versions
+  etag = hashlib.sha1(repr(key).encode()).hexdigest()
+
+  g.page_etag = etag
+  # Weak comparison: compressed pages carry the ETag as W/"..."
+  if request.if_none_match.contains_weak(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+  return None
+
 
 #=================================#
 #=== Back End Route Management ===#
 #=================================#
 views = Blueprint("views", __name__)
 
+
+@views.after_request
+def addCacheValidators(response):
+  """
+  Add the ETag computed by notModified() to a freshly rendered page.
+  Pages are per user, so shared caches must not store them and browsers
+  must revalidate before reuse.
+  """
+  etag = g.pop("page_etag", None)
+  if etag and response.status_code == 200 and not response.is_streamed:
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+  return response
+
+
 #=====================#
 #=== Subscriptions ===#
 #=====================#
@@ -430,38 +979,17 @@ def subscriptions():
   if not session.get("logged_in"):
     return redirect(url_for("auth.login"))
 
+  if not session.get("current_sub_filter"):
+    session["current_sub_filter"] = FILTER_TYPES[0]
+
   if request.method == "GET":
-    # Open a Connection To Get all Subscription Data 
-    connection = getConnection(session.get("hostName"),
-                               session.get("userName"),
-                               session.get("userPassword"))
-    with connection.cursor() as cursor:
-      if not session.get("current_sub_filter"):
-        session["current_sub_filter"] = FILTER_TYPES[0]
-
-      allServiceData = getAllServices(cursor, session.get("current_sub_filter"))
-      session["all_services"] = allServiceData
-      # Extract all names into session variable
-      session["all_service_names"] = []
-      for row in session['all_services']:
-        session["all_service_names"].append(row['service_name'])
-      connection.commit()
+    # Answer a repeat visit before touching the database
+    cached = notModified("catalog", "subscriptions", "favorites")
+    if cached:
+      return cached
 
-      userServices = getAllUserServices(cursor, session.get("user_id"))
-      session["user_services"] = userServices
-      session["user_recs"] = get_user_recommendations(cursor, session.get("user_id"))
-      session["total_monthly_cost"] = getTotalCost(cursor, session.get("user_id"))
-
-    connection.commit()
-    connection.close()
-      
-    return render_template("subscriptions.html", 
-                           session=True, 
-                           logged_in=True, 
-                           option="my_sub", 
-                           data=session.get("user_services"),
-                           recommended=session.get("user_recs"),
-                           total_cost=session["total_monthly_cost"])
+    # Dashboard data comes from the shared catalog cache, not the session
+    return renderDashboard()
 
   """
   User Interaction with toggle tabs
@@ -471,36 +999,18 @@ def subscriptions():
     ### USER SELECTED ALL SUBSCRIPTIONS TAB ###
     ###########################################
     if "all_sub" in request.form:
+      allServiceData = getCatalogView("services").sorted(session.get("current_sub_filter"))
       return render_template("subscriptions.html", 
                              session=True, 
                              logged_in=True, 
                              option="all_sub", 
-                             data=session.get("all_services"))
+                             data=allServiceData)
     
     ##########################################
     ### USER SELECTED MY SUBSCRIPTIONS TAB ###
     ##########################################
     elif "my_sub" in request.form:
-      # Get the most current information from the databse
-      connection = getConnection(session.get("hostName"),
-                                 session.get("userName"),
-                                 session.get("userPassword"))
-      with connection.cursor() as cursor:
-        userServices = getAllUserServices(cursor, session.get("user_id"))
-        userRecs = get_user_recommendations(cursor, session.get("user_id"))
-        session["user_services"] = userServices
-        session["user_recs"] = userRecs
-        session["total_monthly_cost"] = getTotalCost(cursor, session.get("user_id"))
-      
-      connection.commit()
-      connection.close()
-      return render_template("subscriptions.html", 
-                             session=True, 
-                             logged_in=True, 
-                             option="my_sub", 
-                             data=session.get("user_services"),
-                             recommended=session.get("user_recs"),
-                             total_cost=session["total_monthly_cost"])
+      return renderDashboard()
     
 
     ###################################################
@@ -508,21 +1018,14 @@ def subscriptions():
     ###################################################
     elif list(request.form.keys())[0] in FILTER_TYPES:
       filter_selection = list(request.form.keys())[0]
-      connection = getConnection(session.get("hostName"),
-                                session.get("userName"),
-                                session.get("userPassword"))    
-      with connection.cursor() as cursor:
-        session["current_sub_filter"] = filter_selection
-        allServiceData = getAllServices(cursor, filter_selection)
-        session["all_services"] = allServiceData
-        connection.commit()
-        connection.close()
+      session["current_sub_filter"] = filter_selection
+      allServiceData = getCatalogView("services").sorted(filter_selection)
         
       return render_template("subscriptions.html", 
                               session=True, 
                               logged_in=True, 
                               option="all_sub", 
-                              data=session.get("all_services"))
+                              data=allServiceData)
 
     ###################################################
     ### USER SELECTED TO MODIFY THEIR SUBSCRIPTIONS ###
@@ -542,63 +1045,53 @@ def subscriptions():
       ##########################
       if action == "Add":
         with connection.cursor() as cursor:
-          if checkUserServiceExists(cursor,
+          result = subscribeService(cursor,
                                     session.get("user_id"),
-                                    service):
-                      
-            connection.close()
-            flash("You Are Already Subscribed!!",
-                  category="success")
-          else:
-            if addNewService(cursor,
-                             session.get("user_id"),
-                             service):
-              flash("You are now subscibed to " + service + "!!",
-                  category="success")
-              session["all_services"] = getAllServices(cursor, session.get("current_sub_filter"))
-              session["user_recs"] = get_user_recommendations(cursor, session.get("user_id"))
-            else:
-              flash("Error encountered when adding service. Please try again.",
-                  category="error")
-              
-            connection.commit()
-            connection.close()
+                                    service)
+        connection.commit()
+        connection.close()
+
+        if result["changed"]:
+          flash("You are now subscibed to " + service + "!!",
+              category="success")
+        else:
+          flash("You Are Already Subscribed!!",
+              category="success")
+        updateSubscriptionCache(session.get("user_id"),
+                                service,
+                                1 if result["changed"] else 0,
+                                result["dashboard"])
         
+        allServiceData = getCatalogView("services").sorted(session.get("current_sub_filter"))
         return render_template("subscriptions.html", 
                                 session=True, 
                                 logged_in=True, 
                                 option="all_sub", 
-                                data=session.get("all_services"))
+                                data=allServiceData)
                                 
       ############################
       ### REMOVE A SUBSCIPTION ###
       ############################
       else:
         with connection.cursor() as cursor:
-          if removeService(cursor,
-                           session.get("user_id"),
-                           service):
-            flash("You are unsubscribed from " + service + "!!",
-                category="success")
-            session["all_services"] = getAllServices(cursor, session.get("current_sub_filter"))
-          else:
-            flash("Error encountered when removing service. Please try again.",
-                category="error")
-        
-          userServices = getAllUserServices(cursor, session.get("user_id"))
-          session["user_services"] = userServices
-          session["user_recs"] = get_user_recommendations(cursor, session.get("user_id"))
-          session["total_monthly_cost"] = getTotalCost(cursor, session.get("user_id"))
-
+          result = unsubscribeService(cursor,
+                                      session.get("user_id"),
+                                      service)
         connection.commit()
         connection.close()
-        return render_template("subscriptions.html", 
-                               session=True, 
-                               logged_in=True, 
-                               option="my_sub", 
-                               data=session.get("user_services"),
-                               recommended=session.get("user_recs"),
-                               total_cost=session["total_monthly_cost"])
+
+        if result["changed"]:
+          flash("You are unsubscribed from " + service + "!!",
+              category="success")
+        else:
+          flash("You Are Not Subscribed to " + service + "!!",
+              category="error")
+        updateSubscriptionCache(session.get("user_id"),
+                                service,
+                                -1 if result["changed"] else 0,
+                                result["dashboard"])
+
+        return renderDashboard()
 
   else:
     return render_template("subscriptions.html", 
@@ -623,75 +1116,52 @@ def explore():
     return redirect(url_for("auth.login"))
   
   if request.method == "GET":
-    # Open a Connection To Get all movie Data 
-    connection = getConnection(session.get("hostName"),
-                               session.get("userName"),
-                               session.get("userPassword"))
+    ######################################
+    ### NEXT PAGE OF MOVIES / TV SHOWS ###
+    ######################################
+    if request.args.get("option") in ("all_movies", "all_tv"):
+      if request.args.get("stream"):
+        return streamContentLibrary(request.args.get("option"))
+
+      cached = notModified("catalog")
+      if cached:
+        return cached
+      return renderContentPage(request.args.get("option"))
 
     #########################
     ### GET ALL FAVORITES ###
     #########################
-    with connection.cursor() as cursor:
-      if not session.get("current_favorite_filter"):
-        session["current_favorite_filter"] = FILTER_TYPES[4]
-      
-      allFavoriteData = getUserFavorites(cursor, 
-                                         session.get("user_id"),
-                                         session.get("current_favorite_filter"))
-      session["all_favorites"] = allFavoriteData
-      connection.commit()
-      connection.close()
+    if not session.get("current_favorite_filter"):
+      session["current_favorite_filter"] = FILTER_TYPES[4]
+
+    cached = notModified("catalog", "favorites")
+    if cached:
+      return cached
+    
+    allFavoriteData = getContentView().select(getFavoriteIds(session.get("user_id")),
+                                              session.get("current_favorite_filter"))
       
     return render_template("explore.html", 
                            session=True, 
                            logged_in=True, 
                            option="all_favorites",  
-                           data=session.get("all_favorites"))
+                           data=allFavoriteData)
 
   """
   User Interaction with toggle tabs
   """
   if request.method == "POST":
-    connection = getConnection(session.get("hostName"),
-                              session.get("userName"),
-                              session.get("userPassword"))
     ######################
     ### GET ALL MOVIES ###
     ######################
     if "all_movies" in request.form:      
-      with connection.cursor() as cursor:
-        if not session.get("current_movie_filter"):
-          session["current_movie_filter"] = FILTER_TYPES[4]
-
-        allMovieData = getAllMovies(cursor, session.get("current_movie_filter"))
-        session["all_movies"] = allMovieData
-        connection.commit()
-        connection.close()
-        
-      return render_template("explore.html", 
-                            session=True, 
-                            logged_in=True, 
-                            option="all_movies",  
-                            data=session.get("all_movies"))
+      return renderContentPage("all_movies")
 
     ########################
     ### GET ALL TV SHOWS ###
     ########################
     elif "all_tv" in request.form:      
-      with connection.cursor() as cursor:
-        if not session.get("current_tv_filter"):
-          session["current_tv_filter"] = FILTER_TYPES[4]
-
-        allTVData = getAllTvShows(cursor, session.get("current_tv_filter"))
-        session["all_tv"] = allTVData
-        connection.commit()
-        connection.close()
-        
-      return render_template("explore.html", 
-                            session=True, 
-                            logged_in=True, 
-                            option="all_tv",  
-                            data=session.get("all_tv"))
+      return renderContentPage("all_tv")
 
     #########################
     ### GET ALL FAVORITES ###
@@ -704,10 +1174,7 @@ def explore():
     ###################################
     elif "movie_search" in request.form:
       searchKey = request.form.get("movie_search")
-      with connection.cursor() as cursor:
-        searchData = get_movie_search(cursor, searchKey)
-        connection.commit()
-        connection.close()
+      searchData = searchCatalog("Movie", searchKey)
         
       return render_template("explore.html", 
                             session=True, 
@@ -720,10 +1187,7 @@ def explore():
     ####################################
     elif "tv_search" in request.form:
       searchKey = request.form.get("tv_search")
-      with connection.cursor() as cursor:
-        searchData = get_tv_search(cursor, searchKey)
-        connection.commit()
-        connection.close()
+      searchData = searchCatalog("TV Show", searchKey)
         
       return render_template("explore.html", 
                             session=True, 
@@ -735,7 +1199,6 @@ def explore():
     ### USER FAVORITED or UNFAVORITED ###
     #####################################
     else:
-      print(list(request.form))
       buttonInfo = list(request.form)[0].split("-")
       favorite_class = buttonInfo[0].strip()
       content_id = buttonInfo[1].strip()
@@ -746,70 +1209,44 @@ def explore():
                                 session.get("userName"),
                                 session.get("userPassword"))
 
+      with connection.cursor() as cursor:
+        result = toggleFavorite(cursor,
+                                session.get("user_id"),
+                                content_id,
+                                favorite_class == "favorite")
+      connection.commit()
+      connection.close()
+
+      # Favorites and recommendations are read from the updated id set
+      if result["changed"]:
+        updateFavoriteCache(session.get("user_id"),
+                            content_id,
+                            result["favorited"])
+
       #################
       ### FAVORITED ###
       #################
-      if favorite_class == "favorite":      
-        with connection.cursor() as cursor:
-          if checkUserFavoriteExists(cursor,
-                                    session.get("user_id"),
-                                    content_id):
-                        
-              connection.close()
-              flash("You Have Already Favorited This!!",
-                    category="success")
-          else:
-              if addNewFavorite(cursor,
-                                session.get("user_id"),
-                                content_id):
-                flash("You have a new favorite!!",
-                    category="success")
-                session["all_favorites"] = getUserFavorites(cursor, 
-                                                            session.get("user_id"), 
-                                                            session.get("current_sub_filter"))
-              else:
-                flash("Error encountered when adding favorite. Please try again.",
-                    category="error")
-                
-              connection.commit()
-              connection.close()
-        
-          if type == "Movie":
-            return render_template("explore.html", 
-                                    session=True, 
-                                    logged_in=True, 
-                                    option="all_movies", 
-                                    data=session.get("all_movies"))
-          else:
-            return render_template("explore.html", 
-                          session=True, 
-                          logged_in=True, 
-                          option="all_tv", 
-                          data=session.get("all_tv"))
+      if result["favorited"]:
+        if result["changed"]:
+          flash("You have a new favorite!!",
+              category="success")
+        else:
+          flash("You Have Already Favorited This!!",
+              category="success")
+
+        # Re-render the library page the favorite was clicked on
+        if type == "Movie":
+          return renderContentPage("all_movies")
+        else:
+          return renderContentPage("all_tv")
 
       ###################
       ### UNFAVORITED ###
       ###################
       else:
-        with connection.cursor() as cursor:
-          if checkUserFavoriteExists(cursor,
-                                     session.get("user_id"),
-                                     content_id):
-                        
-            if removeFavorite(cursor,
-                              session.get("user_id"),
-                              content_id):
-              flash("You have removed a favorite!!",
-                  category="success")
-              session["all_favorites"] = getUserFavorites(cursor, 
-                                                          session.get("user_id"), 
-                                                          session.get("current_sub_filter"))
-            else:
-              flash("Error encountered when removing favorite. Please try again.",
-                  category="error")
-                
-        connection.commit()
-        connection.close()
+        if result["changed"]:
+          flash("You have removed a favorite!!",
+              category="success")
         
         return redirect(url_for("views.explore"))
  
@@ -1019,8 +1456,9 @@ def billing():
       year = datetime.now().year
 
     with connection.cursor() as cursor:
-      result = getBill(cursor, month, year, session.get("user_id"))
-      total_cost = getTotal(cursor, month, year, session.get("user_id"))
+      summary = getBillingSummary(cursor, month, year, session.get("user_id"))
+      result = summary["bill"]
+      total_cost = summary["total"]
 
     if result and total_cost:
       connection.commit()
@@ -1049,8 +1487,9 @@ def billing():
     month = datetime.now().month
     year = datetime.now().year
     with connection.cursor() as cursor:
-      result = getBill(cursor, month, year, session.get("user_id"))
-      total_cost = getTotal(cursor, month, year, session.get("user_id"))
+      summary = getBillingSummary(cursor, month, year, session.get("user_id"))
+      result = summary["bill"]
+      total_cost = summary["total"]
 
     if result and total_cost:    
       connection.commit()
@@ -1100,8 +1539,9 @@ def viewStats():
       year = datetime.now().year
   
     with connection.cursor() as cursor:
-      mostViewed = getMostViewed(cursor, month, year, session.get("user_id"))
-      mostBilled = getMostBilled(cursor, month, year, session.get("user_id"))
+      summary = getBillingSummary(cursor, month, year, session.get("user_id"))
+      mostViewed = summary["most_viewed"]
+      mostBilled = summary["most_billed"]
 
     if mostViewed and mostBilled:  
       connection.commit()
@@ -1130,8 +1570,9 @@ def viewStats():
     month = datetime.now().month
     year = datetime.now().year
     with connection.cursor() as cursor:
-      mostViewed = getMostViewed(cursor, month, year, session.get("user_id"))
-      mostBilled = getMostBilled(cursor, month, year, session.get("user_id"))
+      summary = getBillingSummary(cursor, month, year, session.get("user_id"))
+      mostViewed = summary["most_viewed"]
+      mostBilled = summary["most_billed"]
 
     if mostBilled and mostViewed:    
       connection.commit()
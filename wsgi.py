@@ -0,0 +1,43 @@
+import gc
+import os
+from flask import session
+from website import create_app
+from website.views import warmCatalog
+from database.dbHelpers import closePools
+
+app = create_app()  # The WSGI application (e.g. gunicorn wsgi:app)
+
+
+def warmCaches(app):
+  """
+  Warm the shared catalog caches before the server forks its workers.
+  Database credentials come from STREAMEASY_DB_HOST, STREAMEASY_DB_USER
+  and STREAMEASY_DB_PASSWORD; the host must match the one users enter
+  on the home page for the warm caches to be used.
+  Parameters:
+    app: the Flask application
+  Return: True if the caches were warmed, False if no credentials are set
+  """
+  hostName = os.environ.get("STREAMEASY_DB_HOST")
+  userName = os.environ.get("STREAMEASY_DB_USER")
+  userPassword = os.environ.get("STREAMEASY_DB_PASSWORD")
+  if not (hostName and userName and userPassword is not None):
+    return False
+
+  with app.test_request_context():
+    session["hostName"] = hostName
+    session["userName"] = userName
+    session["userPassword"] = userPassword
+    warmCatalog()
+
+  # Workers open their own connections after the fork
+  closePools()
+
+  # Keep the warm objects out of the garbage collector so the workers'
+  # copy-on-write pages are not touched by collections
+  gc.freeze()
+  return True
+
+
+if os.environ.get("STREAMEASY_WARM_CACHES", "1") != "0":
+  warmCaches(app)